@@ -26,6 +26,12 @@
         "wizard/product_barcode_wizard_views.xml",
         "report/product_barcode_report.xml",
     ],
+    "assets": {
+        "web.assets_backend": [
+            "sale_custom/static/src/js/nw_sale_order_form.js",  # Batched barcode scanning
+            "sale_custom/static/src/js/nw_barcode_image_field.js",  # Cached barcode images
+        ],
+    },
     "installable": True,
     "application": True,
 }
@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 
-from . import controllers
\ No newline at end of file
+from . import controllers
+from . import nw_product
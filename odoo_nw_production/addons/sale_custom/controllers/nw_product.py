@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from werkzeug.exceptions import NotFound
+
+from odoo import http
+from odoo.http import request
+
+# Browser cache lifetime of an image requested with its checksum (?unique=)
+BARCODE_IMAGE_MAX_AGE = 365 * 24 * 3600
+
+
+class NwProductBarcode(http.Controller):
+
+    @http.route('/sale_custom/product/<int:product_id>/barcode.png', type='http', auth='user')
+    def product_barcode_image(self, product_id, unique=None, **kw):
+        """
+        Stored barcode image of a product, with HTTP caching
+
+        The ETag is the attachment checksum, so browsers revalidate with a
+        304 instead of downloading the image again. Links that carry the
+        checksum as ``unique`` are cached for a year: a new barcode gives a
+        new checksum and so a new URL. An image that is still pending is
+        rendered on the first request (as superuser: readers of a product
+        may not be allowed to write it).
+        """
+        product = request.env['nw.product'].browse(product_id).exists()
+        if not product or not product.barcode:
+            raise NotFound()
+        if product.barcode_image_pending:
+            product.sudo()._generate_barcode_images()
+
+        attachment = request.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'nw.product'),
+            ('res_field', '=', 'barcode_image'),
+            ('res_id', '=', product.id),
+        ], limit=1)
+        if not attachment:
+            raise NotFound()
+
+        etag = '"%s"' % attachment.checksum
+        if unique and unique == attachment.checksum:
+            cache_control = 'private, max-age=%d, immutable' % BARCODE_IMAGE_MAX_AGE
+        else:
+            cache_control = 'private, no-cache'
+        headers = [('ETag', etag), ('Cache-Control', cache_control)]
+
+        if etag in request.httprequest.headers.get('If-None-Match', ''):
+            return request.make_response(b'', headers=headers, status=304)
+
+        data = attachment.raw
+        return request.make_response(data, headers=headers + [
+            ('Content-Type', 'image/png'),
+            ('Content-Length', len(data)),
+        ])
@@ -5,4 +5,5 @@ from . import nw_customer
 from . import nw_product
 from . import nw_sale_order
 from . import print_server_models
+from . import nw_print_job
 from . import print_config_settings
@@ -1,5 +1,11 @@
+from collections import defaultdict
+
 from odoo import models, fields, api
 from odoo.exceptions import UserError
+from odoo.tools import float_compare
+
+# Description of the line that carries a customer's balance forward
+CARRY_FORWARD_NAME = "ยอดยกมา"
 
 
 class Customer(models.Model):
@@ -15,13 +21,24 @@ class Customer(models.Model):
     account_line_ids = fields.One2many(
         "nw.account.line", "customer_id", string="Payment Lines"
     )
+    # รายการที่ถูกตัดยอดแล้ว (archived) เก็บไว้เป็นประวัติ
+    account_line_history_ids = fields.One2many(
+        "nw.account.line",
+        "customer_id",
+        string="History",
+        domain=[("active", "=", False)],
+        context={"active_test": False},
+        readonly=True,
+    )
     total_balance = fields.Float(
         string="ยอดค้างชำระ",
         compute="_compute_total_balance",
         store=True,  # บันทึกลงฐานข้อมูลเพื่อให้ค้นหาหรือ Group by ได้
     )
 
-    @api.depends("account_line_ids.amount", "account_line_ids.transaction_type")
+    @api.depends(
+        "account_line_ids.amount", "account_line_ids.transaction_type", "account_line_ids.active"
+    )
     def _compute_total_balance(self):
         for rec in self:
             balance = 0.0
@@ -36,34 +53,67 @@ class Customer(models.Model):
                 rec.total_balance = balance
 
     def action_clear_lines(self):
-        """ล้างรายการทั้งหมดแล้วตั้งยอดยกมา"""
-        for rec in self:
-            # 1. เก็บยอดคงเหลือปัจจุบันไว้ก่อน
-            current_balance = rec.total_balance
+        """ตัดยอด: เก็บรายการเดิมเป็นประวัติ (archive) แล้วตั้งยอดยกมา"""
+        self._carry_forward_balances([("customer_id", "in", self.ids)])
 
-            # 2. ลบรายการเดิมทั้งหมดทิ้ง
-            rec.account_line_ids.unlink()
+    @api.model
+    def _carry_forward_balances(self, domain=None):
+        """
+        Replace the open lines of customers with one carry-forward line
+
+        Only customers with lines added since their last carry-forward are
+        touched. Balances are read with one grouped query, all old lines
+        are archived (kept as history) with one write and the new lines
+        are created together, so total_balance is recomputed once for the
+        whole batch.
+
+        Args:
+            domain: Extra nw.account.line domain restricting the customers
+                (default: all customers)
+        """
+        Line = self.env["nw.account.line"]
+        domain = list(domain or [])
+        customer_ids = {
+            group["customer_id"][0]
+            for group in Line.read_group(
+                domain + [("is_carry_forward", "=", False), ("customer_id", "!=", False)],
+                ["customer_id"],
+                ["customer_id"],
+            )
+        }
+        if not customer_ids:
+            return
 
-            # 3. กำหนดประเภทรายการ (ถ้าติดลบ คือ หนี้/Debit, ถ้าบวก คือ จ่ายเกิน/Credit
-            if current_balance < 0:
-                trans_type = "debit"
+        line_domain = [("customer_id", "in", list(customer_ids))]
+        balances = defaultdict(float)
+        for group in Line.read_group(
+            line_domain, ["amount"], ["customer_id", "transaction_type"], lazy=False
+        ):
+            # Credit = จ่ายเงินเข้ามา (บวก), Debit = เป็นหนี้ (ลบ)
+            sign = 1 if group["transaction_type"] == "credit" else -1
+            balances[group["customer_id"][0]] += sign * group["amount"]
 
-                # 4. สร้างรายการใหม่ "ยอดยกมา"
-                self.env["nw.account.line"].create(
-                    {
-                        "customer_id": rec.id,
-                        "name": "ยอดยกมา",
-                        "amount": abs(current_balance),
-                        "transaction_type": trans_type,
-                    }
-                )
+        Line.search(line_domain).write({"active": False})
+
+        # ยอดคงเหลือเป็นบวก (จ่ายเกิน) ไม่ยกไป เหมือน total_balance
+        Line.create([
+            {
+                "customer_id": customer_id,
+                "name": CARRY_FORWARD_NAME,
+                "amount": abs(balance),
+                "transaction_type": "debit",
+                "is_carry_forward": True,
+            }
+            for customer_id, balance in balances.items()
+            if float_compare(balance, 0.0, precision_digits=2) < 0
+        ])
 
 
 class NwAccountLine(models.Model):
     _name = "nw.account.line"
     _description = "NW Account Line"
 
-    customer_id = fields.Many2one("nw.customer", string="Customer", ondelete="cascade")
+    customer_id = fields.Many2one("nw.customer", string="Customer", ondelete="cascade", index=True)
     name = fields.Char(string="Description")
     amount = fields.Float(string="Unit Price")
     transaction_type = fields.Selection(
@@ -77,13 +127,17 @@ class NwAccountLine(models.Model):
         help="ระบุว่ารายการนี้เป็นหนี้ (-) หรือเงินที่ลูกค้าจ่าย (+)",
     )
     is_manual = fields.Boolean(string="Manual Entry", default=False)
+    is_carry_forward = fields.Boolean(string="Carry Forward", default=False, readonly=True)
+    # ตัดยอดแล้ว = archived (ไม่นับในยอดค้างชำระ แต่ยังเก็บเป็นประวัติ)
+    active = fields.Boolean(default=True)
 
-    @api.model
-    def create(self, vals):
-        if not vals.get('name'):
-            vals['name'] = f"{self.env.user.name} เพิ่มยอด"
-            vals['is_manual'] = True
-        return super(NwAccountLine, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if not vals.get('name'):
+                vals['name'] = f"{self.env.user.name} เพิ่มยอด"
+                vals['is_manual'] = True
+        return super(NwAccountLine, self).create(vals_list)
 
     def unlink(self):
         for rec in self:
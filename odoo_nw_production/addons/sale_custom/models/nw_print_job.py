@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+from ..tools import print_server_client
+
+_logger = logging.getLogger(__name__)
+
+# Jobs picked up per cron run
+PRINT_JOB_BATCH_SIZE = 50
+# Finished jobs older than this are removed by the autovacuum
+PRINT_JOB_KEEP_DAYS = 7
+
+
+class NwPrintJob(models.Model):
+    """
+    Print outbox
+
+    Print buttons only create a queued job; the cron renders the PDFs and
+    delivers them to the Print Server in batches, retrying failures with
+    exponential backoff.
+    """
+    _name = "nw.print.job"
+    _description = "Print Job"
+    _rec_name = "order_id"
+    _order = "id desc"
+
+    order_id = fields.Many2one(
+        "nw.sale.order", string="Sale Order", required=True, ondelete="cascade", index=True
+    )
+    report_name = fields.Char(string="Report", required=True)
+    printer_name = fields.Char(string="Printer", required=True)
+    priority = fields.Selection(
+        [
+            ("high", "High"),
+            ("normal", "Normal"),
+            ("low", "Low"),
+        ],
+        string="Priority",
+        default="normal",
+        required=True,
+        help="Print Server queue priority: single receipts print before bulk reprints.",
+    )
+    state = fields.Selection(
+        [
+            ("queued", "Queued"),
+            ("done", "Sent"),
+            ("failed", "Failed"),
+        ],
+        string="Status",
+        default="queued",
+        required=True,
+        index=True,
+    )
+    attempts = fields.Integer(string="Attempts", default=0, readonly=True)
+    next_attempt = fields.Datetime(
+        string="Next Attempt", default=fields.Datetime.now, index=True
+    )
+    sent_at = fields.Datetime(string="Sent At", readonly=True)
+    server_job_id = fields.Char(string="Server Job ID", readonly=True)
+    last_error = fields.Text(string="Last Error", readonly=True)
+
+    def action_retry(self):
+        """Put failed jobs back in the queue"""
+        self.write({
+            "state": "queued",
+            "attempts": 0,
+            "next_attempt": fields.Datetime.now(),
+            "last_error": False,
+        })
+        self._trigger_delivery()
+
+    def _trigger_delivery(self, at=None):
+        """Wake the print job cron (now, or at a given time)"""
+        cron = self.env.ref("sale_custom.ir_cron_process_print_jobs", raise_if_not_found=False)
+        if cron:
+            cron._trigger(at=at)
+
+    @api.model
+    def _cron_process_print_jobs(self, limit=PRINT_JOB_BATCH_SIZE):
+        """
+        Deliver due jobs to the Print Server
+
+        Jobs are grouped by report, printer, priority and user so each group
+        is rendered and sent with a single batch request. Each group is
+        committed on its own so a crash never re-sends documents that were
+        already delivered.
+        """
+        now = fields.Datetime.now()
+        jobs = self.search(
+            [("state", "=", "queued"), ("next_attempt", "<=", now)],
+            order="id",
+            limit=limit,
+        )
+
+        groups = {}
+        for job in jobs:
+            key = (job.report_name, job.printer_name, job.priority, job.create_uid)
+            groups[key] = groups.get(key, self.browse()) | job
+
+        for (report_name, printer_name, _priority, _user), group in groups.items():
+            group._deliver(report_name, printer_name)
+            if not getattr(threading.current_thread(), "testing", False):
+                self.env.cr.commit()
+
+        # More jobs due than one run handles: continue right away,
+        # otherwise wake up when the next retry is due
+        if len(jobs) == limit:
+            self._trigger_delivery()
+        else:
+            pending = self.search([("state", "=", "queued")], order="next_attempt", limit=1)
+            if pending:
+                self._trigger_delivery(at=max(pending.next_attempt, now))
+
+    def _deliver(self, report_name, printer_name):
+        """Render and send one group of jobs, recording the outcome per job"""
+        for job in self:
+            job.attempts += 1
+
+        # The Print Server schedules fairly per client: the user who
+        # queued the jobs stands for their terminal
+        try:
+            results = self.order_id._post_print_batch(
+                report_name,
+                printer_name,
+                priority=self[:1].priority or "normal",
+                client_id=self[:1].create_uid.login,
+                job_ids={job.order_id.id: job.id for job in self},
+            )
+        except print_server_client.PrintServerUnavailable as e:
+            # Nothing was sent: wait for the circuit breaker's next health
+            # check instead of using up the jobs' retries
+            breaker = print_server_client.get_client(self.env).breaker
+            for job in self:
+                job.attempts -= 1
+            self.write({
+                "next_attempt": fields.Datetime.now() + timedelta(seconds=breaker.reset_timeout),
+                "last_error": str(e),
+            })
+            return
+        except Exception as e:
+            _logger.warning(
+                "Print delivery of %s job(s) to %s failed: %s", len(self), printer_name, e
+            )
+            self._schedule_retry(str(e))
+            return
+
+        now = fields.Datetime.now()
+        for orders, result in results:
+            chunk_jobs = self.filtered(lambda j: j.order_id in orders)
+            if result.get("success"):
+                chunk_jobs.write({
+                    "state": "done",
+                    "sent_at": now,
+                    "server_job_id": result.get("job_id"),
+                    "last_error": False,
+                })
+            else:
+                chunk_jobs._schedule_retry(result.get("error") or "Unknown error")
+
+    def _schedule_retry(self, error):
+        """Back off exponentially, or fail the job once retries are used up"""
+        config_param = self.env["ir.config_parameter"].sudo()
+        max_retries = int(config_param.get_param("sale_custom.print_max_retries", 3))
+        retry_delay = int(config_param.get_param("sale_custom.print_retry_delay", 10))
+
+        now = fields.Datetime.now()
+        for job in self:
+            if job.attempts > max_retries:
+                job.write({"state": "failed", "last_error": error})
+                _logger.error(
+                    "Print job %s (%s) failed after %s attempts: %s",
+                    job.id, job.order_id.name, job.attempts, error,
+                )
+            else:
+                delay = retry_delay * 2 ** (job.attempts - 1)
+                job.write({
+                    "next_attempt": now + timedelta(seconds=delay),
+                    "last_error": error,
+                })
+
+    @api.autovacuum
+    def _gc_sent_jobs(self):
+        """Remove delivered jobs older than PRINT_JOB_KEEP_DAYS"""
+        threshold = fields.Datetime.now() - timedelta(days=PRINT_JOB_KEEP_DAYS)
+        self.search([("state", "=", "done"), ("sent_at", "<", threshold)]).unlink()
@@ -1,10 +1,35 @@
-from odoo import models, fields, api
-from odoo.exceptions import UserError
 import base64
+import logging
+import threading
 from io import BytesIO
+
+from odoo import models, fields, api, tools
+from odoo.exceptions import UserError
 from reportlab.graphics.barcode import createBarcodeDrawing
 from reportlab.graphics import renderPM
 
+_logger = logging.getLogger(__name__)
+
+# Barcode changes on up to this many products render the images right away;
+# bigger changes (imports, mass edits) are left to the cron
+BARCODE_IMAGE_SYNC_LIMIT = 10
+# Images rendered per cron run (committed per run)
+BARCODE_IMAGE_BATCH_SIZE = 200
+# Fields returned by _lookup_barcode(); changing them clears its cache
+BARCODE_LOOKUP_FIELDS = {'barcode', 'sale_price', 'add_price'}
+# Version of the barcode lookup cache, bumped when a change is committed
+BARCODE_LOOKUP_SEQUENCE = 'nw_product_barcode_lookup_version'
+# Transaction data key: barcode lookup fields changed, not yet committed
+BARCODE_LOOKUP_CHANGED = 'sale_custom.barcode_lookup_changed'
+
+
+def _render_barcode_png(barcode):
+    """Render a barcode as a Code128 PNG (raises if it cannot be encoded)"""
+    drawing = createBarcodeDrawing('Code128', value=barcode, barHeight=50, humanReadable=True)
+    buffer = BytesIO()
+    renderPM.drawToFile(drawing, buffer, 'PNG')
+    return buffer.getvalue()
+
 
 class NwProduct(models.Model):
     _name = "nw.product"
@@ -14,27 +39,38 @@ class NwProduct(models.Model):
     sale_price = fields.Float(string="ราคาขาย")
     add_price = fields.Float(string="ราคาสำหรับบวกเพิ่ม")
     barcode = fields.Char(string="Barcode" , copy=False)
-    barcode_image = fields.Binary(string="Barcode Image", compute="_compute_barcode_image")
-    
+    # Rendered once per barcode and kept as an attachment, so reading a
+    # product never renders; served by /sale_custom/product/<id>/barcode.png
+    # with HTTP caching
+    barcode_image = fields.Binary(string="Barcode Image", attachment=True, readonly=True, copy=False)
+    # Part of the image URL, so a new barcode gives a new URL
+    barcode_image_checksum = fields.Char(compute="_compute_barcode_image_checksum")
+    barcode_image_pending = fields.Boolean(
+        string="Barcode Image Pending",
+        compute="_compute_barcode_image_pending",
+        store=True,
+        readonly=False,
+        index=True,
+        copy=False,
+    )
+
     @api.depends('barcode')
-    def _compute_barcode_image(self):
+    def _compute_barcode_image_pending(self):
+        # A new barcode needs a new image (also set for existing products on install)
         for record in self:
-            if record.barcode:
-                try:
-                    # Create barcode drawing (Code128 is standard)
-                    drawing = createBarcodeDrawing('Code128', value=record.barcode, barHeight=50, humanReadable=True)
-                    
-                    # Render to PNG
-                    buffer = BytesIO()
-                    renderPM.drawToFile(drawing, buffer, 'PNG')
-                    
-                    # Save as base64
-                    record.barcode_image = base64.b64encode(buffer.getvalue())
-                except Exception:
-                    # Fallback if generation fails (e.g. invalid chars)
-                    record.barcode_image = False
-            else:
-                record.barcode_image = False
+            record.barcode_image_pending = bool(record.barcode)
+
+    @api.depends('barcode_image')
+    def _compute_barcode_image_checksum(self):
+        attachments = self.env['ir.attachment'].sudo().search_read([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'barcode_image'),
+            ('res_id', 'in', self.ids),
+        ], ['res_id', 'checksum'])
+        checksums = {attachment['res_id']: attachment['checksum'] for attachment in attachments}
+        for record in self:
+            record.barcode_image_checksum = checksums.get(record.id, False)
+
     default_code = fields.Char(string="Internal Reference")
     note = fields.Text(string="Note")
     image = fields.Binary(string="Image")
@@ -42,11 +78,16 @@ class NwProduct(models.Model):
         "product.category", string="Product Category", ondelete="set null"
     )
 
-    @api.model
-    def create(self, vals):
-        if vals.get('barcode'):
-            self._check_barcode_unique_explicit(vals['barcode'])
-        return super(NwProduct, self).create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('barcode'):
+                self._check_barcode_unique_explicit(vals['barcode'])
+        records = super(NwProduct, self).create(vals_list)
+        if any(vals.get('barcode') for vals in vals_list):
+            records._clear_barcode_lookup_cache()
+        records._schedule_barcode_images()
+        return records
 
     def write(self, vals):
         if 'barcode' in vals:
@@ -54,16 +95,144 @@ class NwProduct(models.Model):
                 barcode = vals.get('barcode')
                 if barcode:
                     self._check_barcode_unique_explicit(barcode, exclude_id=record.id)
-        return super(NwProduct, self).write(vals)
+            # The old image no longer matches
+            vals = dict(vals, barcode_image=False)
+        res = super(NwProduct, self).write(vals)
+        if BARCODE_LOOKUP_FIELDS.intersection(vals):
+            self._clear_barcode_lookup_cache()
+        if 'barcode' in vals:
+            self._schedule_barcode_images()
+        return res
+
+    def unlink(self):
+        res = super(NwProduct, self).unlink()
+        self._clear_barcode_lookup_cache()
+        return res
+
+    @api.model
+    def load(self, fields, data):
+        # Imported rows skip the per-record clear; the cache is cleared once here
+        res = super(NwProduct, self).load(fields, data)
+        self.with_context(import_file=False)._clear_barcode_lookup_cache()
+        return res
+
+    def init(self):
+        self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {BARCODE_LOOKUP_SEQUENCE}")
+
+    def _clear_barcode_lookup_cache(self):
+        """
+        Drop the cached _lookup_barcode() results
+
+        Only the barcode lookups are dropped, not the registry caches: the
+        rest of this transaction looks barcodes up uncached, and its commit
+        bumps the cache version, so every worker reads them again. During
+        an import this runs once, at the end of load().
+        """
+        if self.env.context.get('import_file'):
+            return
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get(BARCODE_LOOKUP_CHANGED):
+            return
+        postcommit.data[BARCODE_LOOKUP_CHANGED] = True
+        registry = self.pool
+
+        def bump_version():
+            with registry.cursor() as cr:
+                cr.execute("SELECT nextval(%s)", (BARCODE_LOOKUP_SEQUENCE,))
+
+        postcommit.add(bump_version)
+
+    def _barcode_lookup_version(self):
+        self.env.cr.execute(f"SELECT last_value FROM {BARCODE_LOOKUP_SEQUENCE}")
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _lookup_barcode(self, barcode):
+        """
+        Product id, sale price and add price for a barcode, or None
+
+        Scanning looks products up here instead of searching; results
+        (including unknown barcodes) stay cached until a product is
+        created or deleted or its barcode or prices change. The unique
+        constraint on barcode gives the lookup its index.
+        """
+        if self.env.cr.postcommit.data.get(BARCODE_LOOKUP_CHANGED):
+            # Uncommitted changes must not reach the shared cache
+            return self._fetch_barcode(barcode)
+        return self._lookup_barcode_cached(barcode, self._barcode_lookup_version())
+
+    @api.model
+    @tools.ormcache('barcode', 'version')
+    def _lookup_barcode_cached(self, barcode, version):
+        # Results of older versions are never read again and age out
+        return self._fetch_barcode(barcode)
+
+    @api.model
+    def _fetch_barcode(self, barcode):
+        self.flush(list(BARCODE_LOOKUP_FIELDS))
+        self.env.cr.execute(
+            "SELECT id, sale_price, add_price FROM nw_product WHERE barcode = %s",
+            (barcode,),
+        )
+        row = self.env.cr.fetchone()
+        return tuple(row) if row else None
+
+    def _schedule_barcode_images(self):
+        """
+        Render the images of products whose barcode changed
+
+        A form edit gets its image right away; imports and mass edits are
+        rendered in the background by the cron so they are not slowed down.
+        """
+        pending = self.filtered('barcode_image_pending')
+        if not pending:
+            return
+        if len(pending) <= BARCODE_IMAGE_SYNC_LIMIT and not self.env.context.get('import_file'):
+            pending._generate_barcode_images()
+        else:
+            self._trigger_barcode_images()
+
+    def _trigger_barcode_images(self):
+        """Wake the barcode image cron"""
+        cron = self.env.ref("sale_custom.ir_cron_generate_barcode_images", raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    def _generate_barcode_images(self):
+        """Render and store the barcode image of each product"""
+        for record in self:
+            image = False
+            if record.barcode:
+                try:
+                    image = base64.b64encode(_render_barcode_png(record.barcode))
+                except Exception as e:
+                    # e.g. characters Code128 cannot encode
+                    _logger.warning("Cannot render barcode %r of product %s: %s", record.barcode, record.id, e)
+            record.write({'barcode_image': image, 'barcode_image_pending': False})
+
+    @api.model
+    def _cron_generate_barcode_images(self, limit=BARCODE_IMAGE_BATCH_SIZE):
+        """
+        Render pending barcode images in batches
+
+        Each batch is committed on its own; the cron wakes itself again
+        until no product is left pending.
+        """
+        products = self.with_context(active_test=False).search(
+            [('barcode_image_pending', '=', True)], order='id', limit=limit
+        )
+        products._generate_barcode_images()
+        if not getattr(threading.current_thread(), "testing", False):
+            self.env.cr.commit()
+        if len(products) == limit:
+            self._trigger_barcode_images()
 
     def _check_barcode_unique_explicit(self, barcode, exclude_id=None):
-        domain = [('barcode', '=', barcode)]
-        if exclude_id:
-            domain.append(('id', '!=', exclude_id))
-        
-        # Use active_test=False to find archived records too
-        existing = self.with_context(active_test=False).search(domain, limit=1)
-        if existing:
+        # The cached lookup sees every product (no record rules); the
+        # unique constraint still catches a race with another transaction
+        found = self._lookup_barcode(barcode)
+        if found and found[0] != exclude_id:
+            existing = self.browse(found[0])
             raise UserError(f"บาร์โค้ด '{barcode}' มีอยู่ในระบบแล้ว (ซ้ำกับสินค้า: {existing.name})")
 
     _sql_constraints = [
@@ -1,17 +1,32 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import UserError
 import xlsxwriter
 import io
 import base64
-import requests
+import hashlib
+import json
 import logging
+import threading
+import time
+
+from ..tools import print_server_client
 
 _logger = logging.getLogger(__name__)
 
+# Orders rendered into one PDF per print server document in batch printing
+BATCH_RENDER_SIZE = 20
+# Name prefix of ir.attachment records holding cached report PDFs
+PDF_CACHE_PREFIX = "print_cache-"
+# Orders deleted (and committed) at a time by the weekly cleanup
+CLEAR_ORDERS_CHUNK_SIZE = 500
+# Share of the cron time limit the cleanup may use before it continues in a new run
+CLEAR_ORDERS_TIME_SHARE = 0.5
+# Cutoff date of a cleanup that ran out of time, kept until it is finished
+CLEAR_ORDERS_RESUME_PARAM = "sale_custom.clear_orders_before"
+
 
 class NwSaleOrder(models.Model):
     _name = "nw.sale.order"
-    _inherit = ["barcodes.barcode_events_mixin"]
     _description = "NW Sale Order"
 
     name = fields.Char(
@@ -46,31 +61,51 @@ class NwSaleOrder(models.Model):
 
     is_copy = fields.Boolean(string="สำเนา", default=False)
 
-    def on_barcode_scanned(self, barcode):
-        _logger.info(f"Barcode Scanned: {barcode}")
-        
-        product = self.env['nw.product'].search([('barcode', '=', barcode)], limit=1)
-        _logger.info(f"Product Found: {product}")
-        
-        if product:
-            # Check if product already exists in lines
-            existing_line = self.order_line_ids.filtered(lambda l: l.product_id == product)
-            if existing_line:
-                existing_line.quantity += 1
+    def add_barcodes(self, barcodes):
+        """
+        Add a batch of scanned barcodes to a draft order in one call
+
+        The order form buffers scans for a moment and sends them here
+        together instead of one onchange per scan. Repeated barcodes and
+        products already on the order only raise the quantity; existing
+        lines are found through a product id -> line dict.
+
+        Returns:
+            list: Barcodes with no matching product
+        """
+        self.ensure_one()
+        if self.order_status != "draft":
+            raise UserError("เพิ่มสินค้าได้เฉพาะใบสั่งขายสถานะ Draft เท่านั้น")
+
+        Product = self.env["nw.product"]
+        quantities, prices, unknown = {}, {}, []
+        for barcode in barcodes:
+            found = Product._lookup_barcode(barcode)
+            if not found:
+                unknown.append(barcode)
+                continue
+            product_id, sale_price, add_price = found
+            quantities[product_id] = quantities.get(product_id, 0) + 1
+            prices[product_id] = sale_price + add_price if self.is_add_sale_price else sale_price
+
+        lines = {}
+        for line in self.order_line_ids:
+            lines.setdefault(line.product_id.id, line)
+
+        commands = []
+        for product_id, quantity in quantities.items():
+            line = lines.get(product_id)
+            if line:
+                commands.append((1, line.id, {"quantity": line.quantity + quantity}))
             else:
-                # Use One2many command to add line dynamically (Command: 0 = CREATE)
-                self.order_line_ids = [(0, 0, {
-                    'product_id': product.id,
-                    'quantity': 1,
-                    'price': product.sale_price + product.add_price if self.is_add_sale_price else product.sale_price,
-                })]
-        else:
-            return {
-                'warning': {
-                    'title': "ไม่พบสินค้า",
-                    'message': f"ไม่พบสินค้าที่มีบาร์โค้ด: {barcode}",
-                }
-            }
+                commands.append((0, 0, {
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "price": prices[product_id],
+                }))
+        if commands:
+            self.write({"order_line_ids": commands})
+        return unknown
 
     def action_confirm(self):
         for rec in self:
@@ -134,35 +169,92 @@ class NwSaleOrder(models.Model):
 
     @api.model
     def _cron_clear_weekly_orders(self, days=0):
+        """
+        Cron Job: ลบ Order ที่เก่ากว่า days วัน
+
+        A scheduled run that stopped at the cron time limit kept its cutoff
+        date in CLEAR_ORDERS_RESUME_PARAM; the next run finishes those
+        orders (without clearing customers again) instead of starting over.
+        """
+        resume_before = self.env["ir.config_parameter"].sudo().get_param(CLEAR_ORDERS_RESUME_PARAM)
+        if resume_before:
+            self._clear_orders_before(fields.Date.to_date(resume_before), scheduled=True)
+        else:
+            self._clear_orders(days, scheduled=True)
+
+    @api.model
+    def _clear_orders(self, days, scheduled=False):
         """
         ฟังก์ชันลบ Order
-        - days: จำนวนวันที่ต้องการย้อนหลัง (ค่า Default 7 สำหรับ Cron Job เดิม)
-        - clear_all: ถ้าเป็น True จะล้างตามเงื่อนไขพิเศษ
+        - days: จำนวนวันที่ต้องการย้อนหลัง (0 = ลบทั้งหมด รวมวันนี้)
+        - scheduled: True เมื่อเรียกจาก Cron Job
+
+        Starts a new cleanup for the given days; an unfinished scheduled
+        run is superseded, so its cutoff date is dropped.
         """
         from datetime import timedelta
 
-        # เรียกใช้ฟังก์ชัน action_clear_lines ของ customer (ตาม Code เดิมของคุณ)
-        all_customers = self.env["nw.customer"].search([])
-        if all_customers:
-            all_customers.action_clear_lines()
+        self.env["ir.config_parameter"].sudo().set_param(CLEAR_ORDERS_RESUME_PARAM, False)
 
-        # กำหนด date_threshold
-        # ถ้า clear_all=True หรือ days=0 ตามโจทย์ -> date_threshold จะเป็น "วันนี้"
-        # คำสั่ง < date_threshold จะลบรายการที่เกิด "ก่อนวันนี้" (ไม่รวมวันนี้)
+        # ตัดยอดยกมา เฉพาะลูกค้าที่มีรายการใหม่ตั้งแต่ตัดยอดครั้งก่อน
+        self.env["nw.customer"]._carry_forward_balances()
+
+        # กำหนด date_threshold = วันนี้ ย้อนหลัง (days - 1) วัน
+        # คำสั่ง < date_threshold จะลบรายการที่เกิด "ก่อน" date_threshold
+        # ถ้า clear_all=True หรือ days=0 -> date_threshold จะเป็น "พรุ่งนี้" จึงลบรายการของวันนี้ด้วย
         target_days = days - 1
         date_threshold = fields.Date.today() - timedelta(days=target_days)
+        self._clear_orders_before(date_threshold, scheduled=scheduled)
 
-        # เงื่อนไขการค้นหา Order
-        domain = [("order_status", "!=", "draft")]
+    @api.model
+    def _clear_orders_before(self, date_threshold, scheduled=False):
+        """
+        Delete the non-draft orders dated before date_threshold in chunks of
+        CLEAR_ORDERS_CHUNK_SIZE. Scheduled runs commit each chunk so locks on
+        nw_sale_order are held only briefly; calls from a request stay in
+        its transaction. When the time budget is used up the cutoff date is
+        kept in CLEAR_ORDERS_RESUME_PARAM and the cron is woken to finish.
+        """
+        params = self.env["ir.config_parameter"].sudo()
+
+        # เงื่อนไขการค้นหา Order (ยกเว้น draft และเฉพาะก่อน date_threshold)
+        domain = [("order_status", "!=", "draft"), ("order_date", "<", date_threshold)]
+        order_ids = self.search(domain, order="id").ids
+
+        started = time.monotonic()
+        budget = self._clear_orders_time_budget(scheduled)
+        commit = scheduled and not getattr(threading.current_thread(), "testing", False)
+        deleted = 0
+        for start in range(0, len(order_ids), CLEAR_ORDERS_CHUNK_SIZE):
+            if time.monotonic() - started > budget:
+                params.set_param(CLEAR_ORDERS_RESUME_PARAM, fields.Date.to_string(date_threshold))
+                if commit:
+                    self.env.cr.commit()
+                _logger.info(
+                    "Order cleanup: time budget used after %s/%s orders, continuing in a new run",
+                    deleted, len(order_ids),
+                )
+                cron = self.env.ref("sale_custom.ir_cron_clear_weekly_orders", raise_if_not_found=False)
+                if cron:
+                    cron._trigger()
+                return
 
-        # เพิ่มเงื่อนไขวันที่
-        domain.append(("order_date", "<", date_threshold))
+            self.browse(order_ids[start:start + CLEAR_ORDERS_CHUNK_SIZE]).unlink()
+            deleted = min(start + CLEAR_ORDERS_CHUNK_SIZE, len(order_ids))
+            if commit:
+                self.env.cr.commit()
+            _logger.info("Order cleanup: %s/%s orders deleted", deleted, len(order_ids))
 
-        # ค้นหา Order ตามเงื่อนไข
-        orders_to_clear = self.search(domain)
+        if params.get_param(CLEAR_ORDERS_RESUME_PARAM):
+            params.set_param(CLEAR_ORDERS_RESUME_PARAM, False)
 
-        for order in orders_to_clear:
-            order.unlink()
+    @api.model
+    def _clear_orders_time_budget(self, scheduled=False):
+        """Seconds the order cleanup may run: a share of the cron or request real time limit"""
+        limit = (tools.config.get("limit_time_real_cron") or -1) if scheduled else -1
+        if limit <= 0:
+            limit = tools.config.get("limit_time_real") or 120
+        return limit * CLEAR_ORDERS_TIME_SHARE
 
     def action_download_excel_report(self):
         """ฟังก์ชันสร้างไฟล์ Excel รายการ Order ทั้งหมด"""
@@ -264,111 +356,368 @@ class NwSaleOrder(models.Model):
         }
 
     def action_print_to_printer_a(self):
-        """Print invoice/delivery using mapped printer"""
-        return self._send_to_print_server(
-            report_name='sale_custom.report_nw_sale_order'
+        """Queue invoice/delivery for printing on the mapped printer"""
+        return self._queue_print_job(
+            report_name='sale_custom.report_nw_sale_order', priority='high'
         )
 
     def action_print_to_printer_b(self):
-        """Print invoice using mapped printer"""
-        return self._send_to_print_server(
-            report_name='sale_custom.report_nw_cash_bill'
+        """Queue invoice for printing on the mapped printer"""
+        return self._queue_print_job(
+            report_name='sale_custom.report_nw_cash_bill', priority='high'
+        )
+
+    def action_print_batch_to_printer_a(self):
+        """Queue invoice/delivery for all selected orders (drafts are skipped)"""
+        return self.filtered(lambda o: o.order_status != "draft")._queue_print_job(
+            report_name='sale_custom.report_nw_sale_order', priority='low'
+        )
+
+    def action_print_batch_to_printer_b(self):
+        """Queue invoice for all selected orders (drafts are skipped)"""
+        return self.filtered(lambda o: o.order_status != "draft")._queue_print_job(
+            report_name='sale_custom.report_nw_cash_bill', priority='low'
         )
 
-    def _send_to_print_server(self, report_name):
+    def _get_report_printer(self, report_name):
         """
-        Generate PDF and send to Print Server using dynamic mapping
+        Find the report action and the printer mapped to it
         
         Args:
             report_name: Odoo report name (e.g., 'sale_custom.report_nw_sale_order')
             
         Returns:
-            Notification action
+            Tuple (report_action, printer_name)
         """
-        self.ensure_one()
+        report_action = self.env['ir.actions.report']._get_report_from_name(report_name)
+        if not report_action:
+            raise UserError(f"Report {report_name} not found")
+            
+        mapping = self.env['print.report.mapping'].search([
+            ('report_id', '=', report_action.id)
+        ], limit=1)
         
-        try:
-            # 1. Find Printer Mapping
-            report_action = self.env['ir.actions.report']._get_report_from_name(report_name)
-            if not report_action:
-                raise UserError(f"Report {report_name} not found")
-                
-            mapping = self.env['print.report.mapping'].search([
-                ('report_id', '=', report_action.id)
-            ], limit=1)
+        if not mapping:
+            raise UserError(
+                f"No printer mapped for report '{report_action.name}'.\n"
+                "Please configure in Print Configuration > Report Mappings."
+            )
             
-            if not mapping:
-                raise UserError(
-                    f"No printer mapped for report '{report_action.name}'.\n"
-                    "Please configure in Print Configuration > Report Mappings."
-                )
-                
-            printer_name = mapping.printer_id.name
+        return report_action, mapping.printer_id.name
+
+    def _queue_print_job(self, report_name, priority='normal'):
+        """
+        Put orders in the print outbox and return immediately
+        
+        Rendering and delivery happen in the print job cron (woken right
+        away), so the cashier can continue with the next customer while
+        the document prints.
+        
+        Args:
+            report_name: Odoo report name (e.g., 'sale_custom.report_nw_sale_order')
+            priority: Print Server priority ('high' for receipts at the
+                counter, 'low' for bulk reprints)
             
-            # 2. Get Print Server URL from config
-            print_server_url = self.env['ir.config_parameter'].sudo().get_param(
-                'sale_custom.print_server_url',
-                default='http://print_server:5000'
-            )
+        Returns:
+            Notification action
+        """
+        if not self:
+            raise UserError("ไม่มีรายการที่พิมพ์ได้ (รายการร่างจะไม่ถูกพิมพ์)")
+        
+        # Fail fast on a missing mapping instead of in the background
+        _, printer_name = self._get_report_printer(report_name)
+        
+        # Clicking again while the first print is still waiting does not
+        # queue (and print) the order twice
+        waiting = self.env['nw.print.job'].search([
+            ('order_id', 'in', self.ids),
+            ('report_name', '=', report_name),
+            ('state', '=', 'queued'),
+        ]).order_id
+        jobs = self.env['nw.print.job'].create([{
+            'order_id': order.id,
+            'report_name': report_name,
+            'printer_name': printer_name,
+            'priority': priority,
+        } for order in self - waiting])
+        jobs._trigger_delivery()
+        
+        target = self.name if len(self) == 1 else f"{len(self)} orders"
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Print Job Queued',
+                'message': f"Queued {target} for {printer_name}",
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    def _render_print_documents(self, report_action):
+        """
+        PDFs to send for these orders, in order
+        
+        Orders with a valid cached PDF reuse it; the others are rendered in
+        chunks of BATCH_RENDER_SIZE with one _render_qweb_pdf call per chunk.
+        
+        Args:
+            report_action: ir.actions.report record
             
-            # 3. Generate PDF
-            pdf_content, _ = report_action._render_qweb_pdf([self.id])
+        Returns:
+            List of (orders, pdf_content) pairs
+        """
+        cached = self._get_cached_pdfs(report_action.report_name)
+        documents = []
+        pending = self.browse()
+        for order in self:
+            if order.id in cached:
+                documents.extend(pending._render_pdf_chunks(report_action))
+                pending = self.browse()
+                documents.append((order, cached[order.id]))
+            else:
+                pending |= order
+        documents.extend(pending._render_pdf_chunks(report_action))
+        return documents
+
+    def _render_pdf_chunks(self, report_action):
+        """Render orders in chunks, caching PDFs that hold a single order"""
+        documents = []
+        for start in range(0, len(self), BATCH_RENDER_SIZE):
+            chunk = self[start:start + BATCH_RENDER_SIZE]
+            pdf_content, _ = report_action._render_qweb_pdf(chunk.ids)
+            if len(chunk) == 1:
+                chunk._store_cached_pdf(report_action.report_name, pdf_content)
+            documents.append((chunk, pdf_content))
+        return documents
+
+    def _get_pdf_cache_key(self, report_name):
+        """
+        Hash of everything the printed document shows
+        
+        Any change to the lines, totals, is_copy flag or customer gives a
+        new key, so a stale cached PDF is never reused.
+        """
+        self.ensure_one()
+        content = {
+            'report': report_name,
+            'name': self.name,
+            'order_date': self.order_date,
+            'total': self.total,
+            'payment_type': self.payment_type,
+            'is_copy': self.is_copy,
+            'customer': [
+                self.customer_id.id,
+                self.customer_id.name,
+                self.customer_id.phone,
+                self.customer_id.address,
+            ],
+            'lines': [
+                [line.product_id.id, line.product_id.name, line.quantity, line.price, line.sub_total]
+                for line in self.order_line_ids
+            ],
+        }
+        digest = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _pdf_cache_name(self, report_name):
+        return f"{PDF_CACHE_PREFIX}{report_name}-{self._get_pdf_cache_key(report_name)}.pdf"
+
+    def _get_cached_pdfs(self, report_name):
+        """
+        Cached PDFs of confirmed orders that are still up to date
+        
+        Returns:
+            Dict {order id: pdf_content}
+        """
+        orders = self.filtered(lambda o: o.order_status == "confirm")
+        if not orders:
+            return {}
+        
+        attachments = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', orders.ids),
+            ('name', '=like', f"{PDF_CACHE_PREFIX}{report_name}-%"),
+        ])
+        by_order = {attachment.res_id: attachment for attachment in attachments}
+        
+        cached = {}
+        for order in orders:
+            attachment = by_order.get(order.id)
+            if attachment and attachment.name == order._pdf_cache_name(report_name):
+                cached[order.id] = attachment.raw
+        return cached
+
+    def _store_cached_pdf(self, report_name, pdf_content):
+        """Cache the rendered PDF of a confirmed order, replacing stale entries"""
+        self.ensure_one()
+        if self.order_status != "confirm":
+            return
+        
+        Attachment = self.env['ir.attachment'].sudo()
+        Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('name', '=like', f"{PDF_CACHE_PREFIX}{report_name}-%"),
+        ]).unlink()
+        Attachment.create({
+            'name': self._pdf_cache_name(report_name),
+            'type': 'binary',
+            'raw': pdf_content,
+            'res_model': self._name,
+            'res_id': self.id,
+            'mimetype': 'application/pdf',
+        })
+
+    def _post_print_batch(self, report_name, printer_name, priority='normal', client_id=None,
+                          job_ids=None):
+        """
+        Render orders and send them to Print Server in one request
+        
+        Orders are rendered in chunks of BATCH_RENDER_SIZE with a single
+        _render_qweb_pdf call per chunk (one wkhtmltopdf run instead of one
+        per order), and all chunks are posted to /api/print/batch together.
+        Reports mapped to ESC/POS or ESC/P skip PDF rendering
+        (_post_print_documents).
+        
+        Args:
+            report_name: Odoo report name (e.g., 'sale_custom.report_nw_sale_order')
+            printer_name: Print Server printer name
+            priority: Print Server queue priority ('high', 'normal', 'low')
+            client_id: Terminal/user the server schedules fairly against others
+            job_ids: Outbox job ID per order ID; documents then carry an
+                idempotency key, so a resend after a lost response or a
+                server restart is not printed twice
             
-            # 4. Encode PDF to base64
-            pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
+        Returns:
+            List of (orders, result) pairs, one per document sent
             
-            # 5. Send to Print Server
-            payload = {
+        Raises:
+            UserError: If the report is missing or the server rejects the request
+            requests.exceptions.RequestException: On connection problems
+                (PrintServerUnavailable while the circuit breaker is open)
+        """
+        report_action = self.env['ir.actions.report']._get_report_from_name(report_name)
+        if not report_action:
+            raise UserError(f"Report {report_name} not found")
+        
+        mapping = self.env['print.report.mapping'].search([
+            ('report_id', '=', report_action.id)
+        ], limit=1)
+        if mapping.output_format in ('escpos', 'escp'):
+            return self._post_print_documents(
+                report_action, printer_name, mapping.output_format, priority, client_id, job_ids
+            )
+        
+        client = print_server_client.get_client(self.env)
+        
+        # 1. Render (or reuse cached) PDFs
+        chunks = []
+        documents = []
+        files = []
+        for chunk, pdf_content in self._render_print_documents(report_action):
+            chunks.append(chunk)
+            documents.append({
                 'printer': printer_name,
-                'pdf_data': pdf_base64,
-                'job_name': f"{self.name}_{report_action.name}"
-            }
-            
-            response = requests.post(
-                f"{print_server_url}/api/print",
-                json=payload,
-                timeout=10
+                'report_type': report_name,
+                'order_id': ",".join(chunk.mapped("name")),
+                'priority': priority,
+                'client_id': client_id,
+                'idempotency_key': chunk._print_idempotency_key(report_name, job_ids),
+            })
+            files.append(
+                ('file', (f"batch_{len(files) + 1}.pdf", pdf_content, 'application/pdf'))
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success'):
-                    return {
-                        'type': 'ir.actions.client',
-                        'tag': 'display_notification',
-                        'params': {
-                            'title': 'Print Job Sent',
-                            'message': f"Sent to {printer_name} (Job ID: {result.get('job_id')})",
-                            'type': 'success',
-                            'sticky': False,
-                        }
-                    }
-                else:
-                    raise UserError(f"Print Server Error: {result.get('error')}")
-            else:
-                raise UserError(f"Connection Error: {response.status_code} - {response.text}")
-                
-        except requests.exceptions.ConnectionError:
+        
+        # 2. Send all documents in one multipart request
+        response = client.post(
+            "/api/print/batch",
+            data={'documents': json.dumps(documents)},
+            files=files,
+            timeout=(client.timeout[0], max(client.timeout[1], 30)),
+            # Keyed documents are safe to resend after a lost response
+            idempotent=bool(job_ids),
+        )
+        
+        return list(zip(chunks, self._get_batch_results(response)))
+
+    def _post_print_documents(self, report_action, printer_name, output_format,
+                              priority='normal', client_id=None, job_ids=None):
+        """
+        Send orders as report data for Print Server to render
+        
+        Used for ESC/POS and ESC/P mappings: no PDF is rendered here, the
+        server turns each order's report data into text-mode printer
+        commands (a few KB instead of a rasterized PDF) and sends them RAW.
+        
+        Returns:
+            List of (order, result) pairs, one per order
+        """
+        report_model_name = f"report.{report_action.report_name}"
+        if report_model_name not in self.env or not hasattr(
+            self.env[report_model_name], "_get_print_documents"
+        ):
             raise UserError(
-                "ไม่สามารถเชื่อมต่อ Print Server ได้\n\n"
-                "กรุณาตรวจสอบว่า Print Server ทำงานอยู่ที่: {}\n\n"
-                "หากต้องการดาวน์โหลด PDF ให้ใช้เมนู Print ปกติ".format(print_server_url)
+                f"Report '{report_action.name}' does not support {output_format} output"
             )
-        except requests.exceptions.Timeout:
-            raise UserError("Print Server ไม่ตอบสนอง (Timeout)")
-        except requests.exceptions.RequestException as e:
-            _logger.error("Print Server request error: %s", str(e))
-            raise UserError("เกิดข้อผิดพลาดในการส่งงานพิมพ์: {}".format(str(e)))
-        except Exception as e:
-            _logger.exception("Unexpected error in print server communication")
-            raise UserError("เกิดข้อผิดพลาด: {}".format(str(e)))
+        
+        documents = self.env[report_model_name]._get_print_documents(self.ids)
+        client = print_server_client.get_client(self.env)
+        response = client.post("/api/print/batch", idempotent=bool(job_ids), json={
+            'documents': [{
+                'printer': printer_name,
+                'report_type': report_action.report_name,
+                'order_id': order.name,
+                'format': output_format,
+                'document': documents[order.id],
+                'priority': priority,
+                'client_id': client_id,
+                'idempotency_key': order._print_idempotency_key(report_action.report_name, job_ids),
+            } for order in self]
+        })
+        
+        return list(zip(self, self._get_batch_results(response)))
+
+    def _print_idempotency_key(self, report_name, job_ids):
+        """
+        Idempotency key of the document printing these orders
+        
+        Order names + report + revision, where the revision is the outbox
+        jobs behind the document: resending the same jobs (after a timeout
+        or a server restart) reuses the key and the Print Server returns
+        the original job, while a new print request gets new jobs and
+        prints again. Keys of multi-order chunks are hashed to stay short.
+        
+        Returns:
+            Key string, or None when the orders have no outbox jobs
+        """
+        ids = sorted(job_ids[order.id] for order in self if order.id in (job_ids or {}))
+        if not ids:
+            return None
+        key = f"{self.env.cr.dbname}:{report_name}:{','.join(self.mapped('name'))}:{','.join(map(str, ids))}"
+        if len(key) > 200:
+            digest = hashlib.sha1(key.encode()).hexdigest()
+            key = f"{self.env.cr.dbname}:{report_name}:{digest}"
+        return key
+
+    def _get_batch_results(self, response):
+        """Per-document results of a /api/print/batch response"""
+        # 429 (queues full) still carries the per-document results
+        if response.status_code not in (200, 202, 400, 429):
+            raise UserError(f"Connection Error: {response.status_code} - {response.text}")
+        
+        result = response.json()
+        results = result.get('results')
+        if not results:
+            raise UserError(f"Print Server Error: {result.get('error')}")
+        return results
 
 
 class NwSaleOrderLine(models.Model):
     _name = "nw.sale.order.line"
     _description = "NW Sale Order Line"
 
-    order_id = fields.Many2one("nw.sale.order", string="Sale Order", ondelete="cascade")
+    order_id = fields.Many2one("nw.sale.order", string="Sale Order", ondelete="cascade", index=True)
     product_id = fields.Many2one("nw.product", string="Product", ondelete="set null")
     barcode = fields.Char(string="Barcode", related="product_id.barcode", readonly=True)
     quantity = fields.Float(string="Quantity", default=1)
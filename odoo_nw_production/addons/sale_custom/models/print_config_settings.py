@@ -8,4 +8,12 @@ class PrintConfigSettings(models.TransientModel):
     printer_a_name = fields.Char(config_parameter='sale_custom.printer_a_name')
     printer_b_name = fields.Char(config_parameter='sale_custom.printer_b_name')
     print_server_enabled = fields.Boolean(config_parameter='sale_custom.print_server_enabled')
+    print_server_timeout = fields.Integer(config_parameter='sale_custom.print_server_timeout', default=10)
+    print_server_connect_timeout = fields.Integer(config_parameter='sale_custom.print_server_connect_timeout', default=3)
+    print_server_retries = fields.Integer(config_parameter='sale_custom.print_server_retries', default=2)
+    print_server_pool_size = fields.Integer(config_parameter='sale_custom.print_server_pool_size', default=4)
+    print_server_failure_threshold = fields.Integer(config_parameter='sale_custom.print_server_failure_threshold', default=5)
+    print_server_reset_timeout = fields.Integer(config_parameter='sale_custom.print_server_reset_timeout', default=30)
+    print_max_retries = fields.Integer(config_parameter='sale_custom.print_max_retries', default=3)
+    print_retry_delay = fields.Integer(config_parameter='sale_custom.print_retry_delay', default=10)
     x_print_server_status_display = fields.Text() # Dummy field for safety
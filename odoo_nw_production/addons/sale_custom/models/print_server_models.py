@@ -4,6 +4,8 @@ from odoo.exceptions import UserError
 import requests
 import logging
 
+from ..tools import print_server_client
+
 _logger = logging.getLogger(__name__)
 
 class PrintServerPrinter(models.Model):
@@ -29,11 +31,12 @@ class PrintServerPrinter(models.Model):
         """Fetch printers from Print Server and update the list"""
         # Get Print Server URL from System Parameters
         config_param = self.env['ir.config_parameter'].sudo()
-        base_url = config_param.get_param('sale_custom.print_server_url', 'http://print_server:5000')
+        client = print_server_client.get_client(self.env)
+        base_url = client.base_url
         
         def try_sync(url):
             _logger.info("Syncing printers from %s", url)
-            response = requests.get(f"{url}/api/printers", timeout=5)
+            response = client.get("/api/printers", base_url=url)
             response.raise_for_status()
             return response.json()
 
@@ -99,6 +102,15 @@ class PrintReportMapping(models.Model):
     report_id = fields.Many2one('ir.actions.report', string='Report', required=True, domain="[('model', '=', 'nw.sale.order')]")
     printer_id = fields.Many2one('print.server.printer', string='Printer', required=True, domain="[('is_active', '=', True)]")
     description = fields.Char(string='Description')
+    output_format = fields.Selection([
+        ('pdf', 'PDF'),
+        ('escpos', 'ESC/POS (Thermal)'),
+        ('escp', 'ESC/P (Dot Matrix)')
+    ], string='Output Format', default='pdf', required=True,
+        help="ESC/POS and ESC/P send the report data and let the Print Server render it "
+             "as text-mode printer commands, skipping PDF rendering entirely. "
+             "Only reports that provide print documents (the cash bill for ESC/POS, "
+             "the invoice/delivery for ESC/P) support them.")
     
     _sql_constraints = [
         ('report_uniq', 'unique (report_id)', 'This report is already mapped to a printer!')
@@ -109,8 +121,8 @@ class PrintReportMapping(models.Model):
         self.ensure_one()
         
         try:
-            # Get Print Server URL
-            base_url = self.env['ir.config_parameter'].sudo().get_param('sale_custom.print_server_url', 'http://print_server:5000')
+            # Get the pooled Print Server client
+            client = print_server_client.get_client(self.env)
             
             # Create a simple PDF with text "Test Print: [Printer Name]"
             # For simplicity, we'll send a dummy base64 string or a simple text file if the server supports it
@@ -129,13 +141,9 @@ class PrintReportMapping(models.Model):
                 'job_name': 'Test_Print_Page'
             }
             
-            response = requests.post(
-                f"{base_url}/api/print",
-                json=payload,
-                timeout=10
-            )
+            response = client.post("/api/print", json=payload)
             
-            if response.status_code == 200:
+            if response.status_code in (200, 202):
                 result = response.json()
                 if result.get('success'):
                     return {
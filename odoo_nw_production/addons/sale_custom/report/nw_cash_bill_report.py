@@ -1,4 +1,5 @@
 from odoo import models, api, fields
+from odoo.tools.misc import format_date, formatLang
 
 
 class ReportNwCashBill(models.AbstractModel):
@@ -65,3 +66,33 @@ class ReportNwCashBill(models.AbstractModel):
             "order_pages": order_pages,  # ส่งข้อมูลที่จัดหน้าแล้วไปที่ XML
             "print_time": print_time,
         }
+
+    @api.model
+    def _get_print_documents(self, docids):
+        """
+        Cash bill data for the Print Server's ESC/POS renderer
+
+        Same pages as the PDF (from _get_report_values) as plain JSON, so the
+        thermal printer receives text commands instead of a rasterized PDF.
+
+        Returns:
+            Dict {order id: document}
+        """
+        values = self._get_report_values(docids)
+        currency = self.env.company.currency_id
+
+        documents = {}
+        for doc in values["docs"]:
+            documents[doc.id] = {
+                "title": "บิลเงินสด / CASH BILL",
+                "header": [
+                    ["นามลูกค้า", doc.customer_id.name or ""],
+                    ["ที่อยู่", doc.customer_id.address or ""],
+                    ["วันที่", format_date(self.env, doc.order_date)],
+                    ["เลขที่", doc.name],
+                ],
+                "pages": values["order_pages"][doc.id],
+                "total": formatLang(self.env, doc.total, currency_obj=currency),
+                "footer": "ขอบคุณที่ใช้บริการ",
+            }
+        return documents
@@ -1,4 +1,5 @@
 from odoo import models, api, fields
+from odoo.tools.misc import format_date, formatLang
 
 
 class ReportNwSaleOrder(models.AbstractModel):
@@ -68,3 +69,34 @@ class ReportNwSaleOrder(models.AbstractModel):
             "order_pages": order_pages,
             "print_time": print_time,
         }
+
+    @api.model
+    def _get_print_documents(self, docids):
+        """
+        Invoice/delivery data for the Print Server's ESC/P renderer
+
+        Same 15-line pages as the PDF (from _get_report_values) as plain
+        JSON, so the dot matrix printer prints in text mode instead of
+        graphics mode.
+
+        Returns:
+            Dict {order id: document}
+        """
+        values = self._get_report_values(docids)
+
+        documents = {}
+        for doc in values["docs"]:
+            documents[doc.id] = {
+                "title": "บิลเงินสด / ใบส่งของ",
+                "header": [
+                    ["วันที่", format_date(self.env, doc.order_date)],
+                    ["เลขที่", doc.name],
+                    ["ลูกค้า", doc.customer_id.name or ""],
+                    ["ที่อยู่", doc.customer_id.address or ""],
+                    ["ติดต่อ", doc.customer_id.phone or ""],
+                ],
+                "print_time": values["print_time"],
+                "pages": values["order_pages"][doc.id],
+                "total": formatLang(self.env, doc.total),
+            }
+        return documents
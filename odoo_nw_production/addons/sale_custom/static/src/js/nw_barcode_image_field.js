@@ -0,0 +1,56 @@
+odoo.define('sale_custom.NwBarcodeImageField', function (require) {
+"use strict";
+
+const basicFields = require('web.basic_fields');
+const fieldRegistry = require('web.field_registry');
+
+/**
+ * Product barcode image loaded from /sale_custom/product/<id>/barcode.png.
+ *
+ * The URL carries the attachment checksum (barcode_image_checksum must be
+ * in the view), so the browser keeps the image until the barcode changes.
+ * An image still waiting for the cron is loaded from the same route, which
+ * renders it on request.
+ */
+const NwBarcodeImageField = basicFields.FieldBinaryImage.extend({
+    /**
+     * @override
+     */
+    init() {
+        this._super(...arguments);
+        this.emptyPlaceholder = this.placeholder;
+    },
+
+    //--------------------------------------------------------------------------
+    // Private
+    //--------------------------------------------------------------------------
+
+    /**
+     * The parent shows the placeholder when the field has no value, so a
+     * saved product whose image is pending gets the route instead.
+     *
+     * @override
+     * @private
+     */
+    _render() {
+        const pending = !this.value && this.res_id && this.recordData.barcode;
+        this.placeholder = pending ? this._getImageUrl(this.model, this.res_id, this.name) : this.emptyPlaceholder;
+        return this._super(...arguments);
+    },
+
+    /**
+     * @override
+     * @private
+     */
+    _getImageUrl(model, resId, field, unique) {
+        const checksum = this.recordData.barcode_image_checksum;
+        const query = checksum ? `?unique=${encodeURIComponent(checksum)}` : '';
+        return `/sale_custom/product/${resId}/barcode.png${query}`;
+    },
+});
+
+fieldRegistry.add('nw_barcode_image', NwBarcodeImageField);
+
+return NwBarcodeImageField;
+
+});
@@ -0,0 +1,119 @@
+odoo.define('sale_custom.NwSaleOrderFormView', function (require) {
+"use strict";
+
+const core = require('web.core');
+const FormController = require('web.FormController');
+const FormView = require('web.FormView');
+const viewRegistry = require('web.view_registry');
+
+// Scans arriving within this many milliseconds of each other are sent together
+const SCAN_BATCH_DELAY = 300;
+
+/**
+ * Sale order form that buffers barcode scans.
+ *
+ * Instead of one onchange per scan (which sends and re-evaluates every
+ * order line), scans are collected until the scanner pauses and added
+ * with a single add_barcodes() call; the form is reloaded once per batch.
+ */
+const NwSaleOrderFormController = FormController.extend({
+    init() {
+        this._super(...arguments);
+        this._scanBuffer = [];
+        this._scanTimer = null;
+        // Batches are sent one after another, never in parallel
+        this._scanQueue = Promise.resolve();
+    },
+    on_attach_callback() {
+        this._super(...arguments);
+        core.bus.on('barcode_scanned', this, this._onBarcodeScanned);
+    },
+    on_detach_callback() {
+        this._super(...arguments);
+        core.bus.off('barcode_scanned', this, this._onBarcodeScanned);
+    },
+    destroy() {
+        clearTimeout(this._scanTimer);
+        core.bus.off('barcode_scanned', this, this._onBarcodeScanned);
+        this._super(...arguments);
+    },
+
+    //--------------------------------------------------------------------------
+    // Private
+    //--------------------------------------------------------------------------
+
+    /**
+     * Send the buffered scans. The order is saved first so a new order
+     * gets an id and pending edits are not lost by the reload.
+     *
+     * @private
+     * @returns {Promise}
+     */
+    _flushScans() {
+        this._scanTimer = null;
+        this._scanQueue = this._scanQueue.then(async () => {
+            const barcodes = this._scanBuffer;
+            this._scanBuffer = [];
+            if (!barcodes.length) {
+                return;
+            }
+            try {
+                await this.saveRecord(this.handle, {stayInEdit: true, reload: false});
+            } catch (error) {
+                // Required fields missing: keep the scans for the next try
+                this._scanBuffer = barcodes.concat(this._scanBuffer);
+                return;
+            }
+            const record = this.model.get(this.handle);
+            const unknown = await this._rpc({
+                model: 'nw.sale.order',
+                method: 'add_barcodes',
+                args: [[record.res_id], barcodes],
+            });
+            await this.reload();
+            if (unknown.length) {
+                this.displayNotification({
+                    title: "ไม่พบสินค้า",
+                    message: `ไม่พบสินค้าที่มีบาร์โค้ด: ${unknown.join(', ')}`,
+                    type: 'warning',
+                });
+            }
+        }).catch(() => {
+            // RPC errors are shown by the web client; later batches still go out
+        });
+        return this._scanQueue;
+    },
+
+    //--------------------------------------------------------------------------
+    // Handlers
+    //--------------------------------------------------------------------------
+
+    /**
+     * @private
+     * @param {string} barcode
+     */
+    _onBarcodeScanned(barcode) {
+        const record = this.model.get(this.handle);
+        if (record.data.order_status !== 'draft') {
+            return;
+        }
+        this._scanBuffer.push(barcode);
+        clearTimeout(this._scanTimer);
+        this._scanTimer = setTimeout(() => this._flushScans(), SCAN_BATCH_DELAY);
+    },
+});
+
+const NwSaleOrderFormView = FormView.extend({
+    config: _.extend({}, FormView.prototype.config, {
+        Controller: NwSaleOrderFormController,
+    }),
+});
+
+viewRegistry.add('nw_sale_order_form', NwSaleOrderFormView);
+
+return {
+    NwSaleOrderFormController: NwSaleOrderFormController,
+    NwSaleOrderFormView: NwSaleOrderFormView,
+};
+
+});
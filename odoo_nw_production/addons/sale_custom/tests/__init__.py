@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+
+from . import test_nw_customer
+from . import test_nw_product
+from . import test_nw_sale_order
+from . import test_print_server_client
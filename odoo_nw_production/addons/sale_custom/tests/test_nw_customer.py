@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.sale_custom.models.nw_customer import CARRY_FORWARD_NAME
+
+
+@tagged('post_install', '-at_install')
+class TestNwCustomerCarryForward(TransactionCase):
+    """Balances carried forward into one line per customer"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Customer = cls.env['nw.customer']
+        cls.Line = cls.env['nw.account.line']
+        cls.debtor, cls.overpaid = cls.Customer.create([{'name': 'ลูกหนี้'}, {'name': 'จ่ายเกิน'}])
+        cls.Line.create([
+            {'customer_id': cls.debtor.id, 'name': 'SO001', 'amount': 100.0, 'transaction_type': 'debit'},
+            {'customer_id': cls.debtor.id, 'name': 'ชำระ', 'amount': 30.0, 'transaction_type': 'credit'},
+            {'customer_id': cls.overpaid.id, 'name': 'SO002', 'amount': 50.0, 'transaction_type': 'debit'},
+            {'customer_id': cls.overpaid.id, 'name': 'ชำระ', 'amount': 80.0, 'transaction_type': 'credit'},
+        ])
+
+    def _domain(self):
+        return [('customer_id', 'in', (self.debtor | self.overpaid).ids)]
+
+    def test_open_lines_become_one_carry_forward_line(self):
+        self.Customer._carry_forward_balances(self._domain())
+
+        line = self.debtor.account_line_ids
+        self.assertEqual(len(line), 1)
+        self.assertTrue(line.is_carry_forward)
+        self.assertEqual((line.name, line.amount, line.transaction_type), (CARRY_FORWARD_NAME, 70.0, 'debit'))
+        self.assertEqual(self.debtor.total_balance, -70.0)
+        # Old lines are kept as history
+        self.assertEqual(len(self.debtor.account_line_history_ids), 2)
+
+    def test_overpaid_balance_is_not_carried_forward(self):
+        self.Customer._carry_forward_balances(self._domain())
+
+        self.assertFalse(self.overpaid.account_line_ids)
+        self.assertEqual(self.overpaid.total_balance, 0.0)
+
+    def test_customer_without_new_lines_is_skipped(self):
+        self.Customer._carry_forward_balances(self._domain())
+        carried = self.debtor.account_line_ids
+
+        self.Customer._carry_forward_balances(self._domain())
+
+        self.assertEqual(self.debtor.account_line_ids, carried)
+        self.assertEqual(len(self.debtor.account_line_history_ids), 2)
+
+    def test_new_lines_join_the_carried_balance(self):
+        self.Customer._carry_forward_balances(self._domain())
+        self.Line.create({'customer_id': self.debtor.id, 'name': 'SO003', 'amount': 20.0,
+                          'transaction_type': 'debit'})
+
+        self.Customer._carry_forward_balances(self._domain())
+
+        self.assertEqual(self.debtor.account_line_ids.amount, 90.0)
+        self.assertEqual(self.debtor.total_balance, -90.0)
+        self.assertEqual(len(self.debtor.account_line_history_ids), 4)
+
+    def test_clear_lines_only_touches_the_customer(self):
+        self.debtor.action_clear_lines()
+
+        self.assertEqual(len(self.debtor.account_line_ids), 1)
+        self.assertEqual(len(self.overpaid.account_line_ids), 2)
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests.common import HttpCase, TransactionCase, tagged
+
+from odoo.addons.sale_custom.models.nw_product import (
+    BARCODE_IMAGE_SYNC_LIMIT, BARCODE_LOOKUP_CHANGED, BARCODE_LOOKUP_SEQUENCE,
+)
+
+
+def _barcode_attachment(product):
+    return product.env['ir.attachment'].sudo().search([
+        ('res_model', '=', 'nw.product'),
+        ('res_field', '=', 'barcode_image'),
+        ('res_id', '=', product.id),
+    ])
+
+
+@tagged('post_install', '-at_install')
+class TestNwProductBarcodeLookup(TransactionCase):
+    """The cached barcode lookup follows every product change"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Product = cls.env['nw.product']
+        cls.product = cls.Product.create({
+            'name': 'น้ำดื่ม',
+            'barcode': '8850000000011',
+            'sale_price': 10.0,
+            'add_price': 2.0,
+        })
+
+    def setUp(self):
+        super().setUp()
+        # Start as right after a commit: lookups cached by an earlier test
+        # outlive its rollback, and creating the product marked the changes
+        self._bump_version()
+        self.addCleanup(self._bump_version)
+        self.env.cr.postcommit.data.pop(BARCODE_LOOKUP_CHANGED, None)
+
+    def _bump_version(self):
+        self.env.cr.execute("SELECT nextval(%s)", (BARCODE_LOOKUP_SEQUENCE,))
+
+    def _set_price_in_database(self, price):
+        # Bypasses the ORM, like a change committed by another worker
+        self.env.cr.execute("UPDATE nw_product SET sale_price = %s WHERE id = %s", (price, self.product.id))
+
+    def test_lookup(self):
+        self.assertEqual(self.Product._lookup_barcode('8850000000011'), (self.product.id, 10.0, 2.0))
+        self.assertIsNone(self.Product._lookup_barcode('0000'))
+
+    def test_lookup_is_cached_per_version(self):
+        self.Product._lookup_barcode('8850000000011')
+        self._set_price_in_database(11.0)
+        self.assertEqual(self.Product._lookup_barcode('8850000000011')[1], 10.0)
+        self._bump_version()
+        self.assertEqual(self.Product._lookup_barcode('8850000000011')[1], 11.0)
+
+    def test_change_is_looked_up_uncached_until_commit(self):
+        version = self.Product._barcode_lookup_version()
+        self.product.write({'add_price': 3.0})
+        self.assertEqual(self.Product._barcode_lookup_version(), version)
+        self.assertEqual(self.Product._lookup_barcode('8850000000011'), (self.product.id, 10.0, 3.0))
+        # Not cached: every lookup reads the database
+        self._set_price_in_database(11.0)
+        self.assertEqual(self.Product._lookup_barcode('8850000000011')[1], 11.0)
+
+    def test_create_clears_unknown_barcode(self):
+        self.assertIsNone(self.Product._lookup_barcode('8850000000028'))
+        products = self.Product.create([
+            {'name': 'ข้าวสาร', 'barcode': '8850000000028', 'sale_price': 25.0},
+            {'name': 'น้ำตาล', 'barcode': '8850000000035', 'sale_price': 30.0},
+        ])
+        self.assertEqual(self.Product._lookup_barcode('8850000000028'), (products[0].id, 25.0, 0.0))
+
+    def test_price_change_clears_cache(self):
+        self.Product._lookup_barcode('8850000000011')
+        self.product.write({'sale_price': 12.0})
+        self.assertEqual(self.Product._lookup_barcode('8850000000011'), (self.product.id, 12.0, 2.0))
+
+    def test_barcode_change_clears_cache(self):
+        self.Product._lookup_barcode('8850000000011')
+        self.product.barcode = '8850000000042'
+        self.assertIsNone(self.Product._lookup_barcode('8850000000011'))
+        self.assertEqual(self.Product._lookup_barcode('8850000000042')[0], self.product.id)
+
+    def test_unlink_clears_cache(self):
+        self.Product._lookup_barcode('8850000000011')
+        self.product.unlink()
+        self.assertIsNone(self.Product._lookup_barcode('8850000000011'))
+
+    def test_duplicate_barcode_is_refused(self):
+        with self.assertRaises(UserError):
+            self.Product.create({'name': 'ซ้ำ', 'barcode': '8850000000011'})
+        other = self.Product.create({'name': 'อื่น', 'barcode': '8850000000059'})
+        with self.assertRaises(UserError):
+            other.barcode = '8850000000011'
+
+    def test_import_clears_cache_once_done(self):
+        self.assertIsNone(self.Product._lookup_barcode('8850000000066'))
+        result = self.Product.with_context(import_file=True).load(
+            ['name', 'barcode', 'sale_price'],
+            [['นมสด', '8850000000066', '15'], ['ไข่ไก่', '8850000000073', '5']],
+        )
+        self.assertFalse(result['messages'])
+        found = self.Product._lookup_barcode('8850000000066')
+        self.assertEqual(found, (result['ids'][0], 15.0, 0.0))
+
+
+@tagged('post_install', '-at_install')
+class TestNwProductBarcodeImage(TransactionCase):
+    """Barcode images are stored as attachments, rendered once per barcode"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Product = cls.env['nw.product']
+        # Leave the cron only the products of these tests
+        cls.Product.search([('barcode_image_pending', '=', True)]).write({'barcode_image_pending': False})
+        cls.product = cls.Product.create({'name': 'น้ำดื่ม', 'barcode': '8850000000011'})
+
+    def _bulk_create(self, count):
+        return self.Product.create([
+            {'name': 'สินค้า %d' % i, 'barcode': '88500001%05d' % i} for i in range(count)
+        ])
+
+    def test_form_edit_stores_image(self):
+        attachment = _barcode_attachment(self.product)
+        self.assertEqual(len(attachment), 1)
+        self.assertEqual(attachment.mimetype, 'image/png')
+        self.assertFalse(self.product.barcode_image_pending)
+        self.assertEqual(self.product.barcode_image_checksum, attachment.checksum)
+
+    def test_barcode_change_renders_new_image(self):
+        checksum = self.product.barcode_image_checksum
+        self.product.barcode = '8850000000028'
+        self.assertFalse(self.product.barcode_image_pending)
+        self.assertTrue(self.product.barcode_image_checksum)
+        self.assertNotEqual(self.product.barcode_image_checksum, checksum)
+
+    def test_removed_barcode_removes_image(self):
+        self.product.barcode = False
+        self.assertFalse(_barcode_attachment(self.product))
+        self.assertFalse(self.product.barcode_image_pending)
+
+    def test_bulk_change_is_left_to_cron(self):
+        with patch.object(type(self.Product), '_trigger_barcode_images') as trigger:
+            products = self._bulk_create(BARCODE_IMAGE_SYNC_LIMIT + 1)
+        trigger.assert_called_once()
+        self.assertTrue(all(products.mapped('barcode_image_pending')))
+        self.assertFalse(any(products.mapped('barcode_image_checksum')))
+
+    def test_import_is_left_to_cron(self):
+        with patch.object(type(self.Product), '_trigger_barcode_images') as trigger:
+            product = self.Product.with_context(import_file=True).create({'name': 'ข้าวสาร', 'barcode': '8850000000028'})
+        trigger.assert_called_once()
+        self.assertTrue(product.barcode_image_pending)
+
+    def test_cron_renders_in_batches_until_none_is_pending(self):
+        with patch.object(type(self.Product), '_trigger_barcode_images'):
+            products = self._bulk_create(BARCODE_IMAGE_SYNC_LIMIT + 1)
+
+        with patch.object(type(self.Product), '_trigger_barcode_images') as trigger:
+            self.Product._cron_generate_barcode_images(limit=BARCODE_IMAGE_SYNC_LIMIT)
+        # A full batch: the cron wakes itself again
+        trigger.assert_called_once()
+        self.assertEqual(products.mapped('barcode_image_pending').count(True), 1)
+
+        with patch.object(type(self.Product), '_trigger_barcode_images') as trigger:
+            self.Product._cron_generate_barcode_images(limit=BARCODE_IMAGE_SYNC_LIMIT)
+        trigger.assert_not_called()
+        self.assertFalse(any(products.mapped('barcode_image_pending')))
+        self.assertTrue(all(products.mapped('barcode_image_checksum')))
+
+    def test_barcode_that_cannot_be_rendered_is_not_retried(self):
+        with patch('odoo.addons.sale_custom.models.nw_product._render_barcode_png', side_effect=ValueError):
+            self.product.barcode = '8850000000028'
+        self.assertFalse(self.product.barcode_image_pending)
+        self.assertFalse(_barcode_attachment(self.product))
+
+
+@tagged('post_install', '-at_install')
+class TestNwProductBarcodeImageRoute(HttpCase):
+    """The barcode image route answers with HTTP caching headers"""
+
+    def setUp(self):
+        super().setUp()
+        self.Product = self.env['nw.product']
+        self.product = self.Product.create({'name': 'น้ำดื่ม', 'barcode': '8850000000011'})
+        self.url = '/sale_custom/product/%d/barcode.png' % self.product.id
+        self.authenticate('admin', 'admin')
+
+    def test_image_is_revalidated_with_etag(self):
+        checksum = self.product.barcode_image_checksum
+        response = self.url_open(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'image/png')
+        self.assertEqual(response.content, _barcode_attachment(self.product).raw)
+        self.assertEqual(response.headers['ETag'], '"%s"' % checksum)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+
+        response = self.url_open(self.url, headers={'If-None-Match': '"%s"' % checksum})
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.content)
+
+    def test_old_etag_gets_new_image(self):
+        response = self.url_open(self.url, headers={'If-None-Match': '"outdated"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content)
+
+    def test_url_with_checksum_is_cached_for_long(self):
+        response = self.url_open('%s?unique=%s' % (self.url, self.product.barcode_image_checksum))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+
+    def test_pending_image_is_rendered_on_request(self):
+        with patch.object(type(self.Product), '_trigger_barcode_images'):
+            product = self.Product.with_context(import_file=True).create({'name': 'ข้าวสาร', 'barcode': '8850000000028'})
+        self.assertTrue(product.barcode_image_pending)
+
+        response = self.url_open('/sale_custom/product/%d/barcode.png' % product.id)
+        self.assertEqual(response.status_code, 200)
+        product.invalidate_cache()
+        self.assertFalse(product.barcode_image_pending)
+        self.assertTrue(product.barcode_image_checksum)
+
+    def test_product_without_barcode_is_not_found(self):
+        self.product.barcode = False
+        response = self.url_open(self.url)
+        self.assertEqual(response.status_code, 404)
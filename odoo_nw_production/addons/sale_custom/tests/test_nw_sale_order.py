@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests.common import TransactionCase, tagged
+
+from odoo.addons.sale_custom.models.nw_product import BARCODE_LOOKUP_SEQUENCE
+from odoo.addons.sale_custom.models.nw_sale_order import CLEAR_ORDERS_RESUME_PARAM
+
+
+@tagged('post_install', '-at_install')
+class TestNwSaleOrderAddBarcodes(TransactionCase):
+    """Batched barcode scans sent by the order form"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.water, cls.rice = cls.env['nw.product'].create([
+            {'name': 'น้ำดื่ม', 'barcode': '8850000000011', 'sale_price': 10.0, 'add_price': 2.0},
+            {'name': 'ข้าวสาร', 'barcode': '8850000000028', 'sale_price': 25.0},
+        ])
+        cls.order = cls.env['nw.sale.order'].create({})
+
+    def setUp(self):
+        super().setUp()
+        # Lookups cached by an earlier test outlive its rollback
+        self.env.cr.execute("SELECT nextval(%s)", (BARCODE_LOOKUP_SEQUENCE,))
+
+    def _quantities(self):
+        return {line.product_id: line.quantity for line in self.order.order_line_ids}
+
+    def test_scans_are_grouped_per_product(self):
+        unknown = self.order.add_barcodes(['8850000000011', '8850000000028', '8850000000011', '0000'])
+
+        self.assertEqual(unknown, ['0000'])
+        self.assertEqual(len(self.order.order_line_ids), 2)
+        self.assertEqual(self._quantities(), {self.water: 2, self.rice: 1})
+        self.assertEqual(self.order.total, 45.0)
+
+    def test_product_on_the_order_gets_more_quantity(self):
+        self.order.add_barcodes(['8850000000011'])
+        self.order.add_barcodes(['8850000000011', '8850000000011'])
+
+        self.assertEqual(len(self.order.order_line_ids), 1)
+        self.assertEqual(self._quantities(), {self.water: 3})
+
+    def test_add_price(self):
+        self.order.is_add_sale_price = True
+        self.order.add_barcodes(['8850000000011'])
+
+        self.assertEqual(self.order.order_line_ids.price, 12.0)
+
+    def test_only_draft_orders(self):
+        self.order.action_confirm()
+        with self.assertRaises(UserError):
+            self.order.add_barcodes(['8850000000011'])
+
+
+@tagged('post_install', '-at_install')
+class TestNwSaleOrderCleanup(TransactionCase):
+    """Order cleanup from the wizard and the weekly cron"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Order = cls.env['nw.sale.order']
+        cls.params = cls.env['ir.config_parameter'].sudo()
+        today = fields.Date.today()
+
+        def order(days_ago, status='confirm'):
+            return cls.Order.create({
+                'order_date': today - timedelta(days=days_ago),
+                'order_status': status,
+            })
+
+        cls.old = order(30)
+        cls.old_draft = order(30, 'draft')
+        cls.last_week = order(10)
+        cls.today = order(0)
+
+    def _remaining(self):
+        return (self.old | self.old_draft | self.last_week | self.today).exists()
+
+    def test_wizard_days(self):
+        self.Order._clear_orders(days=20)
+        self.assertEqual(self._remaining(), self.old_draft | self.last_week | self.today)
+
+    def test_clear_all_keeps_drafts(self):
+        self.Order._clear_orders(days=0)
+        self.assertEqual(self._remaining(), self.old_draft)
+
+    def test_wizard_ignores_unfinished_cron_run(self):
+        self.params.set_param(CLEAR_ORDERS_RESUME_PARAM, '2000-01-01')
+
+        self.Order._clear_orders(days=0)
+
+        self.assertEqual(self._remaining(), self.old_draft)
+        self.assertFalse(self.params.get_param(CLEAR_ORDERS_RESUME_PARAM))
+
+    def test_cron_finishes_unfinished_run(self):
+        cutoff = fields.Date.today() - timedelta(days=20)
+        self.params.set_param(CLEAR_ORDERS_RESUME_PARAM, fields.Date.to_string(cutoff))
+
+        self.Order._cron_clear_weekly_orders()
+
+        # Only the orders of the unfinished run, not a new run for today
+        self.assertEqual(self._remaining(), self.old_draft | self.last_week | self.today)
+        self.assertFalse(self.params.get_param(CLEAR_ORDERS_RESUME_PARAM))
+
+    def test_out_of_time_continues_in_cron(self):
+        with patch.object(type(self.Order), '_clear_orders_time_budget', return_value=-1):
+            self.Order._clear_orders(days=20)
+        self.assertEqual(len(self._remaining()), 4)
+        cutoff = fields.Date.today() - timedelta(days=19)
+        self.assertEqual(self.params.get_param(CLEAR_ORDERS_RESUME_PARAM), fields.Date.to_string(cutoff))
+
+        self.Order._cron_clear_weekly_orders()
+
+        self.assertEqual(self._remaining(), self.old_draft | self.last_week | self.today)
+        self.assertFalse(self.params.get_param(CLEAR_ORDERS_RESUME_PARAM))
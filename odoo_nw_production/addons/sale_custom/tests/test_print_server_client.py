@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import socket
+from unittest.mock import patch
+
+import requests
+
+from odoo.tests.common import BaseCase, tagged
+from odoo.addons.sale_custom.tools import print_server_client
+from odoo.addons.sale_custom.tools.print_server_client import (
+    PrintServerClient,
+    PrintServerUnavailable,
+)
+
+
+def _response(status_code):
+    response = requests.models.Response()
+    response.status_code = status_code
+    return response
+
+
+@tagged('post_install', '-at_install')
+class TestPrintServerClient(BaseCase):
+    """Retries and circuit breaker of the Print Server client, without a server"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = PrintServerClient(
+            'http://print-server.test:5000', retries=2, failure_threshold=2, reset_timeout=30
+        )
+        self.addCleanup(self.client.close)
+        # No real backoff waits
+        sleep = patch.object(print_server_client.time, 'sleep')
+        sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def _patch_requests(self, *results):
+        """Answer session requests with the given responses / exceptions, in order"""
+        return patch.object(self.client.session, 'request', side_effect=list(results))
+
+    def test_connect_failure_is_retried(self):
+        with self._patch_requests(requests.exceptions.ConnectTimeout(), _response(200)) as request:
+            response = self.client.post('/api/print', json={})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.call_count, 2)
+
+    def test_refused_connection_is_retried(self):
+        # A port nothing listens on: the connection is refused
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        with self.assertRaises(requests.exceptions.ConnectionError) as refused:
+            requests.post(f'http://127.0.0.1:{port}/api/print', json={}, timeout=3)
+
+        with self._patch_requests(refused.exception, _response(202)) as request:
+            response = self.client.post('/api/print', json={})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(request.call_count, 2)
+
+    def test_dropped_connection_is_not_retried(self):
+        dropped = requests.exceptions.ConnectionError(
+            ConnectionResetError('Connection reset by peer')
+        )
+        with self._patch_requests(dropped) as request:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.client.post('/api/print', json={})
+        self.assertEqual(request.call_count, 1)
+
+    def test_post_that_may_have_printed_is_not_retried(self):
+        with self._patch_requests(requests.exceptions.ReadTimeout()) as request:
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                self.client.post('/api/print', json={})
+        self.assertEqual(request.call_count, 1)
+
+    def test_idempotent_request_is_retried(self):
+        with self._patch_requests(
+            requests.exceptions.ReadTimeout(), _response(503), _response(202)
+        ) as request:
+            response = self.client.post('/api/print', json={}, idempotent=True)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(request.call_count, 3)
+
+    def test_breaker_opens_after_repeated_failures(self):
+        failure = requests.exceptions.ConnectionError()
+        with self._patch_requests(*[failure] * 6) as request:
+            for _i in range(2):
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    self.client.get('/api/status/1')
+            calls = request.call_count
+            with self.assertRaises(PrintServerUnavailable):
+                self.client.get('/api/status/1')
+        # The open breaker fails without contacting the server
+        self.assertEqual(request.call_count, calls)
+
+    def test_breaker_probes_and_closes_when_server_is_back(self):
+        breaker = self.client.breaker
+        for _i in range(2):
+            breaker.record_failure()
+        # The reset timeout has passed
+        breaker.opened_at -= breaker.reset_timeout
+
+        with patch.object(self.client, '_probe', return_value=True) as probe, \
+                self._patch_requests(_response(200)):
+            response = self.client.get('/api/health')
+        self.assertEqual(response.status_code, 200)
+        probe.assert_called_once()
+        self.assertIsNone(breaker.opened_at)
+        self.assertEqual(breaker.failures, 0)
+
+    def test_failed_probe_keeps_breaker_open(self):
+        breaker = self.client.breaker
+        for _i in range(2):
+            breaker.record_failure()
+        breaker.opened_at -= breaker.reset_timeout
+
+        with patch.object(self.client, '_probe', return_value=False), \
+                self._patch_requests() as request:
+            with self.assertRaises(PrintServerUnavailable):
+                self.client.get('/api/health')
+            # A new open period starts: no second probe right away
+            with self.assertRaises(PrintServerUnavailable):
+                self.client.get('/api/health')
+        request.assert_not_called()
+
+    def test_fallback_url_bypasses_breaker(self):
+        for _i in range(2):
+            self.client.breaker.record_failure()
+        with self._patch_requests(_response(200)):
+            response = self.client.get('/api/health', base_url='http://backup.test:5000')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Pooled HTTP client for the Print Server.
+
+One keep-alive requests.Session per Odoo worker process, shared by every
+print path, so each print reuses an open connection instead of paying for
+a new TCP (and DNS) setup.
+
+Requests are retried with jittered exponential backoff, and a circuit
+breaker fails them instantly while the server is known to be down,
+instead of letting every caller wait for the timeout.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_URL = 'http://print_server:5000'
+DEFAULT_TIMEOUT = 10
+DEFAULT_CONNECT_TIMEOUT = 3
+DEFAULT_RETRIES = 2
+DEFAULT_POOL_SIZE = 4
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+# First retry waits up to this many seconds, doubling per attempt
+RETRY_BACKOFF = 0.5
+# Gateway errors: the request never reached the Print Server itself
+RETRY_STATUSES = (502, 503, 504)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class PrintServerUnavailable(requests.exceptions.ConnectionError):
+    """Raised without contacting the server while the circuit breaker is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a Print Server that keeps failing.
+
+    After ``failure_threshold`` failed requests in a row (failures further
+    apart than ``reset_timeout`` start a new count) the breaker opens and
+    requests fail at once. Once ``reset_timeout`` seconds have passed, the
+    next request first probes the server (half-open); a successful probe
+    closes the breaker, a failed one keeps it open for another period.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.last_failure = None
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self, probe):
+        """
+        Let a request through, or fail it while the server is down.
+
+        Args:
+            probe: Callable returning True if the server is healthy again
+
+        Raises:
+            PrintServerUnavailable: If the breaker is open
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0 or self._probing:
+                raise PrintServerUnavailable(
+                    f"Print Server unavailable after {self.failures} failed requests, "
+                    f"next check in {max(0, int(remaining)) + 1}s"
+                )
+            self._probing = True
+
+        try:
+            healthy = probe()
+        finally:
+            with self._lock:
+                self._probing = False
+        if not healthy:
+            self.record_failure()
+            raise PrintServerUnavailable("Print Server health check failed")
+        self.record_success()
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                _logger.info("Print Server is back, closing circuit breaker")
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.last_failure is not None and now - self.last_failure > self.reset_timeout:
+                self.failures = 0
+            self.failures += 1
+            self.last_failure = now
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    _logger.warning(
+                        "Print Server failed %s times, failing requests for %ss",
+                        self.failures, self.reset_timeout,
+                    )
+                self.opened_at = now
+
+
+def _not_sent(error):
+    """
+    True if a request failed while connecting, so nothing reached the server:
+    a connect timeout, or a refused / unresolvable connection.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        reason = getattr(error.args[0], 'reason', error.args[0])
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+class PrintServerClient:
+    """Thin wrapper around a pooled requests.Session bound to one Print Server"""
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, pool_size=DEFAULT_POOL_SIZE,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, timeout)
+        self.retries = max(0, retries)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        # Retries are done in request() (with jitter and the breaker)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path, base_url=None):
+        return f"{(base_url or self.base_url).rstrip('/')}{path}"
+
+    def get(self, path, base_url=None, **kwargs):
+        return self.request('GET', path, base_url, idempotent=True, **kwargs)
+
+    def post(self, path, base_url=None, idempotent=False, **kwargs):
+        return self.request('POST', path, base_url, idempotent=idempotent, **kwargs)
+
+    def request(self, method, path, base_url=None, idempotent=False, **kwargs):
+        """
+        Send a request, retrying failures with jittered exponential backoff.
+
+        Requests that may have reached the server are only retried when
+        ``idempotent`` (GET, or a POST whose documents carry idempotency
+        keys), so a lost response never prints a document twice. Requests
+        that failed while connecting (connect timeout, connection refused,
+        unknown host) never reached the server and are always retried.
+
+        Raises:
+            PrintServerUnavailable: If the circuit breaker is open
+            requests.exceptions.RequestException: When the last attempt fails
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        url = self.url(path, base_url)
+        # The breaker guards the configured server, not one-off fallback URLs
+        breaker = self.breaker if url.startswith(self.base_url) else None
+        if breaker:
+            breaker.before_request(self._probe)
+
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                retryable = idempotent or _not_sent(e)
+                if last_attempt or not retryable:
+                    if breaker:
+                        breaker.record_failure()
+                    raise
+                _logger.info("Print Server request %s %s failed (%s), retrying", method, path, e)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    if breaker:
+                        breaker.record_success()
+                    return response
+                if last_attempt or not idempotent:
+                    if breaker:
+                        breaker.record_failure()
+                    return response
+            # Full jitter: callers failing together do not retry together
+            time.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+
+    def _probe(self):
+        """Half-open check: is /api/health answering again?"""
+        try:
+            response = self.session.get(
+                self.url('/api/health'), timeout=(self.timeout[0], self.timeout[0])
+            )
+        except requests.exceptions.RequestException:
+            return False
+        return response.status_code == 200
+
+    def close(self):
+        self.session.close()
+
+
+def _int_param(config_param, key, default):
+    try:
+        return int(config_param.get_param(key, default))
+    except (TypeError, ValueError):
+        _logger.warning("Invalid value for %s, using %s", key, default)
+        return default
+
+
+def get_client(env):
+    """
+    Get the shared Print Server client for this worker.
+
+    Settings come from ir.config_parameter (sale_custom.print_server_*).
+    A client is built once per distinct configuration and reused by every
+    later call, so changing a setting simply switches to a new pool.
+
+    Args:
+        env: Odoo environment
+
+    Returns:
+        PrintServerClient
+    """
+    config_param = env['ir.config_parameter'].sudo()
+    key = (
+        config_param.get_param('sale_custom.print_server_url', DEFAULT_URL),
+        _int_param(config_param, 'sale_custom.print_server_timeout', DEFAULT_TIMEOUT),
+        _int_param(config_param, 'sale_custom.print_server_connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+        _int_param(config_param, 'sale_custom.print_server_retries', DEFAULT_RETRIES),
+        _int_param(config_param, 'sale_custom.print_server_pool_size', DEFAULT_POOL_SIZE),
+        _int_param(config_param, 'sale_custom.print_server_failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+        _int_param(config_param, 'sale_custom.print_server_reset_timeout', DEFAULT_RESET_TIMEOUT),
+    )
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            base_url = key[0]
+            # Forget pools built for an outdated configuration (requests
+            # already using them finish normally)
+            for old_key in [k for k in _clients if k[0] == base_url]:
+                del _clients[old_key]
+            client = PrintServerClient(*key)
+            _clients[key] = client
+        return client
@@ -17,7 +17,7 @@ class NwClearOrderWizard(models.TransientModel):
         if self.clear_all:
             days_to_process = 0
 
-        self.env["nw.sale.order"]._cron_clear_weekly_orders(days=days_to_process)
+        self.env["nw.sale.order"]._clear_orders(days=days_to_process)
 
         return {
             "type": "ir.actions.client",
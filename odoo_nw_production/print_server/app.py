@@ -14,180 +14,362 @@ if sys.platform == 'win32':
     except:
         pass
 
-from flask import Flask, request, jsonify
-from datetime import datetime
-import traceback
+from flask import Blueprint, Flask, Response, current_app, request, jsonify
+from werkzeug.local import LocalProxy
+import atexit
+import threading
 
 import config
-from printers import get_printer_handler
-from utils import decode_base64_pdf, validate_pdf, get_pdf_info, log_print_job, log_error, logger
+from print_service import PrintService, RequestError, NOT_INITIALIZED, request_defaults, remove_spool_files
+from utils import logger
 
-# Initialize Flask app
-app = Flask(__name__)
 
-# Initialize printer handler (auto-detects OS)
-init_error = None
-try:
-    printer_handler = get_printer_handler()
-    logger.info("Print Server initialized successfully")
-except Exception as e:
-    init_error = str(e)
-    logger.error("Failed to initialize printer handler: {}".format(e))
-    printer_handler = None
+class PrintServerState(PrintService):
+    """
+    Per-process print server state: printer handler, job registry and queue.
+    
+    Created once by create_app(), so every server process (dev server,
+    waitress, each gunicorn worker) initializes printers exactly once.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        # Queue again what a crashed or rebooted server accepted but never printed
+        if self.job_queue:
+            self.remember(self.job_queue.replay())
+        self._closed = False
+        self._lock = threading.Lock()
+    
+    def shutdown(self, timeout: float = None):
+        """
+        Stop accepting jobs, finish queued jobs, then stop background threads.
+        
+        Safe to call more than once.
+        
+        Args:
+            timeout: Seconds to wait for each print worker (default: config.SHUTDOWN_TIMEOUT)
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        
+        timeout = config.SHUTDOWN_TIMEOUT if timeout is None else timeout
+        if self.job_queue:
+            logger.info("Draining print queue ({} jobs waiting)".format(self.job_queue.depth()))
+            self.job_queue.shutdown(timeout)
+        self.job_registry.stop_polling()
+        if self.printer_handler:
+            self.printer_handler.inventory.stop()
+        logger.info("Print Server stopped")
+
+
+api = Blueprint('print_server', __name__)
 
 
-@app.route('/api/health', methods=['GET'])
+def _state() -> PrintServerState:
+    """State of the app handling the current request"""
+    return current_app.extensions['print_server']
+
+
+# Request-time view of the current app's printer handler
+printer_handler = LocalProxy(lambda: _state().printer_handler)
+
+
+def create_app() -> Flask:
+    """
+    Create the print server application.
+    
+    Use this factory from any WSGI server, e.g.
+    ``waitress-serve --call app:create_app`` or ``gunicorn "app:create_app()"``.
+    
+    Returns:
+        Flask application
+    """
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = config.MAX_UPLOAD_SIZE
+    
+    state = PrintServerState()
+    app.extensions['print_server'] = state
+    app.register_blueprint(api)
+    
+    # Drain in-flight jobs when the process exits normally
+    atexit.register(state.shutdown)
+    return app
+
+
+def print_banner():
+    """Print startup information to the console"""
+    print("=" * 60)
+    print("🖨️  Print Server Starting")
+    print("=" * 60)
+    print("Host: {}:{}".format(config.HOST, config.PORT))
+    print("Mock Mode: {}".format(config.MOCK_MODE))
+    print("Printer A: {} (Dot Matrix)".format(config.PRINTER_A_NAME))
+    print("Printer B: {} (Thermal)".format(config.PRINTER_B_NAME))
+    print("Workers per Printer: {}".format(config.PRINT_WORKERS_PER_PRINTER))
+    print("Log File: {}".format(config.LOG_FILE))
+    if config.MOCK_MODE:
+        print("Mock Output: {}".format(config.MOCK_OUTPUT_DIR))
+    print("=" * 60)
+    print("\nAPI Endpoints:")
+    print("  GET  /api/health         - Health check")
+    print("  GET  /api/printers       - List printers")
+    print("  POST /api/print          - Queue document for printing")
+    print("  POST /api/print/raw      - Queue binary/multipart PDF")
+    print("  POST /api/print/document - Queue ESC/POS or ESC/P document data")
+    print("  POST /api/print/batch    - Queue many documents at once")
+    print("  GET  /api/status/<id>    - Get job status")
+    print("  GET  /metrics            - Prometheus metrics")
+    if config.MOCK_MODE:
+        print("  GET  /api/mock/jobs      - List mock jobs")
+        print("  POST /api/mock/clear     - Clear mock jobs")
+    print("=" * 60)
+    print()
+
+
+def _respond(body, status=200, headers=None):
+    """Flask response of a (body, status, headers) result of the print service"""
+    response = jsonify(body)
+    if headers:
+        response.headers.update(headers)
+    return response, status
+
+
+def _defaults():
+    """Scheduling defaults of the current request (see print_service.request_defaults)"""
+    return request_defaults(request.headers, request.remote_addr)
+
+
+def _queue(prepare, data):
+    """
+    Build a job with prepare() and queue it.
+    
+    Args:
+        prepare: Callable returning the PrintJob (may raise RequestError)
+        data: Request metadata with printer and order_id, for error logs
+        
+    Returns:
+        Flask response tuple
+    """
+    try:
+        return _respond(*_state().queue_job(prepare()))
+    except RequestError as e:
+        return _respond(*e.response())
+    except Exception as e:
+        return _respond(*_state().error_response(e, data))
+
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'ok',
-        'timestamp': datetime.now().isoformat(),
-        'mock_mode': config.MOCK_MODE,
-        'printer_handler': printer_handler.__class__.__name__ if printer_handler else None,
-        'init_error': init_error
-    })
+    return jsonify(_state().health())
 
 
-@app.route('/api/printers', methods=['GET'])
+@api.route('/api/printers', methods=['GET'])
 def get_printers():
     """
     Get list of available printers.
     
+    Served from the printer inventory cache; pass ?refresh=1 to
+    re-enumerate printers first.
+    
     Returns:
         JSON list of printers with their status
     """
-    if not printer_handler:
-        return jsonify({
-            'success': False,
-            'error': f'Printer handler not initialized: {init_error}'
-        }), 200
-    
-    try:
-        printers = printer_handler.get_printers()
-        return jsonify({
-            'success': True,
-            'printers': printers,
-            'count': len(printers)
-        })
-    except Exception as e:
-        logger.error("Error getting printers: {}".format(e))
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 200
+    return _respond(*_state().printers(bool(request.args.get('refresh'))))
 
 
-@app.route('/api/print', methods=['POST'])
+@api.route('/api/print', methods=['POST'])
 def print_document():
     """
-    Print a PDF document.
+    Queue a PDF document for printing.
+    
+    The document is validated and queued; printing happens on the printer's
+    worker thread, so the response is returned before the job is printed.
     
     Expected JSON payload:
     {
         "printer": "PrinterA" | "PrinterB",
         "pdf_data": "base64_encoded_pdf",
         "report_type": "invoice_delivery" | "invoice",
-        "order_id": "SO001" (optional)
+        "order_id": "SO001" (optional),
+        "priority": "high" | "normal" | "low" (optional),
+        "client_id": "cashier1" (optional, default X-Client-Id or caller address),
+        "idempotency_key": "..." (optional, or the Idempotency-Key header:
+            a resend with the same key returns the original job)
     }
     
     Returns:
-        JSON response with job_id and status
+        JSON response with job_id and status (202 Accepted, or 429 with
+        Retry-After if the printer queue is full)
     """
     if not printer_handler:
-        return jsonify({'error': 'Printer handler not initialized'}), 500
+        return _respond(*NOT_INITIALIZED)
     
-    try:
-        # Parse request data
-        data = request.json
-        if not data:
-            return jsonify({'error': 'No JSON data provided'}), 400
-        
-        printer_name = data.get('printer')
-        pdf_base64 = data.get('pdf_data')
-        report_type = data.get('report_type', 'unknown')
-        order_id = data.get('order_id', 'unknown')
-        
-        # Validate required fields
-        if not printer_name:
-            return jsonify({'error': 'Missing required field: printer'}), 400
-        if not pdf_base64:
-            return jsonify({'error': 'Missing required field: pdf_data'}), 400
-        
-        # Map printer name to actual printer
-        printer_mapping = {
-            'PrinterA': config.PRINTER_A_NAME,
-            'PrinterB': config.PRINTER_B_NAME
-        }
-        actual_printer_name = printer_mapping.get(printer_name, printer_name)
+    data = request.get_json(silent=True)
+    return _queue(lambda: _state().prepare_pdf(data, _defaults()), data)
+
+
+@api.route('/api/print/raw', methods=['POST'])
+def print_raw_document():
+    """
+    Queue a PDF document sent as a binary or multipart body.
+    
+    Avoids the base64/JSON round trip of /api/print: the body is streamed
+    in chunks straight into a spool file.
+    
+    Accepted bodies:
+        Content-Type: application/pdf (or application/octet-stream)
+            Raw PDF bytes as the request body
+        Content-Type: multipart/form-data
+            PDF in the "file" part; metadata may also be sent as form fields
+    
+    Metadata (header, or query parameter / form field):
+        X-Printer       / printer       (required)
+        X-Report-Type   / report_type
+        X-Order-Id      / order_id
+        X-Print-Priority / priority
+        X-Client-Id     / client_id
+        Idempotency-Key / idempotency_key
+    
+    Returns:
+        JSON response with job_id and status (202 Accepted)
+    """
+    if not printer_handler:
+        return _respond(*NOT_INITIALIZED)
+    
+    def param(name, header=None):
+        return ((header and request.headers.get(header)) or request.args.get(name)
+                or request.form.get(name))
+    
+    data = {
+        'printer': param('printer', 'X-Printer'),
+        'order_id': param('order_id', 'X-Order-Id'),
+        'report_type': param('report_type', 'X-Report-Type'),
+        'priority': param('priority'),
+        'client_id': param('client_id'),
+        'idempotency_key': param('idempotency_key'),
+    }
+    
+    def prepare():
+        state = _state()
+        # Validate printer before spooling anything to disk
+        fields = state.check_upload(data, _defaults())
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if upload is None:
+                raise RequestError('Missing required file part: file')
+            stream = upload.stream
+        else:
+            stream = request.stream
         
-        # Decode PDF
+        # Spool body to disk, validating the PDF header on the first chunk
         try:
-            pdf_data = decode_base64_pdf(pdf_base64)
-        except Exception as e:
-            return jsonify({'error': 'Invalid PDF data: {}'.format(e)}), 400
-        
-        # Validate PDF
-        if not validate_pdf(pdf_data):
-            return jsonify({'error': 'Invalid PDF file'}), 400
-        
-        # Get PDF info
-        pdf_info = get_pdf_info(pdf_data)
-        
-        # Validate printer exists
-        if not printer_handler.validate_printer(actual_printer_name):
-            return jsonify({
-                'error': 'Printer not found: {}'.format(actual_printer_name),
-                'available_printers': [p['name'] for p in printer_handler.get_printers()]
-            }), 404
-        
-        # Check printer status
-        status = printer_handler.get_printer_status(actual_printer_name)
-        if status not in ['ready']:
-            logger.warning("Printer {} status: {}".format(actual_printer_name, status))
-        
-        # Send to printer
-        job_id = printer_handler.print_pdf(actual_printer_name, pdf_data)
-        
-        # Log successful print job
-        job_info = {
-            'job_id': job_id,
-            'printer': actual_printer_name,
-            'report_type': report_type,
-            'order_id': order_id,
-            'size_kb': pdf_info['size_kb']
-        }
-        log_print_job(logger, job_info)
+            spool_path = state.spool_upload(stream)
+        except ValueError as e:
+            raise RequestError(str(e), cause='invalid_pdf')
+        return state.spooled_job(fields, spool_path)
+    
+    return _queue(prepare, data)
+
+
+@api.route('/api/print/document', methods=['POST'])
+def print_structured_document():
+    """
+    Queue a document sent as data and rendered here for the printer.
+    
+    Skips PDF rendering and rasterization entirely: e.g. the cash bill is
+    rendered to ESC/POS text commands (a few KB) and sent RAW to the
+    thermal printer.
+    
+    Expected JSON payload:
+    {
+        "printer": "PrinterB",
+        "format": "escpos" | "escp",
+        "document": {...},
+        "report_type": "invoice",
+        "order_id": "SO001" (optional),
+        "priority": "high" | "normal" | "low" (optional),
+        "client_id": "cashier1" (optional),
+        "idempotency_key": "..." (optional, or the Idempotency-Key header)
+    }
+    
+    Returns:
+        JSON response with job_id and status (202 Accepted)
+    """
+    if not printer_handler:
+        return _respond(*NOT_INITIALIZED)
+    
+    data = request.get_json(silent=True)
+    return _queue(lambda: _state().prepare_document(data, _defaults()), data)
+
+
+@api.route('/api/print/batch', methods=['POST'])
+def print_batch():
+    """
+    Queue many PDF documents in one request.
+    
+    Each document is validated and queued on its own, so one bad document
+    does not reject the rest of the batch.
+    
+    Accepted bodies:
+        Content-Type: application/json
+            {"documents": [{"printer": ..., "pdf_data": "base64", 
+                            "report_type": ..., "order_id": ...}, ...]}
+            (an entry may send "format" and "document" instead of pdf_data,
+            as for /api/print/document)
+        Content-Type: multipart/form-data
+            One "file" part per document, plus a "documents" form field with a
+            JSON list of {"printer", "report_type", "order_id"} in the same order
+            (a single entry applies to every file)
+    
+    Entries may set "priority" and "client_id"; the X-Print-Priority and
+    X-Client-Id headers apply to entries that do not. An entry with the
+    "idempotency_key" of a recent job is not queued again (the
+    Idempotency-Key header does not apply to batches).
+    
+    Returns:
+        JSON response with one result per document (202 Accepted if any
+        document was queued, 429 with Retry-After if none was because the
+        queues are full, otherwise 400)
+    """
+    if not printer_handler:
+        return _respond(*NOT_INITIALIZED)
+    
+    state = _state()
+    spooled = []
+    try:
+        if request.mimetype == 'multipart/form-data':
+            uploads = request.files.getlist('file')
+            state.check_batch_size(len(uploads))
+            for upload in uploads:
+                try:
+                    spooled.append(state.spool_upload(upload.stream))
+                except ValueError as e:
+                    spooled.append(e)
+            entries = state.batch_uploads(request.form.get('documents'), spooled)
+        else:
+            entries = state.batch_documents(request.get_json(silent=True))
+        # Spool files are now owned by their entries
+        spooled = []
         
-        return jsonify({
-            'success': True,
-            'job_id': job_id,
-            'printer': actual_printer_name,
-            'printer_alias': printer_name,
-            'report_type': report_type,
-            'order_id': order_id,
-            'pdf_info': pdf_info,
-            'timestamp': datetime.now().isoformat()
-        })
+        defaults = _defaults()
+        results = [
+            state.queue_batch_entry(state.prepare_batch_entry(document, defaults, upload))
+            for document, upload in entries
+        ]
+        return _respond(*state.batch_response(results))
         
+    except RequestError as e:
+        return _respond(*e.response())
     except Exception as e:
-        # Log error
-        error_info = {
-            'printer': data.get('printer', 'unknown'),
-            'error': str(e),
-            'order_id': data.get('order_id', 'unknown')
-        }
-        log_error(logger, error_info)
-        
-        logger.error("Print error: {}".format(traceback.format_exc()))
-        
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'timestamp': datetime.now().isoformat()
-        }), 500
+        return _respond(*state.error_response(e))
+    finally:
+        remove_spool_files(spooled)
 
 
-@app.route('/api/status/<job_id>', methods=['GET'])
+@api.route('/api/status/<job_id>', methods=['GET'])
 def get_print_status(job_id):
     """
     Get status of a print job.
@@ -196,19 +378,23 @@ def get_print_status(job_id):
         job_id: Print job ID
         
     Returns:
-        JSON response with job status
+        JSON response with job status: queued, spooling, printing, done or failed
+    """
+    return _respond(*_state().job_status(job_id))
+
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
     """
-    # For mock and Windows printers, we don't track job status
-    # For Linux/CUPS, we could query the job status
+    Prometheus metrics.
     
-    return jsonify({
-        'job_id': job_id,
-        'status': 'completed',
-        'message': 'Job status tracking not implemented for this printer type'
-    })
+    Returns:
+        Metrics in the Prometheus text exposition format
+    """
+    return Response(_state().metrics(), mimetype='text/plain; version=0.0.4')
 
 
-@app.route('/api/mock/jobs', methods=['GET'])
+@api.route('/api/mock/jobs', methods=['GET'])
 def list_mock_jobs():
     """
     List all mock print jobs (only available in mock mode).
@@ -234,7 +420,7 @@ def list_mock_jobs():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/mock/clear', methods=['POST'])
+@api.route('/api/mock/clear', methods=['POST'])
 def clear_mock_jobs():
     """
     Clear all mock print jobs (only available in mock mode).
@@ -259,13 +445,13 @@ def clear_mock_jobs():
         return jsonify({'error': str(e)}), 500
 
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
     return jsonify({'error': 'Endpoint not found'}), 404
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
     logger.error("Internal server error: {}".format(error))
@@ -273,30 +459,13 @@ def internal_error(error):
 
 
 if __name__ == '__main__':
-    print("=" * 60)
-    print("🖨️  Print Server Starting")
-    print("=" * 60)
-    print("Host: {}:{}".format(config.HOST, config.PORT))
-    print("Mock Mode: {}".format(config.MOCK_MODE))
-    print("Printer A: {} (Dot Matrix)".format(config.PRINTER_A_NAME))
-    print("Printer B: {} (Thermal)".format(config.PRINTER_B_NAME))
-    print("Log File: {}".format(config.LOG_FILE))
-    if config.MOCK_MODE:
-        print("Mock Output: {}".format(config.MOCK_OUTPUT_DIR))
-    print("=" * 60)
-    print("\nAPI Endpoints:")
-    print("  GET  /api/health         - Health check")
-    print("  GET  /api/printers       - List printers")
-    print("  POST /api/print          - Print document")
-    print("  GET  /api/status/<id>    - Get job status")
-    if config.MOCK_MODE:
-        print("  GET  /api/mock/jobs      - List mock jobs")
-        print("  POST /api/mock/clear     - Clear mock jobs")
-    print("=" * 60)
-    print()
+    # Development server; use serve.py (waitress) in production
+    app = create_app()
+    print_banner()
     
     app.run(
         host=config.HOST,
         port=config.PORT,
-        debug=config.DEBUG
+        debug=config.DEBUG,
+        use_reloader=False
     )
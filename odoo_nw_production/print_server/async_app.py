@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Print Server - asyncio Application
+aiohttp front end that keeps accepting requests while printer I/O runs in a bounded thread pool.
+"""
+import sys
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except:
+        pass
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import config
+from jobs import AsyncPrintJobQueue
+from print_service import PrintService, RequestError, NOT_INITIALIZED, request_defaults, remove_spool_files
+from utils import spool_chunks_to_file, logger, PRINT_STAGE_SECONDS
+
+
+class AsyncPrintServerState(PrintService):
+    """
+    Per-process state of the async print server.
+
+    Printer jobs run in ``print_executor`` (bounded by ASYNC_PRINT_THREADS);
+    validation, spooling and rendering use the loop's default executor, so
+    they never block the loop nor queue behind a slow printer.
+    """
+
+    def __init__(self):
+        self.print_executor = ThreadPoolExecutor(
+            max_workers=config.ASYNC_PRINT_THREADS, thread_name_prefix='print-io'
+        )
+        super().__init__()
+
+    def _create_queue(self, journal):
+        return AsyncPrintJobQueue(
+            self.printer_handler, self.print_executor, registry=self.job_registry, journal=journal
+        )
+
+    async def shutdown(self):
+        """Stop accepting jobs, finish queued jobs, then stop background threads"""
+        if self.job_queue:
+            logger.info("Draining print queue ({} jobs waiting)".format(self.job_queue.depth()))
+            await self.job_queue.shutdown(config.SHUTDOWN_TIMEOUT)
+        self.print_executor.shutdown(wait=False)
+        self.job_registry.stop_polling()
+        if self.printer_handler:
+            self.printer_handler.inventory.stop()
+        logger.info("Print Server stopped")
+
+
+STATE = web.AppKey('print_server', AsyncPrintServerState)
+
+
+async def _run_blocking(func, *args):
+    """Run a blocking call in the loop's default executor"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _respond(body, status=200, headers=None):
+    """aiohttp response of a (body, status, headers) result of the print service"""
+    return web.json_response(body, status=status, headers=headers)
+
+
+def _defaults(request):
+    """Scheduling defaults of a request (see print_service.request_defaults)"""
+    return request_defaults(request.headers, request.remote)
+
+
+async def _json(request):
+    """JSON body of a request, None if it is not valid JSON"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def _queue(state, prepare, data):
+    """
+    Build a job with the coroutine prepare() and queue it on the loop.
+
+    Args:
+        state: AsyncPrintServerState
+        prepare: Coroutine function returning the PrintJob (may raise RequestError)
+        data: Request metadata with printer and order_id, for error logs
+
+    Returns:
+        aiohttp response
+    """
+    try:
+        return _respond(*state.queue_job(await prepare()))
+    except RequestError as e:
+        return _respond(*e.response())
+    except Exception as e:
+        return _respond(*state.error_response(e, data))
+
+
+async def _read_part(part):
+    """Async iterator over the chunks of a multipart part"""
+    while True:
+        chunk = await part.read_chunk(config.SPOOL_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _spool(chunks):
+    """Spool an async stream of chunks (timed as the 'spool' stage)"""
+    with PRINT_STAGE_SECONDS.time(stage='spool'):
+        return await spool_chunks_to_file(chunks)
+
+
+async def health_check(request):
+    """Health check endpoint (never touches printers)"""
+    return web.json_response(dict(request.app[STATE].health(), server='aiohttp'))
+
+
+async def get_printers(request):
+    """
+    Get list of available printers.
+
+    Served from the printer inventory cache; pass ?refresh=1 to
+    re-enumerate printers first.
+    """
+    state = request.app[STATE]
+    return _respond(*await _run_blocking(state.printers, bool(request.query.get('refresh'))))
+
+
+async def print_document(request):
+    """
+    Queue a base64 PDF document for printing (same payload as the Flask /api/print).
+    """
+    state = request.app[STATE]
+    if not state.printer_handler:
+        return _respond(*NOT_INITIALIZED)
+
+    data = await _json(request)
+    return await _queue(
+        state, lambda: _run_blocking(state.prepare_pdf, data, _defaults(request)), data
+    )
+
+
+async def print_raw_document(request):
+    """
+    Queue a PDF sent as a binary body or in the "file" part of a multipart body.
+
+    Metadata as in the Flask /api/print/raw: X-Printer / X-Order-Id /
+    X-Report-Type / X-Print-Priority / X-Client-Id / Idempotency-Key
+    headers, or printer / order_id / report_type / priority / client_id /
+    idempotency_key query parameters.
+    """
+    state = request.app[STATE]
+    if not state.printer_handler:
+        return _respond(*NOT_INITIALIZED)
+
+    def param(name, header=None):
+        return (header and request.headers.get(header)) or request.query.get(name)
+
+    data = {
+        'printer': param('printer', 'X-Printer'),
+        'order_id': param('order_id', 'X-Order-Id'),
+        'report_type': param('report_type', 'X-Report-Type'),
+        'priority': param('priority'),
+        'client_id': param('client_id'),
+        'idempotency_key': param('idempotency_key'),
+    }
+
+    async def prepare():
+        # Validate printer before spooling anything to disk
+        fields = await _run_blocking(state.check_upload, data, _defaults(request))
+        if request.content_type == 'multipart/form-data':
+            reader = await request.multipart()
+            part = await reader.next()
+            while part is not None and part.name != 'file':
+                part = await reader.next()
+            if part is None:
+                raise RequestError('Missing required file part: file')
+            chunks = _read_part(part)
+        else:
+            chunks = request.content.iter_chunked(config.SPOOL_CHUNK_SIZE)
+
+        try:
+            spool_path = await _spool(chunks)
+        except ValueError as e:
+            raise RequestError(str(e), cause='invalid_pdf')
+        return await _run_blocking(state.spooled_job, fields, spool_path)
+
+    return await _queue(state, prepare, data)
+
+
+async def print_structured_document(request):
+    """
+    Queue a document sent as data, rendered here for the printer
+    (same payload as the Flask /api/print/document).
+    """
+    state = request.app[STATE]
+    if not state.printer_handler:
+        return _respond(*NOT_INITIALIZED)
+
+    data = await _json(request)
+    return await _queue(
+        state, lambda: _run_blocking(state.prepare_document, data, _defaults(request)), data
+    )
+
+
+async def print_batch(request):
+    """
+    Queue many PDF documents in one request (same bodies as the Flask /api/print/batch).
+
+    Multipart files are spooled as they arrive; the "documents" field may
+    come before or after the files.
+    """
+    state = request.app[STATE]
+    if not state.printer_handler:
+        return _respond(*NOT_INITIALIZED)
+
+    spooled = []
+    try:
+        if request.content_type == 'multipart/form-data':
+            documents_json = None
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == 'file':
+                    state.check_batch_size(len(spooled) + 1)
+                    try:
+                        spooled.append(await _spool(_read_part(part)))
+                    except ValueError as e:
+                        spooled.append(e)
+                elif part.name == 'documents':
+                    documents_json = await part.text()
+            entries = state.batch_uploads(documents_json, spooled)
+        else:
+            entries = state.batch_documents(await _json(request))
+        # Spool files are now owned by their entries
+        spooled = []
+
+        defaults = _defaults(request)
+        results = []
+        for document, upload in entries:
+            entry = await _run_blocking(state.prepare_batch_entry, document, defaults, upload)
+            results.append(state.queue_batch_entry(entry))
+        return _respond(*state.batch_response(results))
+
+    except RequestError as e:
+        return _respond(*e.response())
+    except Exception as e:
+        return _respond(*state.error_response(e))
+    finally:
+        remove_spool_files(spooled)
+
+
+async def get_print_status(request):
+    """Get status of a print job: queued, spooling, printing, done or failed"""
+    return _respond(*request.app[STATE].job_status(request.match_info['job_id']))
+
+
+async def metrics(request):
+    """Prometheus metrics"""
+    return web.Response(text=request.app[STATE].metrics(), content_type='text/plain')
+
+
+async def _on_startup(app):
+    # Queue again what a crashed or rebooted server accepted but never printed
+    state = app[STATE]
+    if state.job_queue:
+        state.remember(await state.job_queue.replay())
+
+
+async def _on_cleanup(app):
+    await app[STATE].shutdown()
+
+
+def create_async_app() -> web.Application:
+    """
+    Create the aiohttp print server application.
+
+    Returns:
+        aiohttp Application
+    """
+    app = web.Application(client_max_size=config.MAX_UPLOAD_SIZE)
+    app[STATE] = AsyncPrintServerState()
+    app.router.add_get('/api/health', health_check)
+    app.router.add_get('/api/printers', get_printers)
+    app.router.add_post('/api/print', print_document)
+    app.router.add_post('/api/print/raw', print_raw_document)
+    app.router.add_post('/api/print/document', print_structured_document)
+    app.router.add_post('/api/print/batch', print_batch)
+    app.router.add_get('/api/status/{job_id}', get_print_status)
+    app.router.add_get('/metrics', metrics)
+    app.on_startup.append(_on_startup)
+    # Drain queued jobs on SIGTERM / Ctrl+C (web.run_app runs cleanup)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+
+if __name__ == '__main__':
+    logger.info("Starting async Print Server on http://{}:{} ({} printer I/O threads)".format(
+        config.HOST, config.PORT, config.ASYNC_PRINT_THREADS
+    ))
+    web.run_app(
+        create_async_app(),
+        host=config.HOST,
+        port=config.PORT,
+        shutdown_timeout=config.SHUTDOWN_TIMEOUT
+    )
@@ -10,6 +10,12 @@ HOST = os.getenv('PRINT_SERVER_HOST', '0.0.0.0')
 PORT = int(os.getenv('PRINT_SERVER_PORT', '5000'))
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 
+# Production Server (serve.py / gunicorn.conf.py)
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '8'))  # request threads per process
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '1'))  # gunicorn processes (each has its own print queues)
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '30'))  # seconds to drain print jobs on shutdown
+ASYNC_PRINT_THREADS = int(os.getenv('ASYNC_PRINT_THREADS', '8'))  # async_app.py: threads for blocking printer I/O
+
 # Mock Mode - Set to True to test without physical printers
 MOCK_MODE = os.getenv('MOCK_MODE', 'False').lower() == 'true'
 
@@ -17,19 +23,63 @@ MOCK_MODE = os.getenv('MOCK_MODE', 'False').lower() == 'true'
 PRINTER_A_NAME = os.getenv('PRINTER_A_NAME', 'PrinterA')  # Dot Matrix
 PRINTER_B_NAME = os.getenv('PRINTER_B_NAME', 'PrinterB')  # Thermal
 
+# Printer Backend - 'auto' picks by OS, 'command' runs PRINT_COMMAND for every job
+PRINTER_BACKEND = os.getenv('PRINTER_BACKEND', 'auto').lower()
+
+# External Print Command (PRINTER_BACKEND=command)
+# Placeholders: {printer}, {file} (one file per run) or {files} (batched files)
+PRINT_COMMAND = os.getenv('PRINT_COMMAND', '')  # empty = SumatraPDF on Windows, lp elsewhere
+PRINT_COMMAND_TIMEOUT = float(os.getenv('PRINT_COMMAND_TIMEOUT', '30'))  # seconds per file
+PRINT_COMMAND_MAX_TIMEOUT = float(os.getenv('PRINT_COMMAND_MAX_TIMEOUT', '60'))  # seconds per run, however many files
+PRINT_COMMAND_BATCH_SIZE = int(os.getenv('PRINT_COMMAND_BATCH_SIZE', '10'))  # files per run
+PRINT_COMMAND_MAX_PROCESSES = int(os.getenv('PRINT_COMMAND_MAX_PROCESSES', '4'))  # concurrent runs per printer
+PRINT_COMMAND_PRINTERS = [
+    name.strip()
+    for name in os.getenv('PRINT_COMMAND_PRINTERS', f'{PRINTER_A_NAME},{PRINTER_B_NAME}').split(',')
+    if name.strip()
+]
+
+# Printer Inventory Cache
+PRINTER_CACHE_TTL = float(os.getenv('PRINTER_CACHE_TTL', '60'))  # seconds
+PRINTER_CACHE_REFRESH = float(os.getenv('PRINTER_CACHE_REFRESH', '30'))  # seconds, 0 = no background refresh
+
+# Print Queue Settings
+PRINT_WORKERS_PER_PRINTER = int(os.getenv('PRINT_WORKERS_PER_PRINTER', '1'))
+PRINT_QUEUE_SIZE = int(os.getenv('PRINT_QUEUE_SIZE', '100'))  # max waiting jobs per printer
+PRINT_RETRY_AFTER = int(os.getenv('PRINT_RETRY_AFTER', '5'))  # Retry-After seconds sent with 429 when a queue is full
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '1000'))  # recent Idempotency-Key results kept
+
+# Job Status Tracking
+JOB_DB_PATH = os.getenv('JOB_DB_PATH', '')  # SQLite file for job history (empty = memory only)
+JOB_HISTORY_SIZE = int(os.getenv('JOB_HISTORY_SIZE', '1000'))  # jobs kept in memory
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))  # seconds between spooler polls
+JOB_MISSING_GRACE = float(os.getenv('JOB_MISSING_GRACE', '30'))  # seconds a printing job may be missing from the spooler before it counts as done
+
+# ESC/POS Output (thermal printer, /api/print/document)
+ESCPOS_WIDTH = int(os.getenv('ESCPOS_WIDTH', '48'))  # characters per line (80mm Font A = 48, 58mm = 32)
+ESCPOS_CODEPAGE = int(os.getenv('ESCPOS_CODEPAGE', '21'))  # ESC t n: Thai code page number from the printer manual
+ESCPOS_ENCODING = os.getenv('ESCPOS_ENCODING', 'cp874')  # text encoding matching ESCPOS_CODEPAGE (TIS-620)
+
+# ESC/P Output (dot matrix printer, /api/print/document)
+ESCP_WIDTH = int(os.getenv('ESCP_WIDTH', '80'))  # characters per line (A4 at 10 cpi = 80)
+ESCP_CHARACTER_TABLE = int(os.getenv('ESCP_CHARACTER_TABLE', '26'))  # ESC ( t table number for Thai, from the printer manual
+ESCP_ENCODING = os.getenv('ESCP_ENCODING', 'cp874')  # text encoding matching ESCP_CHARACTER_TABLE (TIS-620)
+
 # Printer Configuration
 PRINTERS = {
     'PrinterA': {
         'name': PRINTER_A_NAME,
         'type': 'dot_matrix',
         'description': 'Dot Matrix Printer for Invoice/Delivery',
-        'paper_size': 'A4'
+        'paper_size': 'A4',
+        'workers': int(os.getenv('PRINTER_A_WORKERS', PRINT_WORKERS_PER_PRINTER))
     },
     'PrinterB': {
         'name': PRINTER_B_NAME,
         'type': 'thermal',
         'description': 'Thermal Printer for Invoice',
-        'paper_size': '80mm'
+        'paper_size': '80mm',
+        'workers': int(os.getenv('PRINTER_B_WORKERS', PRINT_WORKERS_PER_PRINTER))
     }
 }
 
@@ -38,11 +88,25 @@ LOG_DIR = Path(__file__).parent / 'logs'
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOG_DIR / 'print_jobs.log'
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # rotate the JSON log file at this size
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))  # rotated log files kept
 
 # Mock Printer Output Directory
 MOCK_OUTPUT_DIR = Path(__file__).parent / 'mock_output'
 MOCK_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Spool Directory - incoming documents are streamed here before printing
+SPOOL_DIR = Path(os.getenv('SPOOL_DIR', str(Path(__file__).parent / 'spool')))
+SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+SPOOL_CHUNK_SIZE = int(os.getenv('SPOOL_CHUNK_SIZE', str(64 * 1024)))  # bytes
+MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', str(50 * 1024 * 1024)))  # bytes
+MAX_BATCH_DOCUMENTS = int(os.getenv('MAX_BATCH_DOCUMENTS', '200'))
+
+# Spool Journal - accepted jobs are replayed after a crash or reboot
+JOURNAL_PATH = os.getenv('JOURNAL_PATH', str(SPOOL_DIR / 'journal.jsonl'))  # empty = no journal
+JOURNAL_FSYNC_INTERVAL = float(os.getenv('JOURNAL_FSYNC_INTERVAL', '0.05'))  # seconds between batched fsyncs
+JOURNAL_MAX_SIZE = int(os.getenv('JOURNAL_MAX_SIZE', str(1024 * 1024)))  # bytes before finished jobs are compacted away
+
 # Print Job Settings
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
 RETRY_DELAY = int(os.getenv('RETRY_DELAY', '2'))  # seconds
@@ -0,0 +1,19 @@
+"""
+Gunicorn Configuration (Linux)
+Usage: gunicorn -c gunicorn.conf.py "app:create_app()"
+"""
+import config
+
+bind = '{}:{}'.format(config.HOST, config.PORT)
+workers = config.SERVER_WORKERS
+worker_class = 'gthread'
+threads = config.SERVER_THREADS
+# Give workers time to drain their print queues on shutdown
+graceful_timeout = config.SHUTDOWN_TIMEOUT + 5
+
+
+def worker_exit(server, worker):
+    """Finish queued print jobs before the worker process exits"""
+    app = getattr(worker, 'wsgi', None)
+    if app is not None and 'print_server' in getattr(app, 'extensions', {}):
+        app.extensions['print_server'].shutdown()
@@ -0,0 +1,23 @@
+"""Print jobs package"""
+from .registry import JobRegistry, JOB_STATES
+from .journal import PrintJournal
+from .idempotency import IdempotencyCache, MAX_KEY_LENGTH
+from .print_queue import PrintJob, PrintJobQueue, QueueFullError
+from .async_queue import AsyncPrintJobQueue
+from .scheduler import FairQueue, AsyncFairQueue, PRIORITIES, DEFAULT_PRIORITY
+
+__all__ = [
+    'AsyncFairQueue',
+    'AsyncPrintJobQueue',
+    'DEFAULT_PRIORITY',
+    'FairQueue',
+    'IdempotencyCache',
+    'JobRegistry',
+    'JOB_STATES',
+    'MAX_KEY_LENGTH',
+    'PRIORITIES',
+    'PrintJournal',
+    'PrintJob',
+    'PrintJobQueue',
+    'QueueFullError'
+]
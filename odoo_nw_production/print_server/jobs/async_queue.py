@@ -0,0 +1,129 @@
+"""
+Async Print Job Queue
+asyncio variant of PrintJobQueue: jobs wait on the event loop, blocking printer calls run in a bounded thread pool.
+"""
+import asyncio
+from concurrent.futures import Executor
+from typing import Dict, List
+
+from .journal import PrintJournal
+from .print_queue import PrintJob, PrintJobQueue, QueueFullError
+from .registry import JobRegistry
+from .scheduler import AsyncFairQueue
+
+
+class AsyncPrintJobQueue(PrintJobQueue):
+    """
+    Per-printer asyncio fair queues drained by worker coroutines.
+
+    Each worker awaits the blocking part of a job (``PrintJobQueue._process``:
+    CUPS, win32print, SumatraPDF) in ``executor``, so the event loop keeps
+    accepting requests while printers are busy. A printer never holds more
+    executor threads than its worker count, so one stuck device cannot take
+    over the pool and stall the other printers.
+
+    ``submit`` must be called from the event loop.
+    """
+
+    def __init__(self, printer_handler, executor: Executor, workers_per_printer: int = None,
+                 max_queue_size: int = None, registry: JobRegistry = None,
+                 journal: PrintJournal = None):
+        super().__init__(printer_handler, workers_per_printer, max_queue_size, registry, journal)
+        self.executor = executor
+        self._tasks: Dict[str, List[asyncio.Task]] = {}
+
+    def submit(self, job: PrintJob) -> PrintJob:
+        """
+        Add a job to its printer queue.
+
+        Args:
+            job: Job to enqueue
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the printer queue is full or the queue is stopped
+        """
+        if not self._running:
+            raise QueueFullError('Print queue is shutting down')
+
+        printer_queue = self._get_queue(job.printer_name)
+        if self.journal:
+            self.journal.accept(job)
+        self.registry.add(job)
+        try:
+            printer_queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.registry.set_status(job, 'failed', error='Queue full')
+            if self.journal:
+                self.journal.finish(job)
+            raise QueueFullError(
+                'Print queue for {} is full ({} jobs)'.format(job.printer_name, self.max_queue_size)
+            )
+        return job
+
+    async def replay(self) -> List[PrintJob]:
+        """Queue the jobs a previous run left unfinished (see PrintJobQueue.replay)"""
+        if not self.journal:
+            return []
+        jobs = [self._restore(record) for record in self.journal.open()]
+        for job in jobs:
+            self.registry.add(job)
+            self._get_queue(job.printer_name).put_unbounded(job)
+        return jobs
+
+    async def shutdown(self, timeout: float = None):
+        """
+        Stop accepting jobs and wait for workers to drain their queues.
+
+        Args:
+            timeout: Seconds to wait for all workers (None waits forever)
+        """
+        self._running = False
+        for printer_name, tasks in self._tasks.items():
+            for _ in tasks:
+                self._queues[printer_name].put_unbounded(None)
+        all_tasks = [task for tasks in self._tasks.values() for task in tasks]
+        if all_tasks:
+            await asyncio.wait(all_tasks, timeout=timeout)
+        if self.journal:
+            self.journal.close()
+
+    def _get_queue(self, printer_name: str) -> AsyncFairQueue:
+        """Get the queue for a printer, starting its workers on first use"""
+        printer_queue = self._queues.get(printer_name)
+        if printer_queue is not None:
+            return printer_queue
+
+        # Only touched from the event loop, so no lock is needed
+        printer_queue = AsyncFairQueue(maxsize=self.max_queue_size)
+        self._queues[printer_name] = printer_queue
+        loop = asyncio.get_running_loop()
+        self._tasks[printer_name] = [
+            loop.create_task(self._worker(printer_name))
+            for _ in range(self._worker_count(printer_name))
+        ]
+        return printer_queue
+
+    async def _worker(self, printer_name: str):
+        """Drain one printer queue until a stop sentinel is received"""
+        printer_queue = self._queues[printer_name]
+        loop = asyncio.get_running_loop()
+        batch_size = getattr(self.printer_handler, 'batch_size', 1)
+        while True:
+            batch = [await printer_queue.get()]
+            while batch[-1] is not None and len(batch) < batch_size:
+                try:
+                    batch.append(printer_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                jobs = [job for job in batch if job is not None]
+                if jobs:
+                    await loop.run_in_executor(self.executor, self._process_jobs, jobs)
+                if batch[-1] is None:
+                    return
+            finally:
+                for _ in batch:
+                    printer_queue.task_done()
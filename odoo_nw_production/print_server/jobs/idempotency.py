@@ -0,0 +1,73 @@
+"""
+Idempotent Submission
+Bounded LRU of client-supplied idempotency keys and the result of the job first submitted with each.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import config
+
+# Longest accepted key (order name + report + revision fits easily)
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyCache:
+    """
+    Results of recent submissions by idempotency key.
+
+    A client that did not get an answer (timeout, dropped connection) can
+    send the same document again with the same key and gets the original
+    job back instead of a second print. Only the ``max_keys`` most recently
+    used keys are kept.
+
+    It is the only record of submitted keys: the API reserves a key with
+    the result of its job before queueing it, so two concurrent sends of
+    one key queue a single job, and jobs replayed from the journal at
+    startup are stored here too. ``lock`` only guards the lookup and
+    reservation, never the queueing.
+    """
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = max_keys or config.IDEMPOTENCY_CACHE_SIZE
+        self._results: OrderedDict = OrderedDict()
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Result stored for a key (marking it recently used), or None"""
+        with self.lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Remember the result of the job submitted with a key"""
+        with self.lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_keys:
+                self._results.popitem(last=False)
+
+    def reserve(self, key: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Store the result of a job about to be queued, unless the key is known.
+
+        Returns:
+            The result already stored for the key, or None if the key is
+            now reserved for this job
+        """
+        with self.lock:
+            original = self.get(key)
+            if original is None:
+                self.put(key, result)
+            return original
+
+    def release(self, key: str, result: Dict[str, Any]):
+        """Forget a reservation whose job could not be queued"""
+        with self.lock:
+            if self._results.get(key) is result:
+                del self._results[key]
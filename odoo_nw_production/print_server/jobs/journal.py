@@ -0,0 +1,255 @@
+"""
+Print Job Journal
+Append-only journal of accepted jobs in the spool directory, so jobs survive a crash or reboot and are replayed at startup.
+"""
+import base64
+import json
+import os
+import threading
+from typing import Dict, List, Any
+
+import config
+from utils import logger, remove_spool_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _fsync_path(path: str):
+    """Flush a file's data to disk, ignoring files that are already gone"""
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class PrintJournal:
+    """
+    Crash-safe record of the jobs between the API and the printer.
+
+    Every accepted job is appended as one JSON line ("accept") before it is
+    queued, and a "done" line is appended once the printer has taken it (or
+    it failed). Lines are written straight to the OS, so a crash of the
+    server process loses nothing; fsync of the journal and the spool files
+    it points to is batched on a background thread every
+    ``fsync_interval`` seconds, so requests never wait for the disk and a
+    reboot loses at most that window.
+
+    At startup, ``open()`` returns the jobs that were accepted but never
+    finished, so they can be queued again, and rewrites the journal with
+    only those. Deduplication by idempotency key is left to the API's
+    IdempotencyCache, which is seeded with the replayed jobs.
+
+    Only one process can own a journal; others run without one.
+    """
+
+    def __init__(self, path: str = None, fsync_interval: float = None, max_size: int = None):
+        self.path = str(path if path is not None else config.JOURNAL_PATH)
+        self.fsync_interval = fsync_interval or config.JOURNAL_FSYNC_INTERVAL
+        self.max_size = max_size or config.JOURNAL_MAX_SIZE
+        self.enabled = False
+        self._file = None
+        self._lock_file = None
+        self._size = 0
+        # job_id -> journal line of unfinished jobs
+        self._pending: Dict[str, bytes] = {}
+        self._unsynced: List[str] = []
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def open(self) -> List[Dict[str, Any]]:
+        """
+        Take ownership of the journal and start the fsync thread.
+
+        Returns:
+            Records of unfinished jobs to replay, oldest first (empty if
+            another process owns the journal)
+        """
+        if not self._acquire():
+            logger.warning("Print journal {} is in use by another process; "
+                           "jobs of this process are not journaled".format(self.path))
+            return []
+
+        records = self._load()
+        self._pending = {
+            record['job_id']: self._encode(record) for record in records
+        }
+        self._compact()
+        self.enabled = True
+        self._flusher = threading.Thread(target=self._flush_loop, name='print-journal', daemon=True)
+        self._flusher.start()
+        if records:
+            logger.info("Replaying {} unfinished print jobs from {}".format(len(records), self.path))
+        return records
+
+    def accept(self, job):
+        """
+        Record a job before it is queued.
+
+        Args:
+            job: PrintJob about to be queued
+        """
+        if not self.enabled:
+            return
+        record = {
+            'op': 'accept',
+            'job_id': job.id,
+            'printer': job.printer_name,
+            'printer_alias': job.printer_alias,
+            'report_type': job.report_type,
+            'order_id': job.order_id,
+            'priority': job.priority,
+            'client_id': job.client_id,
+            'idempotency_key': job.idempotency_key,
+            'raw': job.raw,
+            'pdf_info': job.pdf_info,
+            'created_at': job.created_at.isoformat(),
+        }
+        if job.spool_path:
+            # A size mismatch at replay means the file never reached the disk
+            record['spool_path'] = job.spool_path
+            record['size'] = os.path.getsize(job.spool_path)
+        else:
+            record['data'] = base64.b64encode(job.pdf_data).decode('ascii')
+
+        line = self._encode(record)
+        with self._lock:
+            if not self.enabled:
+                return
+            self._pending[job.id] = line
+            if job.spool_path:
+                self._unsynced.append(job.spool_path)
+            self._write(line)
+
+    def finish(self, job):
+        """Record that a job has left the server (printed or failed)"""
+        with self._lock:
+            if not self.enabled or self._pending.pop(job.id, None) is None:
+                return
+            self._write(self._encode({'op': 'done', 'job_id': job.id}))
+
+    def sync(self):
+        """fsync the spool files of new jobs, then the journal"""
+        with self._lock:
+            if not self._dirty:
+                return
+            paths, self._unsynced = self._unsynced, []
+            self._dirty = False
+        for path in paths:
+            _fsync_path(path)
+        with self._lock:
+            if self._file:
+                os.fsync(self._file.fileno())
+                if self._size > self.max_size:
+                    self._compact()
+
+    def close(self):
+        """Stop the fsync thread and flush everything to disk"""
+        if not self.enabled:
+            return
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join(self.fsync_interval * 10)
+        self.sync()
+        with self._lock:
+            self.enabled = False
+            self._file.close()
+            self._file = None
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except OSError as e:
+                logger.error("Print journal sync failed: {}".format(e))
+
+    def _write(self, line: bytes):
+        # Unbuffered: the line reaches the OS before the request returns
+        self._file.write(line)
+        self._size += len(line)
+        self._dirty = True
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def _acquire(self) -> bool:
+        """Lock <journal>.lock so only one server process uses the journal"""
+        self._lock_file = open(self.path + '.lock', 'a+b')
+        try:
+            if fcntl:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    def _load(self) -> List[Dict[str, Any]]:
+        """Unfinished, deduplicated jobs of the journal left by the last run"""
+        if not os.path.exists(self.path):
+            return []
+
+        accepted: Dict[str, Dict[str, Any]] = {}
+        with open(self.path, 'rb') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn last line of a crash
+                    continue
+                if record.get('op') == 'accept':
+                    accepted[record['job_id']] = record
+                elif record.get('op') == 'done':
+                    accepted.pop(record.get('job_id'), None)
+
+        records, keys = [], set()
+        for record in accepted.values():
+            spool_path = record.get('spool_path')
+            if spool_path:
+                try:
+                    complete = os.path.getsize(spool_path) == record.get('size')
+                except OSError:
+                    complete = False
+                if not complete:
+                    logger.warning("Dropping journaled job {}: spool file {} is missing or "
+                                   "incomplete".format(record['job_id'], spool_path))
+                    remove_spool_file(spool_path)
+                    continue
+            key = record.get('idempotency_key')
+            if key and key in keys:
+                if spool_path:
+                    remove_spool_file(spool_path)
+                continue
+            if key:
+                keys.add(key)
+            records.append(record)
+        return records
+
+    def _compact(self):
+        """Rewrite the journal with only the unfinished jobs (lock held or not yet shared)"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as temp:
+            for line in self._pending.values():
+                temp.write(line)
+            temp.flush()
+            os.fsync(temp.fileno())
+        # Windows cannot replace a file that is still open
+        if self._file:
+            self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'ab', buffering=0)
+        self._size = self._file.tell()
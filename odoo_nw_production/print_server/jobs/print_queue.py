@@ -0,0 +1,372 @@
+"""
+Print Job Queue
+Bounded in-process job queue that drains print jobs per printer with a worker pool.
+"""
+import base64
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import config
+from utils import (
+    log_print_job, log_error, remove_spool_file, logger,
+    PRINT_JOBS, PRINT_BYTES, PRINT_STAGE_SECONDS, PRINT_ERRORS
+)
+from .journal import PrintJournal
+from .registry import JobRegistry
+from .scheduler import FairQueue, DEFAULT_PRIORITY
+
+
+class QueueFullError(Exception):
+    """Raised when a printer queue cannot accept another job"""
+    pass
+
+
+class PrintJob:
+    """A single print job travelling through the queue"""
+
+    def __init__(self, printer_name: str, pdf_data: Optional[bytes] = None,
+                 report_type: str = 'unknown', order_id: str = 'unknown',
+                 printer_alias: Optional[str] = None, pdf_info: Optional[dict] = None,
+                 spool_path: Optional[str] = None, raw: bool = False,
+                 priority: str = DEFAULT_PRIORITY, client_id: str = 'unknown',
+                 idempotency_key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.printer_name = printer_name
+        self.printer_alias = printer_alias or printer_name
+        # Document is either in memory (pdf_data) or in a spool file (spool_path)
+        self.pdf_data = pdf_data
+        self.spool_path = spool_path
+        # pdf_data holds printer-ready bytes (e.g. ESC/POS) for print_raw()
+        self.raw = raw
+        # Scheduling: priority level and the terminal/user that sent the job
+        self.priority = priority
+        self.client_id = client_id
+        # Key the sender (Odoo) uses to avoid printing a resent job twice
+        self.idempotency_key = idempotency_key
+        self.pdf_info = pdf_info or {}
+        self.report_type = report_type
+        self.order_id = order_id
+        self.status = 'queued'
+        self.printer_job_id = None
+        self.printer_state = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.updated_at = self.created_at
+        self.finished_at = None
+        # Seconds spent in each stage on the server (queue_wait, submit)
+        self.timings: Dict[str, float] = {}
+        self.submitted = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize job for API responses"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'printer': self.printer_name,
+            'printer_alias': self.printer_alias,
+            'report_type': self.report_type,
+            'order_id': self.order_id,
+            'priority': self.priority,
+            'client_id': self.client_id,
+            'printer_job_id': self.printer_job_id,
+            'printer_state': self.printer_state,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class PrintJobQueue:
+    """
+    Per-printer fair queues drained by a pool of worker threads.
+
+    Each printer gets its own bounded queue and its own workers, so a slow
+    device never delays jobs for another printer, and the worker count caps
+    how many jobs are in flight on a device at once. Jobs leave the queue
+    by priority, then round-robin across clients (see FairBuffer); one
+    client's jobs are submitted in the order they arrived.
+
+    With a ``journal``, accepted jobs are recorded until the printer has
+    taken them, and ``replay()`` queues the ones a previous run left
+    unfinished.
+    """
+
+    def __init__(self, printer_handler, workers_per_printer: int = None,
+                 max_queue_size: int = None, registry: JobRegistry = None,
+                 journal: PrintJournal = None):
+        self.printer_handler = printer_handler
+        self.registry = registry or JobRegistry(printer_handler, db_path='')
+        self.journal = journal
+        self.workers_per_printer = workers_per_printer or config.PRINT_WORKERS_PER_PRINTER
+        self.max_queue_size = max_queue_size or config.PRINT_QUEUE_SIZE
+        self._queues: Dict[str, FairQueue] = {}
+        self._workers: Dict[str, List[threading.Thread]] = {}
+        self._lock = threading.Lock()
+        self._running = True
+
+    def submit(self, job: PrintJob) -> PrintJob:
+        """
+        Add a job to its printer queue.
+
+        Args:
+            job: Job to enqueue
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the printer queue is full or the queue is stopped
+        """
+        if not self._running:
+            raise QueueFullError('Print queue is shutting down')
+
+        printer_queue = self._get_queue(job.printer_name)
+        if self.journal:
+            self.journal.accept(job)
+        self.registry.add(job)
+        try:
+            printer_queue.put_nowait(job)
+        except queue.Full:
+            self.registry.set_status(job, 'failed', error='Queue full')
+            if self.journal:
+                self.journal.finish(job)
+            raise QueueFullError(
+                'Print queue for {} is full ({} jobs)'.format(job.printer_name, self.max_queue_size)
+            )
+        return job
+
+    def replay(self) -> List[PrintJob]:
+        """
+        Queue the jobs a previous run accepted but never finished.
+
+        Replayed jobs keep their job ID, so status lookups still work. They
+        are queued even if a printer has more of them than its queue holds
+        (new submissions get QueueFullError until it drains), so startup
+        never waits for a printer.
+
+        Returns:
+            The replayed jobs
+        """
+        if not self.journal:
+            return []
+        jobs = [self._restore(record) for record in self.journal.open()]
+        for job in jobs:
+            self.registry.add(job)
+            self._get_queue(job.printer_name).put_unbounded(job)
+        return jobs
+
+    @staticmethod
+    def _restore(record: Dict[str, Any]) -> PrintJob:
+        """Rebuild a job from its journal record"""
+        job = PrintJob(
+            record['printer'],
+            pdf_data=base64.b64decode(record['data']) if 'data' in record else None,
+            report_type=record.get('report_type', 'unknown'),
+            order_id=record.get('order_id', 'unknown'),
+            printer_alias=record.get('printer_alias'),
+            pdf_info=record.get('pdf_info'),
+            spool_path=record.get('spool_path'),
+            raw=record.get('raw', False),
+            priority=record.get('priority', DEFAULT_PRIORITY),
+            client_id=record.get('client_id', 'unknown'),
+            idempotency_key=record.get('idempotency_key')
+        )
+        job.id = record['job_id']
+        job.created_at = job.updated_at = datetime.fromisoformat(record['created_at'])
+        return job
+
+    def depths(self) -> Dict[str, int]:
+        """Number of jobs waiting per printer"""
+        return {name: q.qsize() for name, q in list(self._queues.items())}
+
+    def depth(self, printer_name: str = None) -> int:
+        """Number of jobs waiting, for one printer or across all printers"""
+        if printer_name is not None:
+            printer_queue = self._queues.get(printer_name)
+            return printer_queue.qsize() if printer_queue else 0
+        return sum(q.qsize() for q in self._queues.values())
+
+    def shutdown(self, timeout: float = None):
+        """
+        Stop accepting jobs and wait for workers to drain their queues.
+
+        Args:
+            timeout: Seconds to wait for each worker (None waits forever)
+        """
+        self._running = False
+        with self._lock:
+            for printer_name, workers in self._workers.items():
+                for _ in workers:
+                    self._queues[printer_name].put_unbounded(None)
+            all_workers = [w for workers in self._workers.values() for w in workers]
+        for worker in all_workers:
+            worker.join(timeout)
+        # Jobs still waiting stay in the journal for the next start
+        if self.journal:
+            self.journal.close()
+
+    def _get_queue(self, printer_name: str) -> FairQueue:
+        """Get the queue for a printer, starting its workers on first use"""
+        printer_queue = self._queues.get(printer_name)
+        if printer_queue is not None:
+            return printer_queue
+
+        with self._lock:
+            if printer_name not in self._queues:
+                self._queues[printer_name] = FairQueue(maxsize=self.max_queue_size)
+                workers = []
+                for index in range(self._worker_count(printer_name)):
+                    worker = threading.Thread(
+                        target=self._worker_loop,
+                        args=(printer_name,),
+                        name='print-worker-{}-{}'.format(printer_name, index),
+                        daemon=True
+                    )
+                    worker.start()
+                    workers.append(worker)
+                self._workers[printer_name] = workers
+            return self._queues[printer_name]
+
+    def _worker_count(self, printer_name: str) -> int:
+        """Workers configured for a printer (falls back to the global default)"""
+        for printer in config.PRINTERS.values():
+            if printer['name'] == printer_name and printer.get('workers'):
+                return printer['workers']
+        return self.workers_per_printer
+
+    def _worker_loop(self, printer_name: str):
+        """Drain one printer queue until a stop sentinel is received"""
+        printer_queue = self._queues[printer_name]
+        batch_size = getattr(self.printer_handler, 'batch_size', 1)
+        while True:
+            batch = [printer_queue.get()]
+            # Handlers that print several files per call take whatever else
+            # is already waiting, up to their batch size
+            while batch[-1] is not None and len(batch) < batch_size:
+                try:
+                    batch.append(printer_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._process_jobs([job for job in batch if job is not None])
+                if batch[-1] is None:
+                    return
+            finally:
+                for _ in batch:
+                    printer_queue.task_done()
+
+    def _process_jobs(self, jobs: List[PrintJob]):
+        """Process jobs taken from one printer queue together"""
+        if len(jobs) == 1 or any(not job.spool_path for job in jobs):
+            for job in jobs:
+                self._process(job)
+        elif jobs:
+            self._process_batch(jobs)
+
+    def _process(self, job: PrintJob):
+        """Send a job to the printer and record the outcome"""
+        self._start(job)
+        try:
+            # Not retried here: a failed submission may still have printed,
+            # so the sender retries with its idempotency key instead
+            started = time.perf_counter()
+            with PRINT_STAGE_SECONDS.time(stage='submit'):
+                if job.raw:
+                    size = len(job.pdf_data)
+                    printer_job_id = self.printer_handler.print_raw(job.printer_name, job.pdf_data)
+                elif job.spool_path:
+                    size = os.path.getsize(job.spool_path)
+                    printer_job_id = self.printer_handler.print_file(job.printer_name, job.spool_path)
+                else:
+                    size = len(job.pdf_data)
+                    printer_job_id = self.printer_handler.print_pdf(job.printer_name, job.pdf_data)
+            job.timings['submit'] = time.perf_counter() - started
+            self._submitted(job, printer_job_id, size)
+        except Exception as e:
+            self._failed(job, e)
+        finally:
+            self._finish(job)
+
+    def _process_batch(self, jobs: List[PrintJob]):
+        """Send several spooled jobs for one printer in a single handler call"""
+        for job in jobs:
+            self._start(job)
+        try:
+            sizes = [os.path.getsize(job.spool_path) for job in jobs]
+            started = time.perf_counter()
+            with PRINT_STAGE_SECONDS.time(stage='submit'):
+                printer_job_ids = self.printer_handler.print_files(
+                    jobs[0].printer_name, [job.spool_path for job in jobs]
+                )
+            submit_seconds = time.perf_counter() - started
+            for job, printer_job_id, size in zip(jobs, printer_job_ids, sizes):
+                job.timings['submit'] = submit_seconds
+                self._submitted(job, printer_job_id, size)
+        except Exception as e:
+            for job in jobs:
+                self._failed(job, e)
+        finally:
+            for job in jobs:
+                self._finish(job)
+
+    def _start(self, job: PrintJob):
+        job.timings['queue_wait'] = (datetime.now() - job.created_at).total_seconds()
+        PRINT_STAGE_SECONDS.observe(job.timings['queue_wait'], stage='queue_wait')
+        self.registry.set_status(job, 'spooling')
+
+    def _submitted(self, job: PrintJob, printer_job_id: str, size: int):
+        # Handlers that can report spooler state keep the job in 'printing'
+        # until the registry poller sees it complete
+        status = 'printing' if self.printer_handler.tracks_jobs else 'done'
+        self.registry.set_status(job, status, printer_job_id=printer_job_id)
+        PRINT_JOBS.inc(printer=job.printer_name, report_type=job.report_type, status='submitted')
+        PRINT_BYTES.inc(size, printer=job.printer_name)
+        log_print_job(logger, {
+            'job_id': job.id,
+            'printer_job_id': job.printer_job_id,
+            'printer': job.printer_name,
+            'report_type': job.report_type,
+            'order_id': job.order_id,
+            'client_id': job.client_id,
+            'priority': job.priority,
+            'size': size,
+            'size_kb': job.pdf_info.get('size_kb', 0),
+            'timings_ms': self._timings(job)
+        })
+
+    def _failed(self, job: PrintJob, error: Exception):
+        self.registry.set_status(job, 'failed', error=str(error))
+        PRINT_JOBS.inc(printer=job.printer_name, report_type=job.report_type, status='failed')
+        PRINT_ERRORS.inc(cause='print_failed')
+        # The printer may have gone offline or been removed
+        self.printer_handler.inventory.invalidate()
+        log_error(logger, {
+            'job_id': job.id,
+            'printer': job.printer_name,
+            'report_type': job.report_type,
+            'error': str(error),
+            'order_id': job.order_id,
+            'timings_ms': self._timings(job)
+        })
+
+    @staticmethod
+    def _timings(job: PrintJob) -> Dict[str, float]:
+        """Stage timings of a job in milliseconds, plus the total since it was accepted"""
+        timings = {stage: round(seconds * 1000, 1) for stage, seconds in job.timings.items()}
+        timings['total'] = round((datetime.now() - job.created_at).total_seconds() * 1000, 1)
+        return timings
+
+    def _finish(self, job: PrintJob):
+        # Free the PDF as soon as it has been handed to the printer
+        job.pdf_data = None
+        if self.journal:
+            self.journal.finish(job)
+        if job.spool_path:
+            remove_spool_file(job.spool_path)
+        job.submitted.set()
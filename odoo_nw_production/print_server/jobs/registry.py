@@ -0,0 +1,210 @@
+"""
+Print Job Registry
+Tracks the lifecycle of print jobs in memory, with optional SQLite persistence.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import config
+from utils import logger, PRINT_ERRORS
+
+# Job lifecycle states
+JOB_STATES = ('queued', 'spooling', 'printing', 'done', 'failed')
+FINAL_STATES = ('done', 'failed')
+
+
+class JobRegistry:
+    """
+    Registry of recent print jobs.
+
+    Jobs are kept in memory (bounded to the most recent ``max_jobs``) and,
+    when ``db_path`` is set, mirrored to a SQLite table so their status
+    survives eviction and restarts. For printer handlers that can report
+    spooler state, jobs in ``printing`` are polled in the background with a
+    single batched query per poll. A job the spooler no longer reports
+    (purged from its history) is marked done with printer state
+    ``unknown`` once it has been missing for ``missing_grace`` seconds.
+    """
+
+    def __init__(self, printer_handler=None, db_path: str = None,
+                 max_jobs: int = None, poll_interval: float = None,
+                 missing_grace: float = None):
+        self.printer_handler = printer_handler
+        self.db_path = db_path if db_path is not None else config.JOB_DB_PATH
+        self.max_jobs = max_jobs or config.JOB_HISTORY_SIZE
+        self.poll_interval = poll_interval or config.JOB_POLL_INTERVAL
+        self.missing_grace = config.JOB_MISSING_GRACE if missing_grace is None else missing_grace
+        self._jobs = OrderedDict()
+        self._lock = threading.RLock()
+        self._db = None
+        self._poller = None
+        self._stop = threading.Event()
+        # printer job ID -> monotonic time it was first missing from a poll
+        self._missing: Dict[str, float] = {}
+
+        if self.db_path:
+            self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS print_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    printer TEXT,
+                    printer_alias TEXT,
+                    report_type TEXT,
+                    order_id TEXT,
+                    printer_job_id TEXT,
+                    printer_state TEXT,
+                    error TEXT,
+                    created_at TEXT,
+                    updated_at TEXT,
+                    finished_at TEXT
+                )
+                """
+            )
+            self._db.commit()
+
+    def add(self, job):
+        """Register a new job"""
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+            self._persist(job)
+
+    def set_status(self, job, status: str, **values):
+        """
+        Move a job to a new lifecycle state.
+
+        Args:
+            job: Job to update
+            status: One of JOB_STATES
+            **values: Extra job attributes to set (printer_job_id, error, ...)
+        """
+        if status not in JOB_STATES:
+            raise ValueError('Unknown job status: {}'.format(status))
+        with self._lock:
+            for key, value in values.items():
+                setattr(job, key, value)
+            job.status = status
+            job.updated_at = datetime.now()
+            if status in FINAL_STATES:
+                job.finished_at = job.updated_at
+            self._persist(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get job information.
+
+        Args:
+            job_id: Print server job ID
+
+        Returns:
+            Job dictionary, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+            if self._db is None:
+                return None
+            row = self._db.execute(
+                'SELECT * FROM print_jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+            return dict(row) if row else None
+
+    def start_polling(self):
+        """Start the background thread that refreshes spooler state"""
+        if self._poller or not getattr(self.printer_handler, 'tracks_jobs', False):
+            return
+        self._poller = threading.Thread(
+            target=self._poll_loop, name='job-status-poller', daemon=True
+        )
+        self._poller.start()
+
+    def stop_polling(self):
+        """Stop the background poller"""
+        self._stop.set()
+        if self._poller:
+            self._poller.join(self.poll_interval * 2)
+            self._poller = None
+
+    def poll(self):
+        """Refresh all jobs waiting in the printer spooler with one query"""
+        with self._lock:
+            pending = {
+                job.printer_job_id: job for job in self._jobs.values()
+                if job.status == 'printing' and job.printer_job_id
+            }
+        if not pending:
+            return
+
+        try:
+            states = self.printer_handler.get_jobs_status(list(pending))
+        except Exception as e:
+            logger.warning("Job status poll failed: {}".format(e))
+            PRINT_ERRORS.inc(cause='status_poll_failed')
+            return
+
+        for printer_job_id, (status, printer_state) in states.items():
+            job = pending.get(printer_job_id)
+            if job is None:
+                continue
+            if status != job.status or printer_state != job.printer_state:
+                error = None
+                if status == 'failed':
+                    error = 'Printer job {}'.format(printer_state)
+                    PRINT_ERRORS.inc(cause='printer_job_{}'.format(printer_state))
+                self.set_status(job, status, printer_state=printer_state, error=error)
+
+        now = time.monotonic()
+        for printer_job_id, job in pending.items():
+            if printer_job_id in states:
+                self._missing.pop(printer_job_id, None)
+                continue
+            missing_since = self._missing.setdefault(printer_job_id, now)
+            if now - missing_since >= self.missing_grace:
+                del self._missing[printer_job_id]
+                logger.info("Printer job {} of job {} is no longer in the spooler; "
+                            "assuming it printed".format(printer_job_id, job.id))
+                self.set_status(job, 'done', printer_state='unknown')
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self.poll()
+
+    def _evict(self):
+        """Drop the oldest finished jobs once the registry is over capacity"""
+        overflow = len(self._jobs) - self.max_jobs
+        if overflow <= 0:
+            return
+        for job_id in list(self._jobs):
+            if overflow <= 0:
+                break
+            if self._jobs[job_id].status in FINAL_STATES:
+                del self._jobs[job_id]
+                overflow -= 1
+
+    def _persist(self, job):
+        if self._db is None:
+            return
+        data = job.to_dict()
+        self._db.execute(
+            """
+            INSERT OR REPLACE INTO print_jobs (
+                job_id, status, printer, printer_alias, report_type, order_id,
+                printer_job_id, printer_state, error, created_at, updated_at, finished_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                data['job_id'], data['status'], data['printer'], data['printer_alias'],
+                data['report_type'], data['order_id'], data['printer_job_id'],
+                data['printer_state'], data['error'], data['created_at'],
+                data['updated_at'], data['finished_at']
+            )
+        )
+        self._db.commit()
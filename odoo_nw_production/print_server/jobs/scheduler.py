@@ -0,0 +1,98 @@
+"""
+Fair Print Scheduling
+Priority levels and per-client round-robin ordering for the printer queues.
+"""
+import asyncio
+import queue
+from collections import OrderedDict, deque
+
+# Job priorities accepted by the API, highest first
+PRIORITIES = ('high', 'normal', 'low')
+DEFAULT_PRIORITY = 'normal'
+
+
+class FairBuffer:
+    """
+    Deque-like job buffer that hands out jobs fairly.
+
+    Jobs are taken from the highest priority that has any. Within a
+    priority, clients (Odoo users / terminals) take turns one job at a time,
+    so a terminal reprinting a hundred invoices does not hold up the
+    receipts queued by the others. Stop sentinels (None) come out only
+    after every job.
+
+    Used as the storage of ``queue.Queue`` and ``asyncio.Queue``, which only
+    call append(), popleft() and len() on it.
+    """
+
+    def __init__(self):
+        # priority -> client_id -> jobs; dict order is the round-robin order
+        self._levels = {priority: OrderedDict() for priority in PRIORITIES}
+        self._jobs = 0
+        self._stops = 0
+
+    def __len__(self) -> int:
+        return self._jobs + self._stops
+
+    def append(self, job):
+        if job is None:
+            self._stops += 1
+            return
+        clients = self._levels.get(job.priority, self._levels[DEFAULT_PRIORITY])
+        clients.setdefault(job.client_id, deque()).append(job)
+        self._jobs += 1
+
+    def popleft(self):
+        for clients in self._levels.values():
+            if clients:
+                client_id, jobs = next(iter(clients.items()))
+                job = jobs.popleft()
+                if jobs:
+                    # Client goes to the back of the rotation
+                    clients.move_to_end(client_id)
+                else:
+                    del clients[client_id]
+                self._jobs -= 1
+                return job
+        if self._stops:
+            self._stops -= 1
+            return None
+        raise IndexError('pop from an empty FairBuffer')
+
+    def clear(self):
+        for clients in self._levels.values():
+            clients.clear()
+        self._jobs = self._stops = 0
+
+
+class FairQueue(queue.Queue):
+    """Thread-safe bounded queue with fair ordering (see FairBuffer)"""
+
+    def _init(self, maxsize):
+        self.queue = FairBuffer()
+
+    def put_unbounded(self, item):
+        """
+        Add an item without waiting, even if the queue is full.
+
+        For stop sentinels and jobs replayed at startup, which must not wait
+        for workers to make room; only new submissions are bounded.
+        """
+        with self.not_full:
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class AsyncFairQueue(asyncio.Queue):
+    """asyncio bounded queue with fair ordering (see FairBuffer)"""
+
+    def _init(self, maxsize):
+        self._queue = FairBuffer()
+
+    def put_unbounded(self, item):
+        """Add an item without waiting, even if the queue is full (see FairQueue.put_unbounded)"""
+        self._put(item)
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next(self._getters)
@@ -0,0 +1,588 @@
+# -*- coding: utf-8 -*-
+"""
+Print Service
+Request handling shared by the Flask and aiohttp front ends: validation, spooling, rendering and submission of print jobs.
+"""
+import json
+import traceback
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import config
+from printers import get_printer_handler, render_document
+from jobs import (
+    PrintJob, PrintJobQueue, PrintJournal, QueueFullError, JobRegistry, IdempotencyCache,
+    PRIORITIES, DEFAULT_PRIORITY, MAX_KEY_LENGTH
+)
+from utils import (
+    get_pdf_file_info, spool_base64_to_file, remove_spool_file, log_error, logger,
+    render_metrics, PRINT_STAGE_SECONDS, PRINT_QUEUE_DEPTH, PRINT_ERRORS
+)
+
+# (body, status, headers) of every print endpoint while no printer handler could be created
+NOT_INITIALIZED = ({'error': 'Printer handler not initialized'}, 500, None)
+
+
+class RequestError(Exception):
+    """
+    A request (or batch document) that cannot be queued.
+
+    Carries the HTTP status, the cause counted in PRINT_ERRORS and extra
+    fields of the JSON error body.
+    """
+
+    def __init__(self, error: str, status: int = 400, cause: str = 'invalid_request', **details):
+        super().__init__(error)
+        self.error = error
+        self.status = status
+        self.cause = cause
+        self.details = details
+
+    def response(self) -> Tuple[Dict[str, Any], int, None]:
+        """Count the error and build its (body, status, headers) response"""
+        PRINT_ERRORS.inc(cause=self.cause)
+        return dict({'error': self.error}, **self.details), self.status, None
+
+
+def resolve_printer(printer_name: str) -> str:
+    """Map a printer alias (PrinterA/PrinterB) to the actual printer name"""
+    printer_mapping = {
+        'PrinterA': config.PRINTER_A_NAME,
+        'PrinterB': config.PRINTER_B_NAME
+    }
+    return printer_mapping.get(printer_name, printer_name)
+
+
+def request_defaults(headers: Mapping, remote_addr: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    Scheduling values a request sets for the documents that do not send their own.
+
+    Args:
+        headers: Request headers (case-insensitive mapping)
+        remote_addr: Caller address, the client ID when X-Client-Id is not sent
+
+    Returns:
+        Dict with client_id, priority and idempotency_key (None when not sent)
+    """
+    return {
+        'client_id': headers.get('X-Client-Id') or remote_addr,
+        'priority': headers.get('X-Print-Priority'),
+        'idempotency_key': headers.get('Idempotency-Key'),
+    }
+
+
+def job_fields(data: Mapping, defaults: Mapping) -> Dict[str, Any]:
+    """
+    PrintJob fields of a request or batch entry.
+
+    Values sent with the document win over the request defaults (see
+    request_defaults); the client ID falls back to 'unknown'.
+
+    Args:
+        data: Document metadata (printer, report_type, order_id, priority,
+            client_id, idempotency_key)
+        defaults: Request defaults
+
+    Returns:
+        Keyword arguments for PrintJob
+
+    Raises:
+        RequestError: If the printer is missing, the priority unknown or
+            the idempotency key too long
+    """
+    printer_name = data.get('printer')
+    if not printer_name:
+        raise RequestError('Missing required field: printer')
+    priority = data.get('priority') or defaults.get('priority') or DEFAULT_PRIORITY
+    if priority not in PRIORITIES:
+        raise RequestError('Invalid priority: {} (expected {})'.format(priority, ', '.join(PRIORITIES)))
+    idempotency_key = data.get('idempotency_key') or defaults.get('idempotency_key')
+    if idempotency_key and len(idempotency_key) > MAX_KEY_LENGTH:
+        raise RequestError('Idempotency key is longer than {} characters'.format(MAX_KEY_LENGTH))
+    return {
+        'printer_name': resolve_printer(printer_name),
+        'printer_alias': printer_name,
+        'report_type': data.get('report_type') or 'unknown',
+        'order_id': data.get('order_id') or 'unknown',
+        'client_id': data.get('client_id') or defaults.get('client_id') or 'unknown',
+        'priority': priority,
+        'idempotency_key': idempotency_key or None,
+    }
+
+
+def _json_object(data) -> Dict[str, Any]:
+    """The JSON body of a request, which must be a non-empty object"""
+    if not isinstance(data, dict) or not data:
+        raise RequestError('No JSON data provided')
+    return data
+
+
+def remove_spool_files(spool_paths: List[Any]):
+    """Delete the spool files of a list that may also hold spooling errors"""
+    for spool_path in spool_paths:
+        if isinstance(spool_path, str):
+            remove_spool_file(spool_path)
+
+
+class PrintService:
+    """
+    Printer handler, job registry, print queue and idempotency cache of
+    one server process, and the request handling both front ends share.
+
+    ``prepare_*``, ``check_*`` and the ``*_job`` builders validate, spool
+    and render documents and may block (disk, printer enumeration, PDF
+    parsing); the async front end runs them in an executor. Only
+    ``remember``, ``submit``, ``queue_job`` and ``queue_batch_entry`` touch
+    the queue: they never block and are called on the event loop there.
+    """
+
+    def __init__(self):
+        # Initialize printer handler (auto-detects OS)
+        self.init_error = None
+        try:
+            self.printer_handler = get_printer_handler()
+            self.printer_handler.inventory.start()
+            logger.info("Print Server initialized successfully")
+        except Exception as e:
+            self.init_error = str(e)
+            logger.error("Failed to initialize printer handler: {}".format(e))
+            self.printer_handler = None
+
+        # Job registry and print job queue (workers start lazily per printer)
+        self.job_registry = JobRegistry(self.printer_handler)
+        self.job_registry.start_polling()
+        self.job_queue = (
+            self._create_queue(PrintJournal() if config.JOURNAL_PATH else None)
+            if self.printer_handler else None
+        )
+        self.idempotency_cache = IdempotencyCache()
+
+    def _create_queue(self, journal: Optional[PrintJournal]) -> PrintJobQueue:
+        return PrintJobQueue(self.printer_handler, registry=self.job_registry, journal=journal)
+
+    # Read-only endpoints
+
+    def health(self) -> Dict[str, Any]:
+        """Health check body (never touches printers)"""
+        return {
+            'status': 'ok',
+            'timestamp': datetime.now().isoformat(),
+            'mock_mode': config.MOCK_MODE,
+            'printer_handler': self.printer_handler.__class__.__name__ if self.printer_handler else None,
+            'init_error': self.init_error
+        }
+
+    def printers(self, refresh: bool = False) -> Tuple[Dict[str, Any], int, None]:
+        """
+        Printer list from the inventory cache, re-enumerated first if refresh.
+
+        Returns:
+            (body, status, headers)
+        """
+        if not self.printer_handler:
+            return {
+                'success': False,
+                'error': f'Printer handler not initialized: {self.init_error}'
+            }, 200, None
+
+        try:
+            inventory = self.printer_handler.inventory
+            if refresh:
+                inventory.refresh()
+            printers = inventory.get_printers()
+            return {
+                'success': True,
+                'printers': printers,
+                'count': len(printers)
+            }, 200, None
+        except Exception as e:
+            logger.error("Error getting printers: {}".format(e))
+            return {
+                'success': False,
+                'error': str(e)
+            }, 200, None
+
+    def job_status(self, job_id: str) -> Tuple[Dict[str, Any], int, None]:
+        """Status of a print job: queued, spooling, printing, done or failed"""
+        job = self.job_registry.get(job_id)
+        if job is None:
+            return {
+                'job_id': job_id,
+                'error': 'Job not found'
+            }, 404, None
+        return job, 200, None
+
+    def metrics(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        if self.job_queue:
+            for printer_name, depth in self.job_queue.depths().items():
+                PRINT_QUEUE_DEPTH.set(depth, printer=printer_name)
+        return render_metrics()
+
+    # Building jobs (may block)
+
+    def check_printer(self, fields: Dict[str, Any]):
+        """
+        Check the printer of a job exists (timed as the 'validate' stage).
+
+        Raises:
+            RequestError: 404 with the available printers
+        """
+        with PRINT_STAGE_SECONDS.time(stage='validate'):
+            found = self.printer_handler.validate_printer(fields['printer_name'])
+        if not found:
+            raise RequestError(
+                'Printer not found: {}'.format(fields['printer_name']), status=404,
+                cause='printer_not_found',
+                available_printers=[p['name'] for p in self.printer_handler.inventory.get_printers()]
+            )
+
+    def spooled_job(self, fields: Dict[str, Any], spool_path: str) -> PrintJob:
+        """Job printing a spooled PDF"""
+        return PrintJob(spool_path=spool_path, pdf_info=get_pdf_file_info(spool_path), **fields)
+
+    def spool_upload(self, stream) -> str:
+        """
+        Spool an uploaded PDF stream (timed as the 'spool' stage).
+
+        Raises:
+            ValueError: If the stream is empty or not a PDF
+        """
+        with PRINT_STAGE_SECONDS.time(stage='spool'):
+            return self.printer_handler.spool_stream(stream)
+
+    def decoded_job(self, fields: Dict[str, Any], pdf_base64: Optional[str]) -> PrintJob:
+        """
+        Decode base64 PDF data in chunks straight into a spool file (validates the header).
+
+        Raises:
+            RequestError: If the data is missing or not a base64 PDF
+        """
+        if not pdf_base64:
+            raise RequestError('Missing required field: pdf_data')
+        try:
+            with PRINT_STAGE_SECONDS.time(stage='decode'):
+                spool_path = spool_base64_to_file(pdf_base64)
+        except ValueError as e:
+            raise RequestError('Invalid PDF data: {}'.format(e), cause='invalid_pdf')
+        return self.spooled_job(fields, spool_path)
+
+    def rendered_job(self, fields: Dict[str, Any], document_format: str, document) -> PrintJob:
+        """
+        Render document data to printer-ready bytes (timed as the 'render' stage).
+
+        Returns:
+            PrintJob sent to the printer unchanged with print_raw()
+
+        Raises:
+            RequestError: If the format is unknown or the document is malformed
+        """
+        try:
+            with PRINT_STAGE_SECONDS.time(stage='render'):
+                data = render_document(document_format, document)
+        except ValueError as e:
+            raise RequestError('Invalid document: {}'.format(e), cause='invalid_document')
+        return PrintJob(
+            pdf_data=data,
+            raw=True,
+            pdf_info={'format': document_format, 'size': len(data), 'size_kb': round(len(data) / 1024, 2)},
+            **fields
+        )
+
+    def prepare_pdf(self, data, defaults: Mapping) -> PrintJob:
+        """
+        Job of a /api/print request: base64 PDF in a JSON body.
+
+        Raises:
+            RequestError: If the request is invalid
+        """
+        data = _json_object(data)
+        fields = job_fields(data, defaults)
+        if not data.get('pdf_data'):
+            raise RequestError('Missing required field: pdf_data')
+        self.check_printer(fields)
+        return self.decoded_job(fields, data['pdf_data'])
+
+    def prepare_document(self, data, defaults: Mapping) -> PrintJob:
+        """
+        Job of a /api/print/document request: document data rendered here.
+
+        Raises:
+            RequestError: If the request is invalid
+        """
+        data = _json_object(data)
+        fields = job_fields(data, defaults)
+        if not data.get('format'):
+            raise RequestError('Missing required field: format')
+        if not data.get('document'):
+            raise RequestError('Missing required field: document')
+        self.check_printer(fields)
+        return self.rendered_job(fields, data['format'], data['document'])
+
+    def check_upload(self, data: Mapping, defaults: Mapping) -> Dict[str, Any]:
+        """
+        Job fields of a /api/print/raw request, checked before its body is spooled.
+
+        Raises:
+            RequestError: If the metadata is invalid or the printer unknown
+        """
+        fields = job_fields(data, defaults)
+        self.check_printer(fields)
+        return fields
+
+    # Batches
+
+    @staticmethod
+    def check_batch_size(count: int):
+        """Raises RequestError if a batch has more than MAX_BATCH_DOCUMENTS documents"""
+        if count > config.MAX_BATCH_DOCUMENTS:
+            raise RequestError('Too many documents in batch (max {})'.format(config.MAX_BATCH_DOCUMENTS))
+
+    def batch_documents(self, data) -> List[Tuple[Any, None]]:
+        """
+        Entries of a JSON batch body: {"documents": [...]}.
+
+        Returns:
+            (document, None) per entry, see prepare_batch_entry
+
+        Raises:
+            RequestError: If the body is not a list of documents
+        """
+        data = _json_object(data)
+        documents = data.get('documents')
+        if not isinstance(documents, list) or not documents:
+            raise RequestError('Missing required field: documents')
+        self.check_batch_size(len(documents))
+        return [(document, None) for document in documents]
+
+    def batch_uploads(self, documents_json: Optional[str], spooled: List[Any]) -> List[Tuple[Any, Any]]:
+        """
+        Entries of a multipart batch: the "documents" field and the spooled files.
+
+        A single entry applies to every file. Entries that are not objects
+        fail on their own when queued, so their files are removed here; every
+        other file is owned by its entry from now on.
+
+        Args:
+            documents_json: JSON list sent in the "documents" field
+            spooled: Spool path (or the ValueError raised while spooling)
+                of each "file" part, in order
+
+        Returns:
+            (document, spooled file) per entry, see prepare_batch_entry
+
+        Raises:
+            RequestError: If there are no files, the field is not a JSON
+                list or its length does not match the files (the caller
+                still owns the files then)
+        """
+        if not spooled:
+            raise RequestError('Missing required file part: file')
+        try:
+            documents = json.loads(documents_json or '[]')
+        except ValueError:
+            raise RequestError('Invalid JSON in field: documents')
+        if not isinstance(documents, list):
+            raise RequestError('Field documents must be a list')
+        if len(documents) == 1:
+            documents = documents * len(spooled)
+        if len(documents) != len(spooled):
+            raise RequestError('Got {} files but {} document entries'.format(len(spooled), len(documents)))
+        self.check_batch_size(len(documents))
+
+        entries = list(zip(documents, spooled))
+        remove_spool_files([spool_path for document, spool_path in entries if not isinstance(document, dict)])
+        return entries
+
+    def prepare_batch_entry(self, document, defaults: Mapping, spooled=None):
+        """
+        Validate, spool or render one document of a batch.
+
+        The Idempotency-Key header does not apply to batch entries.
+
+        Args:
+            document: Dict with printer, report_type, order_id and either
+                pdf_data (base64) or format + document (a multipart entry
+                only sends the metadata)
+            defaults: Request defaults
+            spooled: Spool path of the entry's uploaded file, or the
+                ValueError raised while spooling it (removed if the entry fails)
+
+        Returns:
+            PrintJob to queue, or the failed result dict for the batch response
+        """
+        if not isinstance(document, dict):
+            return {'success': False, 'error': 'Document entry must be an object'}
+
+        try:
+            if isinstance(spooled, ValueError):
+                raise RequestError('Invalid PDF data: {}'.format(spooled), cause='invalid_pdf')
+            fields = job_fields(document, dict(defaults, idempotency_key=None))
+            self.check_printer(fields)
+            if spooled is not None:
+                return self.spooled_job(fields, spooled)
+            if document.get('format'):
+                return self.rendered_job(fields, document['format'], document.get('document'))
+            return self.decoded_job(fields, document.get('pdf_data'))
+        except RequestError as e:
+            PRINT_ERRORS.inc(cause=e.cause)
+            if isinstance(spooled, str):
+                remove_spool_file(spooled)
+            return {
+                'success': False,
+                'error': e.error,
+                'printer': document.get('printer'),
+                'order_id': document.get('order_id', 'unknown')
+            }
+
+    def queue_batch_entry(self, entry) -> Dict[str, Any]:
+        """Submit a prepared batch entry (see prepare_batch_entry) and return its result"""
+        if isinstance(entry, dict):
+            return entry
+        result, _ = self.submit(entry)
+        return result
+
+    @staticmethod
+    def batch_response(results: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], int, Optional[Dict[str, str]]]:
+        """
+        Response of a batch: 202 if any document was queued, 429 with
+        Retry-After if none was because the queues are full, otherwise 400.
+        """
+        queued = sum(1 for result in results if result['success'])
+        status, headers = 202, None
+        if not queued:
+            status = 400
+            if any(result.get('retry_after') for result in results):
+                status, headers = 429, {'Retry-After': str(config.PRINT_RETRY_AFTER)}
+        return {
+            'success': queued == len(results),
+            'queued': queued,
+            'failed': len(results) - queued,
+            'results': results,
+            'timestamp': datetime.now().isoformat()
+        }, status, headers
+
+    # Submitting jobs (never blocks)
+
+    def remember(self, jobs: List[PrintJob]):
+        """
+        Store the idempotency keys of jobs replayed from the journal, so a
+        resend of one after a restart returns it instead of printing twice.
+        """
+        for job in jobs:
+            if job.idempotency_key:
+                self.idempotency_cache.put(job.idempotency_key, self._job_result(job))
+
+    def submit(self, job: PrintJob) -> Tuple[Dict[str, Any], int]:
+        """
+        Submit a job to the print queue, once per idempotency key.
+
+        The key is reserved in the idempotency cache before the job is
+        queued (and released if the queue is full). A job whose key is
+        already known is not queued: the result of the original job is
+        returned (with its current status and "duplicate": true).
+
+        Args:
+            job: PrintJob to queue
+
+        Returns:
+            Tuple (result dict, HTTP status code): 202 when queued (or already
+            queued under the same idempotency key), 429 if the queue is full
+        """
+        reserved = None
+        if job.idempotency_key:
+            reserved = self._job_result(job)
+            original = self.idempotency_cache.reserve(job.idempotency_key, reserved)
+            if original is not None:
+                if job.spool_path:
+                    remove_spool_file(job.spool_path)
+                current = self.job_registry.get(original['job_id'])
+                return dict(
+                    original,
+                    status=current['status'] if current else original['status'],
+                    duplicate=True,
+                    queue_depth=self.job_queue.depth(original['printer'])
+                ), 202
+
+        result, status_code = self._enqueue(job)
+        if reserved is not None and status_code != 202:
+            self.idempotency_cache.release(job.idempotency_key, reserved)
+        return result, status_code
+
+    @staticmethod
+    def _job_result(job: PrintJob) -> Dict[str, Any]:
+        """Result of a queued job, as returned to its sender"""
+        return {
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'printer': job.printer_name,
+            'printer_alias': job.printer_alias,
+            'report_type': job.report_type,
+            'order_id': job.order_id,
+            'priority': job.priority,
+            'duplicate': False,
+            'pdf_info': job.pdf_info
+        }
+
+    def _enqueue(self, job: PrintJob) -> Tuple[Dict[str, Any], int]:
+        """Queue a job and build its result (see submit)"""
+        status = self.printer_handler.get_cached_printer_status(job.printer_name)
+        if status not in ['ready']:
+            logger.warning("Printer {} status: {}".format(job.printer_name, status))
+
+        try:
+            self.job_queue.submit(job)
+        except QueueFullError as e:
+            PRINT_ERRORS.inc(cause='queue_full')
+            if job.spool_path:
+                remove_spool_file(job.spool_path)
+            return {
+                'success': False,
+                'error': str(e),
+                'printer': job.printer_name,
+                'order_id': job.order_id,
+                'retry_after': config.PRINT_RETRY_AFTER
+            }, 429
+
+        return dict(self._job_result(job), queue_depth=self.job_queue.depth(job.printer_name)), 202
+
+    def queue_job(self, job: PrintJob) -> Tuple[Dict[str, Any], int, Optional[Dict[str, str]]]:
+        """
+        Submit a job and build the API response.
+
+        Returns:
+            (body, status, headers): 202 Accepted, or 429 with Retry-After
+            if the queue is full
+        """
+        result, status_code = self.submit(job)
+        if not result['success']:
+            result = {'success': False, 'error': result['error'], 'retry_after': result['retry_after']}
+        result['timestamp'] = datetime.now().isoformat()
+        headers = {'Retry-After': str(config.PRINT_RETRY_AFTER)} if status_code == 429 else None
+        return result, status_code, headers
+
+    @staticmethod
+    def error_response(error: Exception, data=None) -> Tuple[Dict[str, Any], int, None]:
+        """
+        Log an unexpected print error and build the 500 response.
+
+        Args:
+            error: The exception (call from its except block for the traceback)
+            data: Request metadata with printer and order_id, if known
+        """
+        data = data if isinstance(data, Mapping) else {}
+        PRINT_ERRORS.inc(cause='server_error')
+        log_error(logger, {
+            'printer': data.get('printer') or 'unknown',
+            'error': str(error),
+            'order_id': data.get('order_id') or 'unknown'
+        })
+
+        logger.error("Print error: {}".format(traceback.format_exc()))
+
+        return {
+            'success': False,
+            'error': str(error),
+            'timestamp': datetime.now().isoformat()
+        }, 500, None
@@ -5,6 +5,7 @@ Auto-detects OS and returns the appropriate printer handler.
 import platform
 from .base import BasePrinter
 import config
+from utils import logger
 
 
 def get_printer_handler() -> BasePrinter:
@@ -12,7 +13,7 @@ def get_printer_handler() -> BasePrinter:
     Factory function to get the appropriate printer handler based on OS.
     
     Returns:
-        BasePrinter: Printer handler instance (Mock, Windows, or Linux)
+        BasePrinter: Printer handler instance (Mock, Command, Windows, or Linux)
         
     Raises:
         NotImplementedError: If OS is not supported
@@ -20,26 +21,32 @@ def get_printer_handler() -> BasePrinter:
     # Check if mock mode is enabled
     if config.MOCK_MODE:
         from .mock_printer import MockPrinter
-        print("🧪 Using Mock Printer (MOCK_MODE=True)")
+        logger.info("Using Mock Printer (MOCK_MODE=True)")
         return MockPrinter()
     
+    # External command backend works on any OS
+    if config.PRINTER_BACKEND == 'command':
+        from .command_printer import CommandPrinter
+        logger.info("Using External Command Printer (PRINTER_BACKEND=command)")
+        return CommandPrinter()
+    
     # Detect OS and return appropriate handler
     os_type = platform.system()
     
     if os_type == 'Windows':
         from .windows_printer import WindowsPrinter
-        print("🪟 Detected Windows - Using Windows Printer Handler")
+        logger.info("Detected Windows - Using Windows Printer Handler")
         return WindowsPrinter()
     
     elif os_type == 'Linux':
         from .linux_printer import LinuxPrinter
-        print("🐧 Detected Linux - Using CUPS Printer Handler")
+        logger.info("Detected Linux - Using CUPS Printer Handler")
         return LinuxPrinter()
     
     elif os_type == 'Darwin':  # macOS
         # macOS also uses CUPS
         from .linux_printer import LinuxPrinter
-        print("🍎 Detected macOS - Using CUPS Printer Handler")
+        logger.info("Detected macOS - Using CUPS Printer Handler")
         return LinuxPrinter()
     
     else:
@@ -50,12 +57,47 @@ def get_printer_handler() -> BasePrinter:
         )
 
 
+def render_document(document_format: str, document: dict) -> bytes:
+    """
+    Render structured document data to printer-ready bytes.
+    
+    Args:
+        document_format: Output format ('escpos' or 'escp')
+        document: Document data sent by Odoo
+        
+    Returns:
+        Bytes to send to the printer with print_raw()
+        
+    Raises:
+        ValueError: If the format is unknown or the document is malformed
+    """
+    renderer = DOCUMENT_RENDERERS.get(document_format)
+    if renderer is None:
+        raise ValueError(
+            f"Unsupported document format: {document_format} "
+            f"(supported: {', '.join(sorted(DOCUMENT_RENDERERS))})"
+        )
+    return renderer(document)
+
+
 # Export all printer classes
 from .base import BasePrinter
+from .inventory import PrinterInventory
 from .mock_printer import MockPrinter
+from .escpos import render_receipt
+from .escp import render_invoice
+
+# Renderers for documents sent as data instead of PDF
+DOCUMENT_RENDERERS = {
+    'escpos': render_receipt,  # Thermal receipt (cash bill)
+    'escp': render_invoice,  # Dot matrix invoice/delivery
+}
 
 __all__ = [
     'get_printer_handler',
+    'render_document',
     'BasePrinter',
-    'MockPrinter'
+    'PrinterInventory',
+    'MockPrinter',
+    'DOCUMENT_RENDERERS'
 ]
@@ -2,13 +2,37 @@
 Base Printer Abstract Class
 Defines the interface that all printer implementations must follow.
 """
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, BinaryIO
+
+from .inventory import PrinterInventory
+from utils import spool_to_file, remove_spool_file
+
+_inventory_lock = threading.Lock()
 
 
 class BasePrinter(ABC):
     """Abstract base class for printer implementations"""
     
+    # True if get_jobs_status() can report spooler state for submitted jobs
+    tracks_jobs = False
+    
+    # Files print_files() can send in one call; the job queue batches
+    # waiting jobs up to this size
+    batch_size = 1
+    
+    _inventory = None
+    
+    @property
+    def inventory(self) -> PrinterInventory:
+        """Cached printer list shared by lookups on the print path"""
+        if self._inventory is None:
+            with _inventory_lock:
+                if self._inventory is None:
+                    self._inventory = PrinterInventory(self.get_printers)
+        return self._inventory
+    
     @abstractmethod
     def get_printers(self) -> List[Dict[str, Any]]:
         """
@@ -43,6 +67,100 @@ class BasePrinter(ABC):
         """
         pass
     
+    def print_file(self, printer_name: str, file_path: str) -> str:
+        """
+        Send a PDF file on disk to printer.
+        
+        The default implementation reads the file and calls print_pdf();
+        handlers that can print straight from a path should override it.
+        The file is owned by the caller and is not deleted.
+        
+        Args:
+            printer_name: Name of the printer to use
+            file_path: Path of the PDF file
+            
+        Returns:
+            Job ID as string
+        """
+        with open(file_path, 'rb') as pdf_file:
+            return self.print_pdf(printer_name, pdf_file.read())
+    
+    def print_files(self, printer_name: str, file_paths: List[str]) -> List[str]:
+        """
+        Send several PDF files on disk to a printer.
+        
+        The default implementation calls print_file() for each file;
+        handlers that can submit many files at once should override it and
+        set batch_size.
+        
+        Args:
+            printer_name: Name of the printer to use
+            file_paths: Paths of the PDF files (owned by the caller)
+            
+        Returns:
+            Job ID for each file, in order
+        """
+        return [self.print_file(printer_name, file_path) for file_path in file_paths]
+    
+    def print_raw(self, printer_name: str, data: bytes) -> str:
+        """
+        Send printer-ready bytes (e.g. ESC/POS) to a printer unchanged.
+        
+        Bypasses PDF rasterization by the OS driver; used for documents
+        rendered by render_document().
+        
+        Args:
+            printer_name: Name of the printer to use
+            data: Printer command stream
+            
+        Returns:
+            Job ID as string
+            
+        Raises:
+            NotImplementedError: If the handler cannot send raw data
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support raw printing"
+        )
+    
+    def spool_stream(self, fileobj: BinaryIO) -> str:
+        """
+        Read a PDF stream in chunks into a spool file.
+        
+        Only the first chunk is validated, so the document is never held
+        in memory as a whole.
+        
+        Args:
+            fileobj: Readable binary stream (e.g. the HTTP request body)
+            
+        Returns:
+            Path of the spool file (owned by the caller)
+            
+        Raises:
+            ValueError: If the stream is not a PDF
+        """
+        return spool_to_file(fileobj)
+    
+    def print_stream(self, printer_name: str, fileobj: BinaryIO) -> str:
+        """
+        Print a PDF read from a stream.
+        
+        The stream is spooled to disk in chunks and the spool file path is
+        handed to print_file(); the spool file is removed afterwards.
+        
+        Args:
+            printer_name: Name of the printer to use
+            fileobj: Readable binary stream
+            
+        Returns:
+            Job ID as string
+        """
+        spool_path = self.spool_stream(fileobj)
+        try:
+            return self.print_file(printer_name, spool_path)
+        finally:
+            remove_spool_file(spool_path)
+    
     @abstractmethod
     def get_printer_status(self, printer_name: str) -> str:
         """
@@ -60,11 +178,40 @@ class BasePrinter(ABC):
         """
         Validate if printer exists and is available.
         
+        Uses the cached printer inventory, so this does not enumerate
+        printers while the cache is fresh.
+        
         Args:
             printer_name: Name of the printer to validate
             
         Returns:
             True if printer is available, False otherwise
         """
-        printers = self.get_printers()
-        return any(p['name'] == printer_name for p in printers)
+        return self.inventory.get(printer_name) is not None
+    
+    def get_cached_printer_status(self, printer_name: str) -> str:
+        """
+        Get printer status from the cached inventory.
+        
+        Args:
+            printer_name: Name of the printer
+            
+        Returns:
+            Status string: 'ready', 'offline', 'error', 'not_found'
+        """
+        return self.inventory.get_status(printer_name)
+    
+    def get_jobs_status(self, job_ids: List[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        Get spooler state for several submitted jobs at once.
+        
+        Args:
+            job_ids: Job IDs as returned by print_pdf()
+            
+        Returns:
+            Dictionary mapping job ID to (status, printer_state), where status
+            is 'printing', 'done' or 'failed'. Jobs the spooler no longer
+            knows about are omitted (JobRegistry marks them done after
+            JOB_MISSING_GRACE seconds).
+        """
+        return {}
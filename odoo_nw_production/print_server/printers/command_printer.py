@@ -0,0 +1,179 @@
+"""
+External Command Printer Implementation
+Prints by running a configurable command (SumatraPDF, lp, a script, ...) on any OS.
+"""
+import os
+import platform
+import shlex
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+from typing import List, Dict, Any
+
+from .base import BasePrinter
+from utils import logger, write_spool_file, remove_spool_file
+import config
+
+# SumatraPDF install locations probed once for the default Windows command
+SUMATRA_PATHS = [
+    r"C:\Program Files\SumatraPDF\SumatraPDF.exe",
+    r"C:\Program Files (x86)\SumatraPDF\SumatraPDF.exe",
+    os.path.expandvars(r"%LOCALAPPDATA%\SumatraPDF\SumatraPDF.exe")
+]
+
+
+class CommandPrinter(BasePrinter):
+    """
+    Printer backend that hands spool files to an external command.
+
+    The command template may use ``{printer}`` and either ``{file}`` (one
+    file per run) or ``{files}`` (every file as its own argument). With
+    ``{files}`` the job queue passes several waiting jobs to one run, so
+    the tool's start-up cost is paid once per batch instead of per receipt.
+
+    The executable is resolved once when the handler is created. Each run
+    has a timeout (per file, capped at ``max_timeout`` for a batch), and a
+    bounded number of runs may be active at once per printer, so a stuck
+    printer never holds up the others.
+    """
+
+    def __init__(self, command: str = None, timeout: float = None, batch_size: int = None,
+                 max_processes: int = None, printer_names: List[str] = None,
+                 max_timeout: float = None):
+        template = command or config.PRINT_COMMAND or self._default_command()
+        self.argv = self._parse(template)
+
+        executable = self.argv[0]
+        resolved = shutil.which(executable) or (executable if os.path.isfile(executable) else None)
+        if not resolved:
+            raise FileNotFoundError("Print command not found: {}".format(executable))
+        self.argv[0] = resolved
+
+        if '{files}' in self.argv:
+            self.batch_size = max(1, batch_size or config.PRINT_COMMAND_BATCH_SIZE)
+        elif any('{file}' in arg for arg in self.argv):
+            self.batch_size = 1
+        else:
+            raise ValueError("Print command must contain {file} or {files}: " + template)
+
+        self.timeout = timeout or config.PRINT_COMMAND_TIMEOUT
+        self.max_timeout = max(self.timeout, max_timeout or config.PRINT_COMMAND_MAX_TIMEOUT)
+        self.max_processes = max_processes or config.PRINT_COMMAND_MAX_PROCESSES
+        # printer name -> semaphore bounding that printer's concurrent runs
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+        self.printer_names = printer_names or config.PRINT_COMMAND_PRINTERS
+        logger.info(f"Command Printer Handler initialized: {' '.join(self.argv)}")
+
+    @staticmethod
+    def _default_command() -> str:
+        """SumatraPDF on Windows, lp elsewhere"""
+        if platform.system() == 'Windows':
+            for sumatra_path in SUMATRA_PATHS:
+                if os.path.exists(sumatra_path):
+                    return '"{}" -print-to {{printer}} -silent {{files}}'.format(sumatra_path)
+            raise FileNotFoundError(
+                "SumatraPDF not found. Install it from https://www.sumatrapdfreader.org/ "
+                "or set PRINT_COMMAND."
+            )
+        return 'lp -d {printer} {files}'
+
+    @staticmethod
+    def _parse(template: str) -> List[str]:
+        """Split the command template into arguments"""
+        if os.name == 'nt':
+            # Keep Windows backslashes; only strip the quotes around paths
+            return [arg.strip('"') for arg in shlex.split(template, posix=False)]
+        return shlex.split(template)
+
+    def _build_argv(self, printer_name: str, file_paths: List[str]) -> List[str]:
+        argv = []
+        for arg in self.argv:
+            if arg == '{files}':
+                argv.extend(file_paths)
+            else:
+                argv.append(arg.replace('{printer}', printer_name).replace('{file}', file_paths[0]))
+        return argv
+
+    def get_printers(self) -> List[Dict[str, Any]]:
+        """Configured printers (an external command cannot enumerate them)"""
+        types = {p['name']: p.get('type', 'unknown') for p in config.PRINTERS.values()}
+        return [
+            {
+                'name': name,
+                'status': 'ready',
+                'type': types.get(name, 'unknown'),
+                'description': 'External command printer'
+            }
+            for name in self.printer_names
+        ]
+
+    def print_pdf(self, printer_name: str, pdf_data: bytes) -> str:
+        """Write the PDF to a spool file and print it with print_file()"""
+        spool_path = write_spool_file(pdf_data)
+        try:
+            return self.print_file(printer_name, spool_path)
+        finally:
+            remove_spool_file(spool_path)
+
+    def print_file(self, printer_name: str, file_path: str) -> str:
+        """Print one PDF file on disk"""
+        return self.print_files(printer_name, [file_path])[0]
+
+    def print_files(self, printer_name: str, file_paths: List[str]) -> List[str]:
+        """
+        Print several PDF files with as few command runs as possible.
+
+        Files are passed in groups of batch_size. Returns once the command
+        has exited successfully, so the caller can delete the files.
+
+        Raises:
+            Exception: If the command fails or times out
+        """
+        job_ids = []
+        for start in range(0, len(file_paths), self.batch_size):
+            group = file_paths[start:start + self.batch_size]
+            job_id = self._run(printer_name, group)
+            job_ids.extend([job_id] * len(group))
+        return job_ids
+
+    def _printer_slots(self, printer_name: str) -> threading.BoundedSemaphore:
+        """Semaphore limiting concurrent runs for one printer"""
+        with self._slots_lock:
+            slots = self._slots.get(printer_name)
+            if slots is None:
+                slots = self._slots[printer_name] = threading.BoundedSemaphore(self.max_processes)
+            return slots
+
+    def _run(self, printer_name: str, file_paths: List[str]) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        job_id = f"cmd_{timestamp}"
+        argv = self._build_argv(printer_name, file_paths)
+        timeout = min(self.timeout * len(file_paths), self.max_timeout)
+
+        with self._printer_slots(printer_name):
+            try:
+                result = subprocess.run(
+                    argv,
+                    stdin=subprocess.DEVNULL,
+                    capture_output=True,
+                    timeout=timeout,
+                    # No console window per run on Windows
+                    creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+                )
+            except subprocess.TimeoutExpired:
+                raise Exception("Print command timed out after {:g}s".format(timeout))
+
+        if result.returncode != 0:
+            output = (result.stderr or result.stdout or b'').decode(errors='replace').strip()
+            raise Exception("Print command failed (exit {}): {}".format(result.returncode, output))
+
+        logger.debug(f"Command Print Job: {job_id}", extra={
+            'printer_job_id': job_id, 'printer': printer_name, 'files': len(file_paths)
+        })
+        return job_id
+
+    def get_printer_status(self, printer_name: str) -> str:
+        """Configured printers are assumed ready"""
+        return 'ready' if printer_name in self.printer_names else 'not_found'
@@ -0,0 +1,161 @@
+"""
+ESC/P Invoice Renderer
+Renders the invoice/delivery layout as fixed-width ESC/P text for dot matrix printers (Thai character table).
+"""
+from typing import Dict, Any
+
+from .escpos import text_width, wrap_text, pad_text, format_quantity, header_entries
+import config
+
+ESC = b'\x1b'
+
+INIT = ESC + b'@'
+BOLD_ON = ESC + b'E'
+BOLD_OFF = ESC + b'F'
+DOUBLE_WIDTH_ON = ESC + b'W\x01'
+DOUBLE_WIDTH_OFF = ESC + b'W\x00'
+FORM_FEED = b'\x0c'
+
+# Item table columns (name takes what is left of the line), as in the PDF
+SEQ_WIDTH = 6
+QTY_WIDTH = 8
+UNIT_WIDTH = 8
+AMOUNT_WIDTH = 14
+
+
+def _select_character_table(table: int) -> bytes:
+    """Assign a registered character table (e.g. Thai) to table 1 and select it"""
+    return ESC + b'(t' + bytes([3, 0, 1, table, 0]) + ESC + b't\x01'
+
+
+class PageWriter:
+    """Accumulates ESC/P commands and text encoded for the printer character table"""
+
+    def __init__(self, width: int = None, encoding: str = None, character_table: int = None):
+        self.width = width or config.ESCP_WIDTH
+        self.encoding = encoding or config.ESCP_ENCODING
+        table = config.ESCP_CHARACTER_TABLE if character_table is None else character_table
+        self.buffer = bytearray(INIT + _select_character_table(table))
+
+    def command(self, *commands: bytes):
+        for command in commands:
+            self.buffer += command
+
+    def text(self, text: str):
+        self.buffer += text.encode(self.encoding, errors='replace')
+
+    def line(self, text: str = ''):
+        # CR LF: some dot matrix printers do not return the carriage on LF
+        self.text(text)
+        self.buffer += b'\r\n'
+
+    def rule(self, char: str = '-'):
+        self.line(char * self.width)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+
+def _columns(*cells) -> str:
+    """Join (text, width, align) cells into one fixed-width line"""
+    return ''.join(pad_text(text, width, align) for text, width, align in cells)
+
+
+def render_invoice(document: Dict[str, Any], width: int = None) -> bytes:
+    """
+    Render an invoice/delivery document to ESC/P bytes.
+
+    Follows the PDF layout page by page: the same fixed number of item
+    rows per page (empty rows stay blank), the page number and copy label
+    on every page, and the total on the last page of each set. Each page
+    ends with a form feed.
+
+    Expected document:
+    {
+        "title": "บิลเงินสด / ใบส่งของ",
+        "header": [["วันที่", "..."], ["เลขที่", "..."], ["ลูกค้า", "..."]],
+        "print_time": "10:30",
+        "pages": [{"lines": [{"seq": 1, "name": ..., "qty": ..., "unit": ...,
+                              "sub_total": ...}, null, ...],
+                   "is_last": true, "page_no": 1, "total_pages": 1,
+                   "copy_label": "ต้นฉบับ"}],
+        "total": "1,250.00"
+    }
+
+    Args:
+        document: Invoice data (JSON object)
+        width: Characters per line (default ESCP_WIDTH)
+
+    Returns:
+        ESC/P command stream
+
+    Raises:
+        ValueError: If the document is malformed
+    """
+    if not isinstance(document, dict):
+        raise ValueError('Document must be an object')
+    pages = document.get('pages')
+    if not isinstance(pages, list) or not pages:
+        raise ValueError('Document has no pages')
+
+    header_pairs = header_entries(document)
+
+    writer = PageWriter(width)
+    name_width = writer.width - SEQ_WIDTH - QTY_WIDTH - UNIT_WIDTH - AMOUNT_WIDTH
+
+    for page in pages:
+        if not isinstance(page, dict):
+            raise ValueError('Document page must be an object')
+
+        page_no = '{}/{}'.format(page.get('page_no', 1), page.get('total_pages', 1))
+        title = str(document.get('title') or '')
+        # Double width: the title takes twice its width in columns
+        title_columns = (writer.width - text_width(page_no)) // 2
+        writer.command(BOLD_ON, DOUBLE_WIDTH_ON)
+        writer.text(pad_text(title, title_columns, 'center'))
+        writer.command(DOUBLE_WIDTH_OFF, BOLD_OFF)
+        writer.line(pad_text(page_no, writer.width - title_columns * 2, 'right'))
+        if page.get('copy_label'):
+            writer.line(pad_text('"{}"'.format(page['copy_label']), writer.width, 'center'))
+
+        writer.rule('=')
+        header = [
+            wrap_text('{}: {}'.format(label, value if value not in (None, False) else ''), writer.width)[0]
+            for label, value in header_pairs
+        ]
+        if document.get('print_time'):
+            time_text = 'เวลา: {}'.format(document['print_time'])
+            first = header[0] if header else ''
+            header[:1] = [pad_text(first, writer.width - text_width(time_text)) + time_text]
+        for text in header:
+            writer.line(text)
+        writer.rule('=')
+
+        writer.line(_columns(
+            ('ลำดับ', SEQ_WIDTH, 'center'), ('ชื่อสินค้า', name_width, 'left'),
+            ('จำนวน', QTY_WIDTH, 'center'), ('หน่วย', UNIT_WIDTH, 'center'),
+            ('จำนวนเงิน', AMOUNT_WIDTH, 'right'),
+        ))
+        writer.rule()
+        for item in page.get('lines') or []:
+            if not item:
+                # Keep the page height fixed, as the bordered rows of the PDF
+                writer.line()
+                continue
+            writer.line(_columns(
+                (str(item.get('seq', '')), SEQ_WIDTH, 'center'),
+                (wrap_text(str(item.get('name') or ''), name_width - 1)[0], name_width, 'left'),
+                (format_quantity(item.get('qty')), QTY_WIDTH, 'center'),
+                (str(item.get('unit') or ''), UNIT_WIDTH, 'center'),
+                (str(item.get('sub_total', '')), AMOUNT_WIDTH, 'right'),
+            ))
+        writer.rule()
+
+        if page.get('is_last', True) and document.get('total'):
+            writer.command(BOLD_ON)
+            writer.line(pad_text('ผลรวม  {}'.format(document['total']), writer.width, 'right'))
+            writer.command(BOLD_OFF)
+
+        writer.command(FORM_FEED)
+
+    return writer.getvalue()
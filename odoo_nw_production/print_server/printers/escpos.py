@@ -0,0 +1,190 @@
+"""
+ESC/POS Receipt Renderer
+Renders receipt data (e.g. the cash bill) straight to ESC/POS text-mode commands for thermal printers.
+"""
+import unicodedata
+from typing import List, Dict, Any, Tuple
+
+import config
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+INIT = ESC + b'@'
+ALIGN_LEFT = ESC + b'a\x00'
+ALIGN_CENTER = ESC + b'a\x01'
+ALIGN_RIGHT = ESC + b'a\x02'
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+DOUBLE_HEIGHT = GS + b'!\x01'
+NORMAL_SIZE = GS + b'!\x00'
+FEED_AND_CUT = GS + b'V\x42\x00'  # feed to the cutter, then partial cut
+
+# Item table columns: name takes what is left of the line
+QTY_WIDTH = 7
+AMOUNT_WIDTH = 12
+
+
+def text_width(text: str) -> int:
+    """Printed columns of a string (Thai vowel and tone marks take none)"""
+    return sum(1 for ch in text if unicodedata.category(ch) != 'Mn')
+
+
+def wrap_text(text: str, width: int) -> List[str]:
+    """Split text into lines of at most width columns, keeping marks with their base"""
+    lines, current, columns = [], '', 0
+    for ch in text:
+        spacing = unicodedata.category(ch) != 'Mn'
+        if spacing and columns == width:
+            lines.append(current)
+            current, columns = '', 0
+        current += ch
+        columns += spacing
+    lines.append(current)
+    return lines
+
+
+def pad_text(text: str, width: int, align: str = 'left') -> str:
+    """Pad text to width printed columns ('left', 'right' or 'center' aligned)"""
+    padding = ' ' * max(0, width - text_width(text))
+    if align == 'right':
+        return padding + text
+    if align == 'center':
+        left = len(padding) // 2
+        return padding[:left] + text + padding[left:]
+    return text + padding
+
+
+def format_quantity(value) -> str:
+    """Quantity without a trailing .0 (2.0 -> '2', 1.5 -> '1.5')"""
+    if isinstance(value, float):
+        return '{:g}'.format(value)
+    return '' if value is None else str(value)
+
+
+def header_entries(document: Dict[str, Any]) -> List[Tuple[Any, Any]]:
+    """
+    The (label, value) pairs of a document's "header" list.
+
+    Raises:
+        ValueError: If the header is not a list of [label, value] pairs
+    """
+    header = document.get('header') or []
+    if not isinstance(header, list):
+        raise ValueError('Document header must be a list')
+    for entry in header:
+        if not isinstance(entry, (list, tuple)) or len(entry) != 2:
+            raise ValueError('Document header entry must be a [label, value] pair')
+    return [tuple(entry) for entry in header]
+
+
+class ReceiptWriter:
+    """Accumulates ESC/POS commands and text encoded for the printer code page"""
+
+    def __init__(self, width: int = None, encoding: str = None, codepage: int = None):
+        self.width = width or config.ESCPOS_WIDTH
+        self.encoding = encoding or config.ESCPOS_ENCODING
+        codepage = config.ESCPOS_CODEPAGE if codepage is None else codepage
+        self.buffer = bytearray(INIT + ESC + b't' + bytes([codepage]))
+
+    def command(self, *commands: bytes):
+        for command in commands:
+            self.buffer += command
+
+    def line(self, text: str = ''):
+        self.buffer += text.encode(self.encoding, errors='replace') + b'\n'
+
+    def wrapped(self, text: str):
+        for part in wrap_text(text, self.width):
+            self.line(part)
+
+    def rule(self):
+        self.line('-' * self.width)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+
+def render_receipt(document: Dict[str, Any], width: int = None) -> bytes:
+    """
+    Render a receipt document to ESC/POS bytes.
+
+    Each page is printed as its own receipt and cut, so an original and a
+    copy come out as two slips. Only the last page of a set gets the total
+    and footer, as in the PDF report.
+
+    Expected document:
+    {
+        "title": "บิลเงินสด / CASH BILL",
+        "header": [["นามลูกค้า", "..."], ["เลขที่", "..."]],
+        "pages": [{"lines": [{"name": ..., "qty": ..., "sub_total": ...}],
+                   "is_last": true, "copy_label": "ต้นฉบับ"}],
+        "total": "1,250.00 ฿",
+        "footer": "ขอบคุณที่ใช้บริการ"
+    }
+
+    Args:
+        document: Receipt data (JSON object)
+        width: Characters per line (default ESCPOS_WIDTH)
+
+    Returns:
+        ESC/POS command stream
+
+    Raises:
+        ValueError: If the document is malformed
+    """
+    if not isinstance(document, dict):
+        raise ValueError('Document must be an object')
+    pages = document.get('pages')
+    if not isinstance(pages, list) or not pages:
+        raise ValueError('Document has no pages')
+
+    header = header_entries(document)
+
+    writer = ReceiptWriter(width)
+    name_width = writer.width - QTY_WIDTH - AMOUNT_WIDTH
+
+    for page in pages:
+        if not isinstance(page, dict):
+            raise ValueError('Document page must be an object')
+
+        if document.get('title'):
+            writer.command(ALIGN_CENTER, BOLD_ON, DOUBLE_HEIGHT)
+            writer.wrapped(str(document['title']))
+            writer.command(NORMAL_SIZE, BOLD_OFF)
+
+        writer.command(ALIGN_LEFT)
+        for label, value in header:
+            writer.wrapped('{}: {}'.format(label, value if value not in (None, False) else ''))
+        writer.rule()
+
+        writer.line(
+            pad_text('รายการ', name_width) + pad_text('จำนวน', QTY_WIDTH, 'center')
+            + pad_text('จำนวนเงิน', AMOUNT_WIDTH, 'right')
+        )
+        for item in page.get('lines') or []:
+            if not item:
+                continue
+            name_lines = wrap_text(str(item.get('name') or ''), name_width - 1)
+            writer.line(
+                pad_text(name_lines[0], name_width)
+                + pad_text(format_quantity(item.get('qty')), QTY_WIDTH, 'center')
+                + pad_text(str(item.get('sub_total', '')), AMOUNT_WIDTH, 'right')
+            )
+            for rest in name_lines[1:]:
+                writer.line(rest)
+        writer.rule()
+
+        if page.get('is_last', True):
+            if document.get('total'):
+                writer.command(BOLD_ON)
+                writer.line(pad_text('รวมเป็นเงิน: {}'.format(document['total']), writer.width, 'right'))
+                writer.command(BOLD_OFF)
+            if document.get('footer'):
+                writer.line()
+                writer.command(ALIGN_CENTER)
+                writer.wrapped(str(document['footer']))
+
+        writer.command(ALIGN_LEFT, b'\n' * 3, FEED_AND_CUT)
+
+    return writer.getvalue()
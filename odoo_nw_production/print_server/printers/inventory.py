@@ -0,0 +1,120 @@
+"""
+Printer Inventory Cache
+Keeps the printer list in memory so the print path does dictionary lookups
+instead of enumerating printers on every request.
+"""
+import threading
+import time
+from typing import Callable, List, Dict, Any, Optional
+
+import config
+from utils import logger, PRINTER_ENUMERATION_SECONDS, PRINT_ERRORS
+
+
+class PrinterInventory:
+    """
+    Cached printer list with a TTL and optional background refresh.
+
+    Lookups never enumerate printers while the cache is fresh. When it is
+    stale (TTL expired or invalidated) the next lookup refreshes it once;
+    concurrent callers wait for that single refresh instead of starting
+    their own. A background thread can keep the cache warm so the print
+    path normally never pays for enumeration at all.
+    """
+
+    # Minimum seconds between refreshes triggered by unknown printer names
+    MISS_REFRESH_INTERVAL = 5
+
+    def __init__(self, fetch: Callable[[], List[Dict[str, Any]]],
+                 ttl: float = None, refresh_interval: float = None):
+        self.fetch = fetch
+        self.ttl = ttl if ttl is not None else config.PRINTER_CACHE_TTL
+        self.refresh_interval = (
+            refresh_interval if refresh_interval is not None else config.PRINTER_CACHE_REFRESH
+        )
+        self._printers: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at = 0.0
+        self._expires_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get_printers(self) -> List[Dict[str, Any]]:
+        """Get the cached printer list, refreshing it if stale"""
+        self._ensure_fresh()
+        return list(self._printers.values())
+
+    def get(self, printer_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up one printer.
+
+        An unknown name triggers at most one refresh every
+        MISS_REFRESH_INTERVAL seconds, so newly installed printers are
+        picked up without letting bad names force an enumeration per request.
+        """
+        self._ensure_fresh()
+        printer = self._printers.get(printer_name)
+        if printer is None and time.monotonic() - self._loaded_at > self.MISS_REFRESH_INTERVAL:
+            self.refresh()
+            printer = self._printers.get(printer_name)
+        return printer
+
+    def get_status(self, printer_name: str) -> str:
+        """Cached printer status: 'ready', 'offline', 'error' or 'not_found'"""
+        printer = self.get(printer_name)
+        return printer.get('status', 'error') if printer else 'not_found'
+
+    def refresh(self):
+        """Re-enumerate printers now"""
+        with self._refresh_lock:
+            self._load()
+
+    def invalidate(self):
+        """Mark the cache stale (e.g. after a print failure)"""
+        self._expires_at = 0.0
+        self._wakeup.set()
+
+    def start(self):
+        """Start the background refresh thread (no-op if disabled)"""
+        if self._thread or self.refresh_interval <= 0:
+            return
+        self._thread = threading.Thread(
+            target=self._refresh_loop, name='printer-inventory', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(5)
+            self._thread = None
+
+    def _ensure_fresh(self):
+        if time.monotonic() < self._expires_at:
+            return
+        with self._refresh_lock:
+            # Another thread may have refreshed while we were waiting
+            if time.monotonic() < self._expires_at:
+                return
+            self._load()
+
+    def _load(self):
+        with PRINTER_ENUMERATION_SECONDS.time():
+            printers = self.fetch()
+        self._printers = {p['name']: p for p in printers}
+        self._loaded_at = time.monotonic()
+        self._expires_at = self._loaded_at + self.ttl
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the previous snapshot; retry on the next cycle
+                logger.exception("Printer inventory refresh failed")
+                PRINT_ERRORS.inc(cause='inventory_refresh')
+            self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
@@ -2,9 +2,12 @@
 Linux Printer Implementation
 Uses CUPS (Common Unix Printing System) to interact with printers.
 """
-from typing import List, Dict, Any
+import os
+import threading
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 from .base import BasePrinter
+from utils import logger, write_spool_file, remove_spool_file
 
 try:
     import cups
@@ -13,9 +16,23 @@ except ImportError:
     CUPS_AVAILABLE = False
 
 
+# CUPS job-state values mapped to (status, printer_state)
+CUPS_JOB_STATES = {
+    3: ('printing', 'pending'),
+    4: ('printing', 'held'),
+    5: ('printing', 'processing'),
+    6: ('printing', 'stopped'),
+    7: ('failed', 'canceled'),
+    8: ('failed', 'aborted'),
+    9: ('done', 'completed'),
+}
+
+
 class LinuxPrinter(BasePrinter):
     """Linux printer implementation using CUPS"""
     
+    tracks_jobs = True
+    
     def __init__(self):
         if not CUPS_AVAILABLE:
             raise ImportError(
@@ -23,7 +40,10 @@ class LinuxPrinter(BasePrinter):
             )
         try:
             self.conn = cups.Connection()
-            print("🖨️  Linux CUPS Printer Handler initialized")
+            # A CUPS connection is not thread-safe; queue workers and the
+            # job status poller share it through this lock
+            self.conn_lock = threading.Lock()
+            logger.info("Linux CUPS Printer Handler initialized")
         except Exception as e:
             raise Exception(f"Failed to connect to CUPS: {e}")
     
@@ -32,7 +52,8 @@ class LinuxPrinter(BasePrinter):
         printers = []
         
         try:
-            cups_printers = self.conn.getPrinters()
+            with self.conn_lock:
+                cups_printers = self.conn.getPrinters()
             
             for name, printer_info in cups_printers.items():
                 status = self._get_cups_status(printer_info)
@@ -46,7 +67,7 @@ class LinuxPrinter(BasePrinter):
                     'make_model': printer_info.get('printer-make-and-model', '')
                 })
         except Exception as e:
-            print(f"❌ Error enumerating CUPS printers: {e}")
+            logger.error(f"Error enumerating CUPS printers: {e}")
         
         return printers
     
@@ -61,45 +82,82 @@ class LinuxPrinter(BasePrinter):
         Returns:
             CUPS job ID as string
         """
-        import tempfile
-        import os
+        spool_path = write_spool_file(pdf_data)
+        try:
+            return self.print_file(printer_name, spool_path)
+        finally:
+            remove_spool_file(spool_path)
+    
+    def print_file(self, printer_name: str, file_path: str) -> str:
+        """
+        Print a PDF file on disk using CUPS.
         
-        # Create temporary PDF file
-        with tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix='.pdf',
-            prefix='odoo_print_'
-        ) as tmp_file:
-            tmp_file.write(pdf_data)
-            tmp_path = tmp_file.name
+        CUPS reads the file directly, so it is never loaded into memory here.
         
+        Args:
+            printer_name: Name of the CUPS printer
+            file_path: Path of the PDF file
+            
+        Returns:
+            CUPS job ID as string
+        """
         try:
             # Send print job to CUPS
-            job_id = self.conn.printFile(
-                printer_name,
-                tmp_path,
-                "Odoo Print Job",
-                {}  # Options (can add paper size, orientation, etc.)
-            )
+            with self.conn_lock:
+                job_id = self.conn.printFile(
+                    printer_name,
+                    file_path,
+                    "Odoo Print Job",
+                    {}  # Options (can add paper size, orientation, etc.)
+                )
+            
+            logger.debug(f"CUPS Print Job: {job_id}", extra={
+                'printer_job_id': str(job_id), 'printer': printer_name,
+                'file': file_path, 'size': os.path.getsize(file_path)
+            })
+            
+            return str(job_id)
+            
+        except Exception as e:
+            raise Exception(f"Failed to print via CUPS: {e}")
+    
+    def print_raw(self, printer_name: str, data: bytes) -> str:
+        """
+        Send printer-ready bytes to a CUPS queue without filtering.
+        
+        Args:
+            printer_name: Name of the CUPS printer
+            data: Printer command stream (e.g. ESC/POS)
+            
+        Returns:
+            CUPS job ID as string
+        """
+        spool_path = write_spool_file(data)
+        try:
+            with self.conn_lock:
+                job_id = self.conn.printFile(
+                    printer_name,
+                    spool_path,
+                    "Odoo Print Job",
+                    {'raw': 'true'}  # Same as lp -o raw: skip the CUPS filters
+                )
             
-            print(f"✓ CUPS Print Job: {job_id}")
-            print(f"  Printer: {printer_name}")
-            print(f"  File: {tmp_path}")
-            print(f"  Size: {len(pdf_data):,} bytes")
+            logger.debug(f"CUPS Print Job (RAW): {job_id}", extra={
+                'printer_job_id': str(job_id), 'printer': printer_name, 'size': len(data)
+            })
             
             return str(job_id)
             
         except Exception as e:
             raise Exception(f"Failed to print via CUPS: {e}")
         finally:
-            # Clean up temp file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
+            remove_spool_file(spool_path)
     
     def get_printer_status(self, printer_name: str) -> str:
         """Get CUPS printer status"""
         try:
-            printers = self.conn.getPrinters()
+            with self.conn_lock:
+                printers = self.conn.getPrinters()
             
             if printer_name not in printers:
                 return 'not_found'
@@ -108,7 +166,7 @@ class LinuxPrinter(BasePrinter):
             return self._get_cups_status(printer_info)
             
         except Exception as e:
-            print(f"❌ Error getting printer status for {printer_name}: {e}")
+            logger.warning(f"Error getting printer status for {printer_name}: {e}")
             return 'error'
     
     def _get_cups_status(self, printer_info: dict) -> str:
@@ -142,14 +200,44 @@ class LinuxPrinter(BasePrinter):
             Job information dictionary
         """
         try:
-            jobs = self.conn.getJobs()
+            with self.conn_lock:
+                jobs = self.conn.getJobs()
             if job_id in jobs:
                 return jobs[job_id]
             return None
         except Exception as e:
-            print(f"❌ Error getting job status: {e}")
+            logger.warning(f"Error getting job status: {e}")
             return None
     
+    def get_jobs_status(self, job_ids: List[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        Get state of several CUPS jobs with a single getJobs() call.
+        
+        Args:
+            job_ids: CUPS job IDs (as strings)
+            
+        Returns:
+            Dictionary mapping job ID to (status, printer_state); jobs CUPS
+            has purged from its history are omitted
+        """
+        wanted = {int(job_id) for job_id in job_ids}
+        if not wanted:
+            return {}
+        
+        with self.conn_lock:
+            jobs = self.conn.getJobs(
+                which_jobs='all',
+                first_job_id=min(wanted),
+                requested_attributes=['job-id', 'job-state']
+            )
+        
+        result = {}
+        for job_id, job_info in jobs.items():
+            if job_id in wanted:
+                state = job_info.get('job-state')
+                result[str(job_id)] = CUPS_JOB_STATES.get(state, ('printing', 'unknown'))
+        return result
+    
     def cancel_job(self, job_id: int) -> bool:
         """
         Cancel a print job.
@@ -161,9 +249,10 @@ class LinuxPrinter(BasePrinter):
             True if cancelled successfully
         """
         try:
-            self.conn.cancelJob(job_id)
-            print(f"🗑️  Cancelled print job: {job_id}")
+            with self.conn_lock:
+                self.conn.cancelJob(job_id)
+            logger.info(f"Cancelled print job: {job_id}")
             return True
         except Exception as e:
-            print(f"❌ Error cancelling job {job_id}: {e}")
+            logger.error(f"Error cancelling job {job_id}: {e}")
             return False
@@ -3,11 +3,13 @@ Mock Printer Implementation
 Used for testing without physical printers. Saves PDFs to disk instead of printing.
 """
 import os
+import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any
 from .base import BasePrinter
 import config
+from utils import logger
 
 
 class MockPrinter(BasePrinter):
@@ -16,7 +18,7 @@ class MockPrinter(BasePrinter):
     def __init__(self):
         self.output_dir = config.MOCK_OUTPUT_DIR
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        print(f"🧪 Mock Printer initialized. Output directory: {self.output_dir}")
+        logger.info(f"Mock Printer initialized. Output directory: {self.output_dir}")
     
     def get_printers(self) -> List[Dict[str, Any]]:
         """Return mock printer list"""
@@ -60,10 +62,66 @@ class MockPrinter(BasePrinter):
         
         # Log
         file_size = len(pdf_data)
-        print(f"✓ Mock Print Job: {job_id}")
-        print(f"  Printer: {printer_name}")
-        print(f"  File: {filepath}")
-        print(f"  Size: {file_size:,} bytes")
+        logger.debug(f"Mock Print Job: {job_id}", extra={
+            'printer_job_id': job_id, 'printer': printer_name,
+            'file': str(filepath), 'size': file_size
+        })
+        
+        return job_id
+    
+    def print_file(self, printer_name: str, file_path: str) -> str:
+        """
+        Copy a PDF file to the output directory instead of printing.
+        
+        Args:
+            printer_name: Name of the printer (used in filename)
+            file_path: Path of the PDF file
+            
+        Returns:
+            Job ID (timestamp-based)
+        """
+        # Generate job ID
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        job_id = f"mock_{timestamp}"
+        
+        # Create filename
+        filename = f"{printer_name}_{timestamp}.pdf"
+        filepath = self.output_dir / filename
+        
+        # Copy PDF
+        shutil.copyfile(file_path, filepath)
+        
+        # Log
+        file_size = filepath.stat().st_size
+        logger.debug(f"Mock Print Job: {job_id}", extra={
+            'printer_job_id': job_id, 'printer': printer_name,
+            'file': str(filepath), 'size': file_size
+        })
+        
+        return job_id
+    
+    def print_raw(self, printer_name: str, data: bytes) -> str:
+        """
+        Save raw printer data (e.g. ESC/POS) to a .bin file instead of printing.
+        
+        Args:
+            printer_name: Name of the printer (used in filename)
+            data: Printer command stream
+            
+        Returns:
+            Job ID (timestamp-based)
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        job_id = f"mock_{timestamp}"
+        
+        filepath = self.output_dir / f"{printer_name}_{timestamp}.bin"
+        with open(filepath, 'wb') as f:
+            f.write(data)
+        
+        logger.debug(f"Mock Print Job (RAW): {job_id}", extra={
+            'printer_job_id': job_id, 'printer': printer_name,
+            'file': str(filepath), 'size': len(data)
+        })
         
         return job_id
     
@@ -76,13 +134,14 @@ class MockPrinter(BasePrinter):
     
     def list_print_jobs(self) -> List[Dict[str, Any]]:
         """
-        List all saved print jobs (PDF files).
+        List all saved print jobs (PDF and raw .bin files).
         
         Returns:
             List of print job information
         """
         jobs = []
-        for pdf_file in sorted(self.output_dir.glob('*.pdf')):
+        saved = list(self.output_dir.glob('*.pdf')) + list(self.output_dir.glob('*.bin'))
+        for pdf_file in sorted(saved):
             stat = pdf_file.stat()
             jobs.append({
                 'filename': pdf_file.name,
@@ -100,8 +159,9 @@ class MockPrinter(BasePrinter):
             Number of files deleted
         """
         count = 0
-        for pdf_file in self.output_dir.glob('*.pdf'):
+        saved = list(self.output_dir.glob('*.pdf')) + list(self.output_dir.glob('*.bin'))
+        for pdf_file in saved:
             pdf_file.unlink()
             count += 1
-        print(f"🗑️  Cleared {count} mock print jobs")
+        logger.info(f"Cleared {count} mock print jobs")
         return count
@@ -4,9 +4,12 @@ Uses win32print to interact with Windows Print Spooler.
 """
 import tempfile
 import os
+import shutil
 from typing import List, Dict, Any
 from datetime import datetime
 from .base import BasePrinter
+from utils import logger, write_spool_file, remove_spool_file
+import config
 
 try:
     import win32print
@@ -24,7 +27,7 @@ class WindowsPrinter(BasePrinter):
             raise ImportError(
                 "win32print not available. Install with: pip install pywin32"
             )
-        print("🖨️  Windows Printer Handler initialized")
+        logger.info("Windows Printer Handler initialized")
     
     def get_printers(self) -> List[Dict[str, Any]]:
         """Get list of Windows printers"""
@@ -46,30 +49,36 @@ class WindowsPrinter(BasePrinter):
                     'description': printer_info[1] or printer_name  # Description at index 1
                 })
         except Exception as e:
-            print(f"❌ Error enumerating printers: {e}")
+            logger.error(f"Error enumerating printers: {e}")
         
         return printers
     
     def print_pdf(self, printer_name: str, pdf_data: bytes) -> str:
         """
-        Print PDF on Windows using multiple fallback methods.
+        Print PDF on Windows.
+        
+        Writes the PDF to a spool file and prints it with print_file().
+        """
+        spool_path = write_spool_file(pdf_data)
+        try:
+            return self.print_file(printer_name, spool_path)
+        finally:
+            remove_spool_file(spool_path)
+    
+    def print_file(self, printer_name: str, file_path: str) -> str:
+        """
+        Print a PDF file on Windows using multiple fallback methods.
         
         1. Try using SumatraPDF (best compatibility)
         2. Fall back to ShellExecute (requires default PDF reader)
         3. Fall back to RAW printing (limited printer support)
+        
+        The file is owned by the caller and may be deleted once this returns.
         """
         # Generate job ID
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         job_id = f"win_{timestamp}"
-        
-        # Create temporary PDF file
-        with tempfile.NamedTemporaryFile(
-            delete=False, 
-            suffix='.pdf',
-            prefix='odoo_print_'
-        ) as tmp_file:
-            tmp_file.write(pdf_data)
-            tmp_path = tmp_file.name
+        file_size = os.path.getsize(file_path)
         
         try:
             # Method 1: Try SumatraPDF (best for silent printing)
@@ -87,22 +96,31 @@ class WindowsPrinter(BasePrinter):
                             sumatra_path,
                             "-print-to", printer_name,
                             "-silent",
-                            tmp_path
+                            file_path
                         ], check=True, timeout=30)
                         
-                        print(f"✓ Windows Print Job (SumatraPDF): {job_id}")
-                        print(f"  Printer: {printer_name}")
-                        print(f"  File: {tmp_path}")
-                        print(f"  Size: {len(pdf_data):,} bytes")
+                        logger.debug(f"Windows Print Job (SumatraPDF): {job_id}", extra={
+                            'printer_job_id': job_id, 'printer': printer_name,
+                            'file': file_path, 'size': file_size
+                        })
                         
-                        # Don't delete temp file immediately
                         return job_id
                     except Exception as e:
-                        print(f"  SumatraPDF failed: {e}")
+                        logger.warning(f"SumatraPDF failed on {printer_name}: {e}")
                         break
             
             # Method 2: Try ShellExecute (requires default PDF reader)
             try:
+                # The PDF reader opens the file after ShellExecute returns,
+                # so give it its own copy that outlives the caller's file
+                with tempfile.NamedTemporaryFile(
+                    delete=False,
+                    suffix='.pdf',
+                    prefix='odoo_print_'
+                ) as tmp_file:
+                    tmp_path = tmp_file.name
+                shutil.copyfile(file_path, tmp_path)
+                
                 win32api.ShellExecute(
                     0,
                     "print",
@@ -112,22 +130,18 @@ class WindowsPrinter(BasePrinter):
                     0  # SW_HIDE
                 )
                 
-                print(f"✓ Windows Print Job (ShellExecute): {job_id}")
-                print(f"  Printer: {printer_name}")
-                print(f"  File: {tmp_path}")
-                print(f"  Size: {len(pdf_data):,} bytes")
+                logger.debug(f"Windows Print Job (ShellExecute): {job_id}", extra={
+                    'printer_job_id': job_id, 'printer': printer_name,
+                    'file': tmp_path, 'size': file_size
+                })
                 
                 return job_id
                 
             except Exception as e:
-                print(f"  ShellExecute failed: {e}")
+                logger.warning(f"ShellExecute failed on {printer_name}: {e}")
                 
                 # Method 3: Try RAW printing (limited support)
                 try:
-                    # Delete temp file before trying RAW
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
-                    
                     h_printer = win32print.OpenPrinter(printer_name)
                     
                     try:
@@ -136,13 +150,18 @@ class WindowsPrinter(BasePrinter):
                         
                         try:
                             win32print.StartPagePrinter(h_printer)
-                            win32print.WritePrinter(h_printer, pdf_data)
+                            with open(file_path, 'rb') as pdf_file:
+                                while True:
+                                    chunk = pdf_file.read(config.SPOOL_CHUNK_SIZE)
+                                    if not chunk:
+                                        break
+                                    win32print.WritePrinter(h_printer, chunk)
                             win32print.EndPagePrinter(h_printer)
                             
-                            print(f"✓ Windows Print Job (RAW): {job_id}")
-                            print(f"  Printer: {printer_name}")
-                            print(f"  Job ID: {job_id_win}")
-                            print(f"  Size: {len(pdf_data):,} bytes")
+                            logger.debug(f"Windows Print Job (RAW): {job_id}", extra={
+                                'printer_job_id': job_id, 'printer': printer_name,
+                                'spooler_job_id': job_id_win, 'size': file_size
+                            })
                             
                             return job_id
                             
@@ -160,14 +179,47 @@ class WindowsPrinter(BasePrinter):
                     )
                     
         except Exception as e:
-            # Clean up temp file on error
-            if os.path.exists(tmp_path):
-                try:
-                    os.unlink(tmp_path)
-                except:
-                    pass
             raise Exception(f"Failed to print: {e}")
     
+    def print_raw(self, printer_name: str, data: bytes) -> str:
+        """
+        Send printer-ready bytes to the spooler as a RAW job.
+        
+        The driver passes the data through unchanged, so ESC/POS receipts
+        print without any PDF rendering.
+        
+        Args:
+            printer_name: Name of the printer
+            data: Printer command stream (e.g. ESC/POS)
+            
+        Returns:
+            Job ID as string
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        job_id = f"win_{timestamp}"
+        
+        try:
+            h_printer = win32print.OpenPrinter(printer_name)
+            try:
+                job_id_win = win32print.StartDocPrinter(h_printer, 1, ("Odoo Print Job", None, "RAW"))
+                try:
+                    win32print.StartPagePrinter(h_printer)
+                    win32print.WritePrinter(h_printer, data)
+                    win32print.EndPagePrinter(h_printer)
+                finally:
+                    win32print.EndDocPrinter(h_printer)
+            finally:
+                win32print.ClosePrinter(h_printer)
+        except Exception as e:
+            raise Exception(f"Failed to print RAW data: {e}")
+        
+        logger.debug(f"Windows Print Job (RAW): {job_id}", extra={
+            'printer_job_id': job_id, 'printer': printer_name,
+            'spooler_job_id': job_id_win, 'size': len(data)
+        })
+        
+        return job_id
+    
     def get_printer_status(self, printer_name: str) -> str:
         """Get Windows printer status"""
         try:
@@ -189,7 +241,7 @@ class WindowsPrinter(BasePrinter):
                 return 'error'
                 
         except Exception as e:
-            print(f"❌ Error getting printer status for {printer_name}: {e}")
+            logger.warning(f"Error getting printer status for {printer_name}: {e}")
             return 'not_found'
     
     def get_default_printer(self) -> str:
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Production Server
+Serves the print server with waitress on Windows and Linux.
+"""
+import signal
+import sys
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+    except:
+        pass
+
+from waitress import create_server
+
+import config
+from app import create_app, print_banner
+from utils import logger
+
+
+def _stop(signum, frame):
+    raise SystemExit(0)
+
+
+def main():
+    """Serve until SIGTERM/Ctrl+C, then drain queued print jobs"""
+    app = create_app()
+    print_banner()
+    
+    server = create_server(
+        app,
+        host=config.HOST,
+        port=config.PORT,
+        threads=config.SERVER_THREADS
+    )
+    
+    signal.signal(signal.SIGTERM, _stop)
+    if hasattr(signal, 'SIGBREAK'):
+        # Ctrl+Break / service stop on Windows
+        signal.signal(signal.SIGBREAK, _stop)
+    
+    logger.info("Serving on http://{}:{} ({} threads)".format(
+        config.HOST, config.PORT, config.SERVER_THREADS
+    ))
+    try:
+        server.run()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        # Stop accepting requests, then finish jobs already queued
+        server.close()
+        app.extensions['print_server'].shutdown()
+
+
+if __name__ == '__main__':
+    main()
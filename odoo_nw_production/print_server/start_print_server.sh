@@ -3,4 +3,4 @@
 
 cd "$(dirname "$0")"
 echo "Starting Print Server..."
-python3 app.py
+python3 serve.py
@@ -1,13 +1,14 @@
 #!/bin/bash
 # Stop Print Server
 
-# Find PID of python3 app.py
-PID=$(pgrep -f "python3 app.py")
+# Find PID of python3 serve.py
+PID=$(pgrep -f "python3 serve.py")
 
 if [ -z "$PID" ]; then
     echo "Print Server is not running."
 else
     echo "Stopping Print Server (PID: $PID)..."
+    # SIGTERM lets the server finish queued print jobs first
     kill $PID
     echo "Print Server stopped."
 fi
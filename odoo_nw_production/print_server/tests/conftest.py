@@ -0,0 +1,28 @@
+"""
+Test Configuration
+Runs the print server modules against mock printers, with spool and mock output in temporary directories.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings are read once when config is imported
+os.environ['MOCK_MODE'] = 'True'
+os.environ['JOURNAL_PATH'] = ''
+os.environ['PRINTER_CACHE_REFRESH'] = '0'
+os.environ['SPOOL_DIR'] = tempfile.mkdtemp(prefix='print_server_spool_')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+
+config.MOCK_OUTPUT_DIR = Path(tempfile.mkdtemp(prefix='print_server_mock_'))
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    """Fresh spool directory per test"""
+    monkeypatch.setattr(config, 'SPOOL_DIR', tmp_path)
+    return tmp_path
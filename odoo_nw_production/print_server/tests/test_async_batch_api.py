@@ -0,0 +1,69 @@
+"""
+Async Batch API Tests
+/api/print/batch of the aiohttp app: multipart files spooled as they arrive and queued one per entry.
+"""
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from aiohttp import FormData  # noqa: E402
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+import async_app  # noqa: E402
+import config  # noqa: E402
+
+PDF_ONE = b'%PDF-1.4\n% first document\n%%EOF\n'
+PDF_TWO = b'%PDF-1.4\n% second document\n%%EOF\n'
+
+
+def _post_files(documents, *files):
+    """
+    Post a multipart batch to a fresh app.
+
+    Returns:
+        (status, body, spool file contents of the queued jobs)
+    """
+    async def run():
+        app = async_app.create_async_app()
+        state = app[async_app.STATE]
+        contents = []
+        submit = state.job_queue.submit
+
+        def recording_submit(job):
+            with open(job.spool_path, 'rb') as spool_file:
+                contents.append(spool_file.read())
+            return submit(job)
+
+        state.job_queue.submit = recording_submit
+        form = FormData()
+        form.add_field('documents', json.dumps(documents))
+        for i, data in enumerate(files):
+            form.add_field('file', data, filename='doc{}.pdf'.format(i),
+                           content_type='application/pdf')
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post('/api/print/batch', data=form)
+            return response.status, await response.json(), contents
+
+    return asyncio.run(run())
+
+
+def test_single_entry_applies_to_every_file(spool_dir):
+    status, body, queued = _post_files([{'printer': config.PRINTER_A_NAME}], PDF_ONE, PDF_TWO)
+
+    assert status == 202
+    assert body['queued'] == 2
+    assert sorted(queued) == sorted([PDF_ONE, PDF_TWO])
+
+
+def test_entry_that_is_not_an_object_fails_alone(spool_dir):
+    status, body, queued = _post_files([{'printer': config.PRINTER_A_NAME}, 'x'], PDF_ONE, PDF_TWO)
+
+    assert status == 202
+    assert body['results'][1] == {'success': False, 'error': 'Document entry must be an object'}
+    assert queued == [PDF_ONE]
+    # The file of the rejected entry is not left in the spool directory
+    assert not [name for name in os.listdir(spool_dir) if name.startswith('job_')]
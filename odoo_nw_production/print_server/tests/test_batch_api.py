@@ -0,0 +1,102 @@
+"""
+Batch API Tests
+/api/print/batch of the Flask app: one result per document, each multipart file queued as its own job.
+"""
+import base64
+import io
+import json
+
+import pytest
+
+pytest.importorskip('flask')
+
+import app as print_server_app  # noqa: E402
+import config  # noqa: E402
+
+PDF_ONE = b'%PDF-1.4\n% first document\n%%EOF\n'
+PDF_TWO = b'%PDF-1.4\n% second document\n%%EOF\n'
+
+
+@pytest.fixture
+def server(spool_dir):
+    app = print_server_app.create_app()
+    state = app.extensions['print_server']
+    yield app.test_client(), state
+    state.shutdown(5)
+
+
+@pytest.fixture
+def queued(server, monkeypatch):
+    """Spool file contents of the jobs handed to the queue, by spool path"""
+    _, state = server
+    contents = {}
+    submit = state.job_queue.submit
+
+    def recording_submit(job):
+        with open(job.spool_path, 'rb') as spool_file:
+            contents[job.spool_path] = spool_file.read()
+        return submit(job)
+
+    monkeypatch.setattr(state.job_queue, 'submit', recording_submit)
+    return contents
+
+
+def _post_files(client, documents, *files):
+    return client.post('/api/print/batch', content_type='multipart/form-data', data={
+        'documents': json.dumps(documents),
+        'file': [(io.BytesIO(data), 'doc{}.pdf'.format(i)) for i, data in enumerate(files)],
+    })
+
+
+def test_single_entry_applies_to_every_file(server, queued):
+    client, _ = server
+    response = _post_files(client, [{'printer': config.PRINTER_A_NAME, 'order_id': 'SO001'}],
+                           PDF_ONE, PDF_TWO)
+
+    assert response.status_code == 202
+    assert response.get_json()['queued'] == 2
+    assert len(queued) == 2
+    assert sorted(queued.values()) == sorted([PDF_ONE, PDF_TWO])
+
+
+def test_entry_that_is_not_an_object_fails_alone(server, queued):
+    client, _ = server
+    response = _post_files(client, [{'printer': config.PRINTER_A_NAME}, 'x'], PDF_ONE, PDF_TWO)
+
+    body = response.get_json()
+    assert response.status_code == 202
+    assert body['queued'] == 1
+    assert body['results'][1] == {'success': False, 'error': 'Document entry must be an object'}
+    assert list(queued.values()) == [PDF_ONE]
+
+
+def test_only_entries_that_are_not_objects(server, queued):
+    client, _ = server
+    response = _post_files(client, ['x'], PDF_ONE)
+
+    assert response.status_code == 400
+    assert response.get_json()['failed'] == 1
+    assert not queued
+
+
+def test_file_count_must_match_entries(server, queued):
+    client, _ = server
+    response = _post_files(client, [{'printer': config.PRINTER_A_NAME}] * 3, PDF_ONE, PDF_TWO)
+
+    assert response.status_code == 400
+    assert not queued
+
+
+def test_json_bad_document_does_not_reject_batch(server, queued):
+    client, _ = server
+    response = client.post('/api/print/batch', json={'documents': [
+        {'printer': config.PRINTER_A_NAME, 'pdf_data': base64.b64encode(PDF_ONE).decode()},
+        {'pdf_data': base64.b64encode(PDF_TWO).decode()},
+        {'printer': config.PRINTER_A_NAME, 'pdf_data': base64.b64encode(b'not a pdf').decode()},
+    ]})
+
+    results = response.get_json()['results']
+    assert response.status_code == 202
+    assert [result['success'] for result in results] == [True, False, False]
+    assert results[1]['error'] == 'Missing required field: printer'
+    assert list(queued.values()) == [PDF_ONE]
@@ -0,0 +1,69 @@
+"""
+Command Printer Tests
+CommandPrinter running a small Python script as the print command.
+"""
+import sys
+import threading
+import time
+
+import pytest
+
+from printers.command_printer import CommandPrinter
+
+# Records its arguments; sleeps when printing to "Stuck"
+SCRIPT = """
+import sys, time
+with open(sys.argv[1], 'a') as log:
+    log.write(' '.join(sys.argv[2:]) + '\\n')
+if sys.argv[2] == 'Stuck':
+    time.sleep(float(sys.argv[3]))
+"""
+
+
+@pytest.fixture
+def command(tmp_path):
+    """Print command template and the file its runs are logged to"""
+    script = tmp_path / 'print.py'
+    script.write_text(SCRIPT)
+    log = tmp_path / 'runs.log'
+    return '{} {} {} {{printer}} {{files}}'.format(sys.executable, script, log), log
+
+
+def _printer(template, **kwargs):
+    return CommandPrinter(template, printer_names=['PrinterA', 'Stuck'], **kwargs)
+
+
+def test_batch_is_one_run(command):
+    template, log = command
+    printer = _printer(template, batch_size=10)
+
+    job_ids = printer.print_files('PrinterA', ['a.pdf', 'b.pdf', 'c.pdf'])
+
+    assert len(set(job_ids)) == 1 and len(job_ids) == 3
+    assert log.read_text().splitlines() == ['PrinterA a.pdf b.pdf c.pdf']
+
+
+def test_stuck_printer_does_not_block_other_printers(command):
+    template, _ = command
+    printer = _printer(template, max_processes=1, timeout=5)
+    stuck = threading.Thread(target=printer.print_file, args=('Stuck', '2'))
+    stuck.start()
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    printer.print_file('PrinterA', 'a.pdf')
+    elapsed = time.monotonic() - started
+    stuck.join()
+
+    assert elapsed < 1.5
+
+
+def test_batch_timeout_is_capped(command):
+    template, _ = command
+    printer = _printer(template, timeout=1, max_timeout=1.5)
+
+    started = time.monotonic()
+    # The first "file" is the sleep time of the stuck printer
+    with pytest.raises(Exception, match='timed out after 1.5s'):
+        printer.print_files('Stuck', ['30'] + ['x.pdf'] * 9)
+    assert time.monotonic() - started < 5
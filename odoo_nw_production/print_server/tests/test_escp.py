@@ -0,0 +1,78 @@
+"""
+ESC/P Tests
+Dot-matrix invoice rendering: fixed page layout, one form feed per page and Thai text.
+"""
+import re
+
+import pytest
+
+from printers.escp import FORM_FEED, INIT, render_invoice
+from printers.escpos import text_width
+
+# ESC/P commands used by the renderer, stripped to compare the printed text
+COMMANDS = re.compile(rb'\x1b@|\x1b\(t\x03\x00\x01.\x00|\x1bt\x01|\x1b[EF]|\x1bW.', re.S)
+
+INVOICE = {
+    'title': 'บิลเงินสด / ใบส่งของ',
+    'header': [['วันที่', '01/01/2024'], ['เลขที่', 'SO001'], ['ลูกค้า', 'ร้านที่หนึ่ง']],
+    'print_time': '10:30',
+    'pages': [
+        {'lines': [{'seq': 1, 'name': 'น้ำดื่ม', 'qty': 2.0, 'unit': 'แพ็ค', 'sub_total': '20.00'}, None, None],
+         'is_last': False, 'page_no': 1, 'total_pages': 2, 'copy_label': 'ต้นฉบับ'},
+        {'lines': [{'seq': 2, 'name': 'ข้าวสาร ' * 20, 'qty': 1, 'unit': 'ถุง', 'sub_total': '1,230.00'}, None, None],
+         'is_last': True, 'page_no': 2, 'total_pages': 2, 'copy_label': 'ต้นฉบับ'},
+    ],
+    'total': '1,250.00',
+}
+
+
+def _item_rows(page):
+    """Lines between the item table rules (after the column titles)"""
+    rules = [i for i, line in enumerate(page) if line == '-' * 80]
+    return page[rules[0] + 1:rules[1]]
+
+
+def _pages(data):
+    """Printed text lines of each page"""
+    text = COMMANDS.sub(b'', data)
+    return [[line.decode('cp874') for line in page.split(b'\r\n')]
+            for page in text.split(FORM_FEED)[:-1]]
+
+
+def test_one_form_feed_per_page():
+    data = render_invoice(INVOICE, width=80)
+
+    assert data.startswith(INIT + b'\x1b(t\x03\x00\x01\x1a\x00\x1bt\x01')
+    assert data.endswith(FORM_FEED)
+    assert data.count(FORM_FEED) == 2
+
+
+def test_pages_keep_their_height_and_total_is_on_the_last():
+    first, second = _pages(render_invoice(INVOICE, width=80))
+
+    # Empty item rows stay as blank lines, so every page has the same rows
+    assert [row.strip() for row in _item_rows(first)][1:] == ['', '']
+    assert len(_item_rows(second)) == len(_item_rows(first)) == 3
+    assert first[0].rstrip().endswith('1/2')
+    assert '"ต้นฉบับ"' in first[1]
+    assert first[3].endswith('เวลา: 10:30')
+    assert not any('ผลรวม' in line for line in first)
+    assert any(line.endswith('ผลรวม  1,250.00') for line in second)
+
+
+def test_lines_fit_the_paper_width():
+    for page in _pages(render_invoice(INVOICE, width=80)):
+        # The title line is printed double width
+        assert all(text_width(line) <= 80 for line in page[1:])
+
+
+@pytest.mark.parametrize('document', [[], {}, {'pages': []}, {'pages': ['x']}])
+def test_malformed_document_is_rejected(document):
+    with pytest.raises(ValueError):
+        render_invoice(document)
+
+
+@pytest.mark.parametrize('header', ['x', [['label']], [['a', 'b', 'c']], ['label: value'], [None]])
+def test_malformed_header_is_rejected(header):
+    with pytest.raises(ValueError, match='header'):
+        render_invoice(dict(INVOICE, header=header))
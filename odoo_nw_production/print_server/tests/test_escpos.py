@@ -0,0 +1,77 @@
+"""
+ESC/POS Tests
+Receipt rendering: Thai column widths, wrapping, and one cut slip per page.
+"""
+import re
+
+import pytest
+
+from printers.escpos import (
+    FEED_AND_CUT, INIT, format_quantity, pad_text, render_receipt, text_width, wrap_text,
+)
+
+# ESC/POS commands used by the renderer, stripped to compare the printed text
+COMMANDS = re.compile(rb'\x1b@|\x1bt.|\x1ba.|\x1bE.|\x1d!.|\x1dV\x42\x00', re.S)
+
+RECEIPT = {
+    'title': 'บิลเงินสด / CASH BILL',
+    'header': [['นามลูกค้า', 'ร้านที่หนึ่ง'], ['เลขที่', 'SO001'], ['หมายเหตุ', None]],
+    'pages': [
+        {'lines': [{'name': 'น้ำดื่ม', 'qty': 2.0, 'sub_total': '20.00'}], 'is_last': False},
+        {'lines': [{'name': 'ข้าวสาร ' * 10, 'qty': 1.5, 'sub_total': '1,230.00'}, None],
+         'is_last': True},
+    ],
+    'total': '1,250.00 ฿',
+    'footer': 'ขอบคุณที่ใช้บริการ',
+}
+
+
+def _text_lines(data):
+    return [line.decode('cp874') for line in COMMANDS.sub(b'', data).split(b'\n')]
+
+
+def test_thai_marks_take_no_columns():
+    assert text_width('ที่') == 1
+    assert text_width('น้ำดื่ม') == 4
+    assert pad_text('ที่', 3, 'right') == '  ที่'
+    assert pad_text('ab', 5, 'center') == ' ab  '
+
+
+def test_wrap_keeps_marks_with_their_base():
+    assert wrap_text('ที่นี่', 1) == ['ที่', 'นี่']
+    assert wrap_text('abcde', 2) == ['ab', 'cd', 'e']
+
+
+def test_quantity_has_no_trailing_zero():
+    assert format_quantity(2.0) == '2'
+    assert format_quantity(1.5) == '1.5'
+    assert format_quantity(None) == ''
+
+
+def test_each_page_is_cut_and_only_the_last_has_the_total():
+    data = render_receipt(RECEIPT, width=48)
+
+    assert data.startswith(INIT + b'\x1bt\x15')
+    assert data.count(FEED_AND_CUT) == 2
+    first, second = data.split(FEED_AND_CUT)[:2]
+    assert 'รวมเป็นเงิน'.encode('cp874') not in first
+    assert 'รวมเป็นเงิน: 1,250.00'.encode('cp874') in second
+    assert 'ขอบคุณที่ใช้บริการ'.encode('cp874') in second
+
+
+def test_lines_fit_the_paper_width():
+    for width in (32, 48):
+        lines = _text_lines(render_receipt(RECEIPT, width=width))
+        assert max(text_width(line) for line in lines) <= width
+
+
+@pytest.mark.parametrize('document', [[], {}, {'pages': []}, {'pages': ['x']}])
+def test_malformed_document_is_rejected(document):
+    with pytest.raises(ValueError):
+        render_receipt(document)
+
+
+@pytest.mark.parametrize('header', ['x', [['label']], [['a', 'b', 'c']], ['label: value'], [None]])
+def test_malformed_header_is_rejected(header):
+    with pytest.raises(ValueError, match='header'):
+        render_receipt(dict(RECEIPT, header=header))
@@ -0,0 +1,138 @@
+"""
+Idempotency Tests
+IdempotencyCache lookups, reservations and LRU eviction, and resends of one key through the API.
+"""
+import base64
+
+import pytest
+
+import config
+from jobs import IdempotencyCache
+
+PDF = b'%PDF-1.4\n% test\n%%EOF\n'
+
+
+def test_stored_result_is_returned():
+    cache = IdempotencyCache(max_keys=10)
+    cache.put('SO001-receipt', {'job_id': 'abc'})
+
+    assert cache.get('SO001-receipt') == {'job_id': 'abc'}
+    assert cache.get('SO002-receipt') is None
+
+
+def test_oldest_key_is_evicted():
+    cache = IdempotencyCache(max_keys=2)
+    cache.put('a', {'job_id': '1'})
+    cache.put('b', {'job_id': '2'})
+    cache.put('c', {'job_id': '3'})
+
+    assert len(cache) == 2
+    assert cache.get('a') is None
+    assert cache.get('c') == {'job_id': '3'}
+
+
+def test_lookup_keeps_key():
+    cache = IdempotencyCache(max_keys=2)
+    cache.put('a', {'job_id': '1'})
+    cache.put('b', {'job_id': '2'})
+    cache.get('a')
+    cache.put('c', {'job_id': '3'})
+
+    assert cache.get('a') == {'job_id': '1'}
+    assert cache.get('b') is None
+
+
+def test_reserved_key_returns_original():
+    cache = IdempotencyCache(max_keys=10)
+    first, second = {'job_id': '1'}, {'job_id': '2'}
+
+    assert cache.reserve('SO001-receipt', first) is None
+    assert cache.reserve('SO001-receipt', second) is first
+
+
+def test_release_forgets_only_own_reservation():
+    cache = IdempotencyCache(max_keys=10)
+    first = {'job_id': '1'}
+    cache.reserve('SO001-receipt', first)
+    cache.release('SO001-receipt', {'job_id': '2'})
+    assert cache.get('SO001-receipt') is first
+
+    cache.release('SO001-receipt', first)
+    assert cache.get('SO001-receipt') is None
+
+
+def test_resend_returns_original_job(spool_dir):
+    pytest.importorskip('flask')
+    import app as print_server_app
+
+    app = print_server_app.create_app()
+    state = app.extensions['print_server']
+    submitted = []
+    submit = state.job_queue.submit
+    state.job_queue.submit = lambda job: submitted.append(job) or submit(job)
+    client = app.test_client()
+    payload = {'printer': config.PRINTER_A_NAME, 'pdf_data': base64.b64encode(PDF).decode()}
+    try:
+        first = client.post('/api/print', json=payload, headers={'Idempotency-Key': 'SO001-receipt'})
+        second = client.post('/api/print', json=payload, headers={'Idempotency-Key': 'SO001-receipt'})
+    finally:
+        state.shutdown(5)
+
+    assert first.status_code == second.status_code == 202
+    assert second.get_json()['job_id'] == first.get_json()['job_id']
+    assert second.get_json()['duplicate'] is True
+    assert len(submitted) == 1
+
+
+def test_resend_after_restart_returns_replayed_job(spool_dir, monkeypatch):
+    pytest.importorskip('flask')
+    import app as print_server_app
+    from jobs import PrintJob, PrintJournal
+
+    journal_path = str(spool_dir / 'journal.jsonl')
+    monkeypatch.setattr(config, 'JOURNAL_PATH', journal_path)
+    journal = PrintJournal(journal_path)
+    journal.open()
+    unfinished = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF, idempotency_key='SO001-receipt')
+    journal.accept(unfinished)
+    journal.close()
+
+    app = print_server_app.create_app()
+    state = app.extensions['print_server']
+    payload = {'printer': config.PRINTER_A_NAME, 'pdf_data': base64.b64encode(PDF).decode()}
+    try:
+        response = app.test_client().post('/api/print', json=payload,
+                                          headers={'Idempotency-Key': 'SO001-receipt'})
+    finally:
+        state.shutdown(5)
+
+    assert response.status_code == 202
+    assert response.get_json()['job_id'] == unfinished.id
+    assert response.get_json()['duplicate'] is True
+
+
+def test_full_queue_releases_key(spool_dir):
+    pytest.importorskip('flask')
+    import app as print_server_app
+    from jobs import QueueFullError
+
+    app = print_server_app.create_app()
+    state = app.extensions['print_server']
+    submit = state.job_queue.submit
+
+    def full_once(job):
+        state.job_queue.submit = submit
+        raise QueueFullError('Print queue is full')
+
+    state.job_queue.submit = full_once
+    client = app.test_client()
+    payload = {'printer': config.PRINTER_A_NAME, 'pdf_data': base64.b64encode(PDF).decode()}
+    try:
+        first = client.post('/api/print', json=payload, headers={'Idempotency-Key': 'SO001-receipt'})
+        second = client.post('/api/print', json=payload, headers={'Idempotency-Key': 'SO001-receipt'})
+    finally:
+        state.shutdown(5)
+
+    assert first.status_code == 429
+    assert second.status_code == 202
+    assert second.get_json()['duplicate'] is False
@@ -0,0 +1,36 @@
+"""
+Inventory Tests
+PrinterInventory background refresh: failed enumerations are counted while the last snapshot keeps serving.
+"""
+import threading
+
+from printers.inventory import PrinterInventory
+from utils import PRINT_ERRORS
+
+
+def _refresh_errors():
+    return PRINT_ERRORS._values.get(('inventory_refresh',), 0)
+
+
+def test_failed_background_refresh_is_counted():
+    calls = []
+    failed = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        if len(calls) > 1:
+            failed.set()
+            raise OSError('CUPS is down')
+        return [{'name': 'PrinterA', 'status': 'ready'}]
+
+    inventory = PrinterInventory(fetch, ttl=60, refresh_interval=0.01)
+    inventory.refresh()
+    errors = _refresh_errors()
+    inventory.start()
+    try:
+        assert failed.wait(5)
+    finally:
+        inventory.stop()
+
+    assert _refresh_errors() > errors
+    assert inventory.get_status('PrinterA') == 'ready'
@@ -0,0 +1,107 @@
+"""
+Journal Tests
+PrintJournal replay of unfinished jobs after a restart, torn lines and incomplete spool files.
+"""
+import json
+
+import pytest
+
+import config
+from jobs import PrintJob, PrintJobQueue, PrintJournal
+from printers.mock_printer import MockPrinter
+
+PDF = b'%PDF-1.4\n% test\n%%EOF\n'
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'journal.jsonl')
+
+
+def _journal(path):
+    journal = PrintJournal(path, fsync_interval=0.05)
+    replayed = journal.open()
+    return journal, replayed
+
+
+def _spooled_job(spool_dir, name, **kwargs):
+    spool_path = spool_dir / name
+    spool_path.write_bytes(PDF)
+    return PrintJob(config.PRINTER_A_NAME, spool_path=str(spool_path), **kwargs)
+
+
+def test_unfinished_jobs_are_replayed(journal_path, spool_dir):
+    journal, replayed = _journal(journal_path)
+    printed = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF)
+    waiting = _spooled_job(spool_dir, 'job_waiting.pdf', order_id='SO002')
+    journal.accept(printed)
+    journal.accept(waiting)
+    journal.finish(printed)
+    journal.close()
+
+    journal, replayed = _journal(journal_path)
+    journal.close()
+
+    assert [record['job_id'] for record in replayed] == [waiting.id]
+    assert replayed[0]['spool_path'] == waiting.spool_path
+    assert replayed[0]['order_id'] == 'SO002'
+    # The journal is rewritten with only the unfinished job
+    with open(journal_path, 'rb') as journal_file:
+        assert len(journal_file.readlines()) == 1
+
+
+def test_queue_prints_replayed_jobs(journal_path):
+    journal, _ = _journal(journal_path)
+    journal.accept(PrintJob(config.PRINTER_A_NAME, pdf_data=PDF))
+    journal.close()
+
+    job_queue = PrintJobQueue(MockPrinter(), journal=PrintJournal(journal_path))
+    assert len(job_queue.replay()) == 1
+    job_queue.shutdown(5)
+
+    journal, replayed = _journal(journal_path)
+    journal.close()
+    assert replayed == []
+
+
+def test_replayed_jobs_keep_their_idempotency_key(journal_path):
+    journal, _ = _journal(journal_path)
+    first = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF, idempotency_key='SO001-receipt')
+    journal.accept(first)
+    journal.close()
+
+    job_queue = PrintJobQueue(MockPrinter(), journal=PrintJournal(journal_path))
+    replayed = job_queue.replay()
+    job_queue.shutdown(5)
+
+    assert [(job.id, job.idempotency_key) for job in replayed] == [(first.id, 'SO001-receipt')]
+
+
+def test_incomplete_spool_file_is_dropped(journal_path, spool_dir):
+    journal, _ = _journal(journal_path)
+    job = _spooled_job(spool_dir, 'job_torn.pdf')
+    journal.accept(job)
+    journal.close()
+    # The file never fully reached the disk
+    (spool_dir / 'job_torn.pdf').write_bytes(PDF[:5])
+
+    journal, replayed = _journal(journal_path)
+    journal.close()
+
+    assert replayed == []
+    assert not (spool_dir / 'job_torn.pdf').exists()
+
+
+def test_torn_line_and_duplicate_keys_are_skipped(journal_path):
+    def accept(job_id, key):
+        return json.dumps({'op': 'accept', 'job_id': job_id, 'printer': config.PRINTER_A_NAME,
+                           'idempotency_key': key, 'data': '', 'created_at': '2024-01-01T00:00:00'})
+
+    with open(journal_path, 'w') as journal_file:
+        journal_file.write('\n'.join([accept('a', 'SO001'), accept('b', 'SO001'), accept('c', None)]))
+        journal_file.write('\n{"op": "acc')
+
+    journal, replayed = _journal(journal_path)
+    journal.close()
+
+    assert [record['job_id'] for record in replayed] == ['a', 'c']
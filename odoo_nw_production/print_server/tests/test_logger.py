@@ -0,0 +1,64 @@
+"""
+Logger Tests
+JSON log lines with extra fields, written to the log file by the QueueListener thread.
+"""
+import json
+import logging
+import logging.handlers
+import sys
+import time
+
+import config
+from utils.logger import JsonFormatter, log_print_job, setup_logger
+
+
+def _read_lines(path, count, timeout=5):
+    """Lines of a log file once the listener thread has written count of them"""
+    deadline = time.monotonic() + timeout
+    while True:
+        lines = path.read_text(encoding='utf-8').splitlines() if path.exists() else []
+        if len(lines) >= count or time.monotonic() > deadline:
+            return lines
+        time.sleep(0.01)
+
+
+def test_json_formatter_writes_extra_fields_and_exception():
+    record = logging.LogRecord('print_server', logging.ERROR, __file__, 1, 'Printer %s failed',
+                               ('PrinterA',), None)
+    record.order_id = 'SO001'
+    try:
+        raise ValueError('jammed')
+    except ValueError:
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry['level'] == 'ERROR'
+    assert entry['message'] == 'Printer PrinterA failed'
+    assert entry['order_id'] == 'SO001'
+    assert 'ValueError: jammed' in entry['exception']
+
+
+def test_records_go_through_queue_to_json_file(tmp_path, monkeypatch):
+    log_file = tmp_path / 'print_server.log'
+    monkeypatch.setattr(config, 'LOG_FILE', str(log_file))
+    logger = setup_logger('print_server_test_queue')
+    logger.propagate = False
+
+    log_print_job(logger, {'job_id': 'abc', 'printer': 'PrinterA', 'order_id': 'SO001',
+                           'report_type': 'invoice', 'size_kb': 1.5, 'timings_ms': {'submit': 12}})
+
+    [line] = _read_lines(log_file, 1)
+    entry = json.loads(line)
+    assert entry['event'] == 'print_job'
+    assert entry['job_id'] == 'abc'
+    assert entry['timings_ms'] == {'submit': 12}
+    assert [type(handler) for handler in logger.handlers] == [logging.handlers.QueueHandler]
+
+
+def test_setup_twice_keeps_one_handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'LOG_FILE', str(tmp_path / 'print_server.log'))
+    logger = setup_logger('print_server_test_twice')
+
+    assert setup_logger('print_server_test_twice') is logger
+    assert len(logger.handlers) == 1
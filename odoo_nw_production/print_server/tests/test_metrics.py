@@ -0,0 +1,73 @@
+"""
+Metrics Tests
+Prometheus text rendering: cumulative histogram buckets, label escaping and label checks.
+"""
+import pytest
+
+from utils import metrics
+from utils.metrics import Counter, Histogram
+
+
+@pytest.fixture
+def new_metric():
+    """Create metrics for one test and drop them from the /metrics registry afterwards"""
+    created = []
+
+    def create(metric_class, *args, **kwargs):
+        metric = metric_class(*args, **kwargs)
+        created.append(metric)
+        return metric
+
+    yield create
+    for metric in created:
+        metrics._registry.remove(metric)
+
+
+def test_histogram_buckets_are_cumulative(new_metric):
+    histogram = new_metric(Histogram, 'test_seconds', 'Test latency', ('stage',), buckets=(1.0, 0.1, 0.5))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, stage='render')
+
+    samples = histogram.render()[2:]
+
+    assert samples == [
+        'test_seconds_bucket{stage="render",le="0.1"} 2',
+        'test_seconds_bucket{stage="render",le="0.5"} 3',
+        'test_seconds_bucket{stage="render",le="1.0"} 3',
+        'test_seconds_bucket{stage="render",le="+Inf"} 4',
+        'test_seconds_sum{stage="render"} 2.45',
+        'test_seconds_count{stage="render"} 4',
+    ]
+
+
+def test_histogram_time_observes_when_block_raises(new_metric):
+    histogram = new_metric(Histogram, 'test_block_seconds', 'Test block')
+    with pytest.raises(ValueError):
+        with histogram.time():
+            raise ValueError('boom')
+
+    assert histogram.render()[-1] == 'test_block_seconds_count 1'
+
+
+def test_label_values_are_escaped(new_metric):
+    counter = new_metric(Counter, 'test_total', 'Test counter', ('printer',))
+    counter.inc(printer='Office "A"\\2\nfloor')
+
+    assert counter.render()[2] == 'test_total{printer="Office \\"A\\"\\\\2\\nfloor"} 1'
+
+
+def test_wrong_labels_are_rejected(new_metric):
+    counter = new_metric(Counter, 'test_labels_total', 'Test labels', ('cause',))
+
+    with pytest.raises(ValueError):
+        counter.inc(printer='PrinterA')
+
+
+def test_render_metrics_includes_help_and_type(new_metric):
+    new_metric(Counter, 'test_render_total', 'Rendered counter').inc()
+
+    text = metrics.render_metrics()
+
+    assert '# HELP test_render_total Rendered counter\n# TYPE test_render_total counter\n' \
+           'test_render_total 1\n' in text
+    assert text.endswith('\n')
@@ -0,0 +1,149 @@
+"""
+Print Queue Tests
+PrintJobQueue against mock printers: submission, failures, job status, full queues, replay and shutdown.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import config
+from jobs import AsyncPrintJobQueue, PrintJob, PrintJobQueue, PrintJournal, QueueFullError
+from printers.mock_printer import MockPrinter
+
+PDF = b'%PDF-1.4\n% test\n%%EOF\n'
+
+
+class FailingPrinter(MockPrinter):
+    """Mock printer whose every submission fails"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def print_pdf(self, printer_name, pdf_data):
+        self.calls += 1
+        raise Exception('Printer jammed')
+
+
+class BlockedPrinter(MockPrinter):
+    """Mock printer that holds every submission until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def print_pdf(self, printer_name, pdf_data):
+        self.started.set()
+        self.release.wait(5)
+        return super().print_pdf(printer_name, pdf_data)
+
+
+def _run(printer, *jobs):
+    """Queue jobs, wait until the printer has taken them and stop the queue"""
+    job_queue = PrintJobQueue(printer)
+    for job in jobs:
+        job_queue.submit(job)
+    for job in jobs:
+        assert job.submitted.wait(5)
+    job_queue.shutdown(5)
+    return job_queue
+
+
+def test_job_is_printed():
+    job = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF, order_id='SO001')
+    job_queue = _run(MockPrinter(), job)
+
+    status = job_queue.registry.get(job.id)
+    assert status['status'] == 'done'
+    assert status['printer_job_id'].startswith('mock_')
+    assert set(job.timings) == {'queue_wait', 'submit'}
+
+
+def test_failed_submission_is_not_retried():
+    # A failed submission may still have reached the spooler; the sender
+    # retries with its idempotency key instead of the worker printing twice
+    printer = FailingPrinter()
+    job = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF)
+    job_queue = _run(printer, job)
+
+    assert printer.calls == 1
+    status = job_queue.registry.get(job.id)
+    assert status['status'] == 'failed'
+    assert status['error'] == 'Printer jammed'
+
+
+def test_full_queue_rejects_job():
+    printer = BlockedPrinter()
+    job_queue = PrintJobQueue(printer, workers_per_printer=1, max_queue_size=1)
+    job_queue.submit(PrintJob(config.PRINTER_A_NAME, pdf_data=PDF))
+    assert printer.started.wait(5)
+    job_queue.submit(PrintJob(config.PRINTER_A_NAME, pdf_data=PDF))
+    rejected = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF)
+
+    with pytest.raises(QueueFullError):
+        job_queue.submit(rejected)
+    assert job_queue.registry.get(rejected.id)['status'] == 'failed'
+    printer.release.set()
+    job_queue.shutdown(5)
+
+
+def test_shutdown_does_not_wait_for_room_in_full_queue():
+    printer = BlockedPrinter()
+    job_queue = PrintJobQueue(printer, workers_per_printer=1, max_queue_size=1)
+    job_queue.submit(PrintJob(config.PRINTER_A_NAME, pdf_data=PDF))
+    assert printer.started.wait(5)
+    job_queue.submit(PrintJob(config.PRINTER_A_NAME, pdf_data=PDF))
+
+    stopper = threading.Thread(target=job_queue.shutdown, args=(0.1,))
+    stopper.start()
+    stopper.join(2)
+    alive = stopper.is_alive()
+    printer.release.set()
+    stopper.join(5)
+
+    assert not alive
+
+
+def _journal_with_jobs(path, count):
+    journal = PrintJournal(path, fsync_interval=0.05)
+    journal.open()
+    jobs = [PrintJob(config.PRINTER_A_NAME, pdf_data=PDF) for _ in range(count)]
+    for job in jobs:
+        journal.accept(job)
+    journal.close()
+    return jobs
+
+
+def test_replay_more_jobs_than_queue_holds(tmp_path):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    jobs = _journal_with_jobs(journal_path, 3)
+
+    job_queue = PrintJobQueue(MockPrinter(), max_queue_size=1, journal=PrintJournal(journal_path))
+    replayed = job_queue.replay()
+    for job in replayed:
+        assert job.submitted.wait(5)
+    job_queue.shutdown(5)
+
+    assert [job.id for job in replayed] == [job.id for job in jobs]
+    assert all(job_queue.registry.get(job.id)['status'] == 'done' for job in jobs)
+
+
+def test_async_replay_and_shutdown_with_full_queue(tmp_path):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    _journal_with_jobs(journal_path, 3)
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            job_queue = AsyncPrintJobQueue(MockPrinter(), executor, workers_per_printer=1,
+                                           max_queue_size=1, journal=PrintJournal(journal_path))
+            replayed = await asyncio.wait_for(job_queue.replay(), 2)
+            await asyncio.wait_for(job_queue.shutdown(5), 5)
+            return job_queue, replayed
+
+    job_queue, replayed = asyncio.run(run())
+
+    assert len(replayed) == 3
+    assert all(job_queue.registry.get(job.id)['status'] == 'done' for job in replayed)
@@ -0,0 +1,96 @@
+"""
+Registry Tests
+JobRegistry status round-trips through SQLite and batched spooler polls, including jobs the spooler has purged.
+"""
+import config
+from jobs import JobRegistry, PrintJob
+from printers.mock_printer import MockPrinter
+
+PDF = b'%PDF-1.4\n% test\n%%EOF\n'
+
+
+class SpoolerPrinter(MockPrinter):
+    """Mock printer reporting spooler state from a dict of printer job IDs"""
+
+    tracks_jobs = True
+
+    def __init__(self):
+        super().__init__()
+        self.states = {}
+
+    def get_jobs_status(self, job_ids):
+        return {job_id: self.states[job_id] for job_id in job_ids if job_id in self.states}
+
+
+def _printing_job(registry, printer_job_id='42'):
+    job = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF, order_id='SO001')
+    registry.add(job)
+    registry.set_status(job, 'printing', printer_job_id=printer_job_id)
+    return job
+
+
+def test_status_survives_restart(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    registry = JobRegistry(db_path=db_path)
+    job = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF, order_id='SO001')
+    registry.add(job)
+    registry.set_status(job, 'failed', error='Printer jammed')
+
+    status = JobRegistry(db_path=db_path).get(job.id)
+
+    assert status['status'] == 'failed'
+    assert status['error'] == 'Printer jammed'
+    assert status['order_id'] == 'SO001'
+    assert status['finished_at'] == status['updated_at']
+
+
+def test_evicted_job_is_read_from_database(tmp_path):
+    registry = JobRegistry(db_path=str(tmp_path / 'jobs.db'), max_jobs=1)
+    first = PrintJob(config.PRINTER_A_NAME, pdf_data=PDF)
+    registry.add(first)
+    registry.set_status(first, 'done', printer_job_id='7')
+    registry.add(PrintJob(config.PRINTER_A_NAME, pdf_data=PDF))
+
+    assert first.id not in registry._jobs
+    assert registry.get(first.id)['printer_job_id'] == '7'
+    assert registry.get('unknown') is None
+
+
+def test_poll_updates_spooler_state():
+    printer = SpoolerPrinter()
+    registry = JobRegistry(printer, db_path='')
+    job = _printing_job(registry)
+    printer.states['42'] = ('failed', 'aborted')
+
+    registry.poll()
+
+    status = registry.get(job.id)
+    assert status['status'] == 'failed'
+    assert status['printer_state'] == 'aborted'
+    assert status['error'] == 'Printer job aborted'
+
+
+def test_job_missing_from_spooler_is_done_after_grace():
+    printer = SpoolerPrinter()
+    registry = JobRegistry(printer, db_path='', missing_grace=0)
+    job = _printing_job(registry)
+
+    registry.poll()
+
+    status = registry.get(job.id)
+    assert status['status'] == 'done'
+    assert status['printer_state'] == 'unknown'
+
+
+def test_job_missing_within_grace_stays_printing():
+    printer = SpoolerPrinter()
+    registry = JobRegistry(printer, db_path='', missing_grace=60)
+    job = _printing_job(registry)
+
+    registry.poll()
+    assert registry.get(job.id)['status'] == 'printing'
+
+    # Seen again: the grace period starts over
+    printer.states['42'] = ('printing', 'processing')
+    registry.poll()
+    assert registry._missing == {}
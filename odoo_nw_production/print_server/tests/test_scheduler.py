@@ -0,0 +1,74 @@
+"""
+Scheduler Tests
+FairBuffer ordering: priorities first, then clients taking turns, stop sentinels last.
+"""
+import queue
+
+import pytest
+
+from jobs import PrintJob
+from jobs.scheduler import FairBuffer, FairQueue
+
+
+def _job(client_id, priority='normal'):
+    return PrintJob('PrinterA', pdf_data=b'', client_id=client_id, priority=priority)
+
+
+def _drain(buffer):
+    jobs = []
+    while len(buffer):
+        jobs.append(buffer.popleft())
+    return jobs
+
+
+def test_clients_take_turns():
+    buffer = FairBuffer()
+    bulk = [_job('terminal-1') for _ in range(3)]
+    receipt = _job('terminal-2')
+    for job in bulk + [receipt]:
+        buffer.append(job)
+
+    assert _drain(buffer) == [bulk[0], receipt, bulk[1], bulk[2]]
+
+
+def test_higher_priority_goes_first():
+    buffer = FairBuffer()
+    low = _job('a', 'low')
+    normal = _job('a')
+    high = _job('b', 'high')
+    for job in (low, normal, high):
+        buffer.append(job)
+
+    assert _drain(buffer) == [high, normal, low]
+
+
+def test_unknown_priority_is_normal():
+    buffer = FairBuffer()
+    odd = _job('a', 'urgent')
+    high = _job('b', 'high')
+    low = _job('c', 'low')
+    for job in (low, odd, high):
+        buffer.append(job)
+
+    assert _drain(buffer) == [high, odd, low]
+
+
+def test_stop_sentinels_come_after_jobs():
+    buffer = FairBuffer()
+    job = _job('a')
+    buffer.append(None)
+    buffer.append(job)
+
+    assert len(buffer) == 2
+    assert _drain(buffer) == [job, None]
+    with pytest.raises(IndexError):
+        buffer.popleft()
+
+
+def test_fair_queue_is_bounded():
+    job_queue = FairQueue(maxsize=1)
+    job_queue.put_nowait(_job('a'))
+
+    with pytest.raises(queue.Full):
+        job_queue.put_nowait(_job('b'))
+    assert job_queue.get_nowait().client_id == 'a'
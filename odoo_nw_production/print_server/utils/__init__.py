@@ -1,14 +1,40 @@
 """Utilities package"""
-from .pdf_handler import decode_base64_pdf, encode_pdf_to_base64, validate_pdf, get_pdf_info
+from .pdf_handler import (
+    decode_base64_pdf, encode_pdf_to_base64, validate_pdf, get_pdf_info, get_pdf_file_info
+)
+from .spool import (
+    spool_to_file, spool_chunks_to_file, spool_base64_to_file, write_spool_file, remove_spool_file
+)
 from .logger import setup_logger, log_print_job, log_error, logger
+from .metrics import (
+    Counter, Gauge, Histogram, render_metrics,
+    PRINT_JOBS, PRINT_BYTES, PRINT_STAGE_SECONDS, PRINT_QUEUE_DEPTH, PRINT_ERRORS,
+    PRINTER_ENUMERATION_SECONDS
+)
 
 __all__ = [
     'decode_base64_pdf',
     'encode_pdf_to_base64',
     'validate_pdf',
     'get_pdf_info',
+    'get_pdf_file_info',
+    'spool_to_file',
+    'spool_chunks_to_file',
+    'spool_base64_to_file',
+    'write_spool_file',
+    'remove_spool_file',
     'setup_logger',
     'log_print_job',
     'log_error',
-    'logger'
+    'logger',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'render_metrics',
+    'PRINT_JOBS',
+    'PRINT_BYTES',
+    'PRINT_STAGE_SECONDS',
+    'PRINT_QUEUE_DEPTH',
+    'PRINT_ERRORS',
+    'PRINTER_ENUMERATION_SECONDS'
 ]
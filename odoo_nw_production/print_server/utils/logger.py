@@ -1,18 +1,52 @@
 """
 Logging Configuration
-Configures logging for the print server.
+Configures logging for the print server: JSON lines to a rotating file and short lines to the console, written by a background thread.
 """
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from pathlib import Path
 from datetime import datetime
 import config
 
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line.
+    
+    Fields passed with ``extra=`` (job_id, printer, order_id, timings_ms, ...)
+    are written as top-level keys next to time, level, logger and message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 
 def setup_logger(name: str = 'print_server') -> logging.Logger:
     """
     Setup and configure logger.
     
+    Request and worker threads only put records on an in-memory queue; a
+    QueueListener thread writes them to the JSON log file (rotated at
+    LOG_MAX_BYTES) and the console, so a slow console never blocks a
+    request.
+    
     Args:
         name: Logger name
         
@@ -26,28 +60,28 @@ def setup_logger(name: str = 'print_server') -> logging.Logger:
     if logger.handlers:
         return logger
     
-    # Create formatters
-    detailed_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    simple_formatter = logging.Formatter(
-        '%(levelname)s: %(message)s'
+    # File handler - JSON lines, size-based rotation
+    file_handler = logging.handlers.RotatingFileHandler(
+        config.LOG_FILE, maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT, encoding='utf-8'
     )
-    
-    # File handler - detailed logs
-    file_handler = logging.FileHandler(config.LOG_FILE, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(detailed_formatter)
-    logger.addHandler(file_handler)
+    file_handler.setFormatter(JsonFormatter())
     
     # Console handler - simple logs
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Write out what is still queued when the process exits
+    atexit.register(listener.stop)
     
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     return logger
 
 
@@ -57,15 +91,18 @@ def log_print_job(logger: logging.Logger, job_info: dict):
     
     Args:
         logger: Logger instance
-        job_info: Dictionary containing job information
+        job_info: Dictionary containing job information (job_id,
+            printer_job_id, printer, report_type, order_id, size_kb and
+            optionally timings_ms: milliseconds per stage)
     """
     logger.info(
         f"Print Job | "
-        f"ID: {job_info.get('job_id')} | "
+        f"ID: {job_info.get('printer_job_id') or job_info.get('job_id')} | "
         f"Printer: {job_info.get('printer')} | "
         f"Type: {job_info.get('report_type')} | "
         f"Order: {job_info.get('order_id')} | "
-        f"Size: {job_info.get('size_kb', 0):.2f} KB"
+        f"Size: {job_info.get('size_kb', 0):.2f} KB",
+        extra=dict(job_info, event='print_job')
     )
 
 
@@ -81,7 +118,8 @@ def log_error(logger: logging.Logger, error_info: dict):
         f"Print Error | "
         f"Printer: {error_info.get('printer')} | "
         f"Error: {error_info.get('error')} | "
-        f"Order: {error_info.get('order_id')}"
+        f"Order: {error_info.get('order_id')}",
+        extra=dict(error_info, event='print_error')
     )
 
 
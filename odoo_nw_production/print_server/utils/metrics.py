@@ -0,0 +1,180 @@
+"""
+Metrics
+Prometheus-style counters, gauges and histograms exposed on /metrics.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Default latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: List['_Metric'] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple, extra: str = '') -> str:
+    pairs = ['{}="{}"'.format(name, _escape(value)) for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """Base class: one named metric with a fixed set of label names"""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError('{} expects labels {}'.format(self.name, self.labelnames))
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            '# HELP {} {}'.format(self.name, self.documentation),
+            '# TYPE {} {}'.format(self.name, self.type_name)
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    type_name = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return ['{}{} {}'.format(self.name, _format_labels(self.labelnames, key), value)
+                for key, value in values]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type_name = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return ['{}{} {}'.format(self.name, _format_labels(self.labelnames, key), value)
+                for key, value in values]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. latencies) in cumulative buckets"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(data)) for key, data in self._values.items()]
+        lines = []
+        for key, data in values:
+            for bound, count in zip(self.buckets, data):
+                lines.append('{}_bucket{} {}'.format(
+                    self.name, _format_labels(self.labelnames, key, 'le="{}"'.format(bound)), count
+                ))
+            lines.append('{}_bucket{} {}'.format(
+                self.name, _format_labels(self.labelnames, key, 'le="+Inf"'), data[-1]
+            ))
+            lines.append('{}_sum{} {}'.format(self.name, _format_labels(self.labelnames, key), data[-2]))
+            lines.append('{}_count{} {}'.format(self.name, _format_labels(self.labelnames, key), data[-1]))
+        return lines
+
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Print server metrics
+PRINT_JOBS = Counter(
+    'print_jobs_total', 'Print jobs handled by the print workers',
+    ('printer', 'report_type', 'status')
+)
+PRINT_BYTES = Counter(
+    'print_bytes_total', 'Document bytes sent to printers',
+    ('printer',)
+)
+PRINT_STAGE_SECONDS = Histogram(
+    'print_stage_seconds', 'Latency of each print pipeline stage '
+    '(decode, spool, render, validate, queue_wait, submit)',
+    ('stage',)
+)
+PRINT_QUEUE_DEPTH = Gauge(
+    'print_queue_depth', 'Jobs waiting in each printer queue',
+    ('printer',)
+)
+PRINT_ERRORS = Counter(
+    'print_errors_total', 'Print request and job errors by cause',
+    ('cause',)
+)
+PRINTER_ENUMERATION_SECONDS = Histogram(
+    'printer_enumeration_seconds', 'Time spent enumerating printers'
+)
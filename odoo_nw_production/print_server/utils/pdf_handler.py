@@ -3,6 +3,7 @@ PDF Handler Utilities
 Utilities for processing PDF files.
 """
 import base64
+import os
 from typing import Optional
 
 
@@ -87,3 +88,28 @@ def get_pdf_info(pdf_data: bytes) -> Optional[dict]:
             'size': len(pdf_data),
             'size_kb': round(len(pdf_data) / 1024, 2)
         }
+
+
+def get_pdf_file_info(pdf_path: str) -> Optional[dict]:
+    """
+    Extract basic information from a PDF file on disk.
+    
+    Reads only the header, so large files are not loaded into memory.
+    
+    Args:
+        pdf_path: Path of the PDF file
+        
+    Returns:
+        Dictionary with PDF info or None if invalid
+    """
+    with open(pdf_path, 'rb') as pdf_file:
+        header = pdf_file.read(20)
+    
+    info = get_pdf_info(header)
+    if info is None:
+        return None
+    
+    size = os.path.getsize(pdf_path)
+    info['size'] = size
+    info['size_kb'] = round(size / 1024, 2)
+    return info
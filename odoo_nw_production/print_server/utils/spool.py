@@ -0,0 +1,176 @@
+"""
+Spool File Utilities
+Streams incoming documents to disk in chunks so the whole file is never held in memory.
+"""
+import asyncio
+import base64
+import binascii
+import functools
+import os
+import tempfile
+from typing import AsyncIterator, BinaryIO
+
+import config
+from .pdf_handler import validate_pdf
+
+
+def spool_to_file(stream: BinaryIO, spool_dir=None, chunk_size: int = None) -> str:
+    """
+    Copy a PDF stream into a new spool file.
+    
+    Only the first chunk is checked for the PDF header; the rest is copied
+    as-is.
+    
+    Args:
+        stream: Readable binary stream (e.g. the request body)
+        spool_dir: Directory for the spool file (default: config.SPOOL_DIR)
+        chunk_size: Bytes read per chunk (default: config.SPOOL_CHUNK_SIZE)
+        
+    Returns:
+        Path of the spool file
+        
+    Raises:
+        ValueError: If the stream is empty or not a PDF
+    """
+    spool_dir = spool_dir or config.SPOOL_DIR
+    chunk_size = chunk_size or config.SPOOL_CHUNK_SIZE
+    
+    first_chunk = stream.read(chunk_size)
+    if not validate_pdf(first_chunk):
+        raise ValueError('Invalid PDF file')
+    
+    fd, spool_path = tempfile.mkstemp(suffix='.pdf', prefix='job_', dir=str(spool_dir))
+    try:
+        with os.fdopen(fd, 'wb') as spool_file:
+            spool_file.write(first_chunk)
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                spool_file.write(chunk)
+    except Exception:
+        remove_spool_file(spool_path)
+        raise
+    
+    return spool_path
+
+
+async def spool_chunks_to_file(chunks: AsyncIterator[bytes], spool_dir=None) -> str:
+    """
+    Copy an async stream of chunks (e.g. an aiohttp request body) into a new spool file.
+    
+    The PDF header is checked once enough bytes have arrived; the rest is
+    copied as-is. Creating, writing and closing the file run in the loop's
+    default executor, so a slow disk never stalls the event loop.
+    
+    Args:
+        chunks: Async iterator of bytes
+        spool_dir: Directory for the spool file (default: config.SPOOL_DIR)
+        
+    Returns:
+        Path of the spool file
+        
+    Raises:
+        ValueError: If the stream is empty or not a PDF
+    """
+    spool_dir = spool_dir or config.SPOOL_DIR
+    loop = asyncio.get_running_loop()
+    
+    head = b''
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= 8:
+            break
+    if not validate_pdf(head):
+        raise ValueError('Invalid PDF file')
+    
+    fd, spool_path = await loop.run_in_executor(
+        None, functools.partial(tempfile.mkstemp, suffix='.pdf', prefix='job_', dir=str(spool_dir))
+    )
+    try:
+        spool_file = os.fdopen(fd, 'wb')
+        try:
+            await loop.run_in_executor(None, spool_file.write, head)
+            async for chunk in chunks:
+                await loop.run_in_executor(None, spool_file.write, chunk)
+        finally:
+            await loop.run_in_executor(None, spool_file.close)
+    except BaseException:
+        remove_spool_file(spool_path)
+        raise
+    
+    return spool_path
+
+
+def spool_base64_to_file(pdf_base64: str, spool_dir=None, chunk_size: int = None) -> str:
+    """
+    Decode base64 PDF data into a new spool file, chunk by chunk.
+    
+    Avoids building a second full copy of the document in memory next to
+    the base64 string.
+    
+    Args:
+        pdf_base64: Base64-encoded PDF string
+        spool_dir: Directory for the spool file (default: config.SPOOL_DIR)
+        chunk_size: Base64 characters decoded per chunk (default: config.SPOOL_CHUNK_SIZE)
+        
+    Returns:
+        Path of the spool file
+        
+    Raises:
+        ValueError: If the data is not valid base64 or not a PDF
+    """
+    spool_dir = spool_dir or config.SPOOL_DIR
+    # Decode in multiples of 4 characters so chunks align with base64 quanta
+    chunk_size = max(4, (chunk_size or config.SPOOL_CHUNK_SIZE) // 4 * 4)
+    if '\n' in pdf_base64 or '\r' in pdf_base64:
+        # Line-wrapped base64 would misalign the decode chunks
+        pdf_base64 = ''.join(pdf_base64.split())
+    
+    try:
+        first_chunk = base64.b64decode(pdf_base64[:chunk_size])
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Failed to decode base64 PDF: {e}")
+    if not validate_pdf(first_chunk):
+        raise ValueError('Invalid PDF file')
+    
+    fd, spool_path = tempfile.mkstemp(suffix='.pdf', prefix='job_', dir=str(spool_dir))
+    try:
+        with os.fdopen(fd, 'wb') as spool_file:
+            spool_file.write(first_chunk)
+            for offset in range(chunk_size, len(pdf_base64), chunk_size):
+                spool_file.write(base64.b64decode(pdf_base64[offset:offset + chunk_size]))
+    except (binascii.Error, ValueError) as e:
+        remove_spool_file(spool_path)
+        raise ValueError(f"Failed to decode base64 PDF: {e}")
+    except Exception:
+        remove_spool_file(spool_path)
+        raise
+    
+    return spool_path
+
+
+def write_spool_file(data: bytes, spool_dir=None) -> str:
+    """
+    Write in-memory document data to a new spool file.
+    
+    Args:
+        data: Document content
+        spool_dir: Directory for the spool file (default: config.SPOOL_DIR)
+        
+    Returns:
+        Path of the spool file
+    """
+    spool_dir = spool_dir or config.SPOOL_DIR
+    fd, spool_path = tempfile.mkstemp(suffix='.pdf', prefix='job_', dir=str(spool_dir))
+    with os.fdopen(fd, 'wb') as spool_file:
+        spool_file.write(data)
+    return spool_path
+
+
+def remove_spool_file(spool_path: str):
+    """Delete a spool file, ignoring files that are already gone"""
+    try:
+        os.unlink(spool_path)
+    except FileNotFoundError:
+        pass